@@ -0,0 +1,251 @@
+"""
+basket.py — Minimum-cost fruit basket that meets the daily recommendation
+==========================================================================
+household_annual_budget() prices a household at one reference $/cup. This
+module answers the sharper question: which mix of items is the cheapest way
+to eat ``cups_per_day`` cup-equivalents a day, given limits on forms and a
+minimum amount of variety?
+
+Per person and per day, with x_i the cups of item i:
+
+    minimise    Σ price_i · x_i
+    subject to  Σ x_i = cups_per_day
+                Σ_{i in form f} x_i ≤ form_caps[f] · cups_per_day    (per-form caps)
+                Σ_{i in form f} x_i ≥ form_mins[f] · cups_per_day    (per-form floors)
+                x_i ≤ max_item_share · cups_per_day                  (optional)
+                at least min_distinct base fruits with ≥ min_portion cups each
+
+The variety rule needs one binary per base fruit, so the problem is a small
+mixed-integer program solved with scipy.optimize.milp (HiGHS). The membership
+matrices are built once per frame, and a solve on fruits.csv takes a few
+milliseconds. The form and item limits are shares of cups_per_day, but
+min_portion is an absolute amount of cups, so min_distinct · min_portion
+must fit in cups_per_day. A household of n people eats n times the
+per-person basket; household costs are derived from the per-person optimum
+like household_annual_budget's.
+
+    opt = BasketOptimizer(df)
+    basket = opt.solve(min_distinct=5)                    # Basket(items, ...)
+    opt.household_budget(min_distinct=5)                  # one row per HOUSEHOLD_SIZES
+    opt.sweep({"min_distinct": [0, 3, 5, 8], "form_caps": [None, {"Juice": 0.25}]})
+
+    python basket.py --min-distinct 5 --cap Juice=0.25
+"""
+
+import argparse
+import itertools
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from utils import (
+    BUDGET_PERIODS, DAILY_CUPS_ADULT, HOUSEHOLD_SIZES, STRATEGIES, _item_cols,
+    household_cost_matrix, load_dataframe, select_commodity,
+)
+
+# USDA guidance: at least half of fruit intake should come from whole fruit.
+DEFAULT_FORM_CAPS = {"Juice": 0.5}
+# A base fruit counts towards min_distinct at one cup-equivalent a week.
+DEFAULT_MIN_PORTION = 1 / 7
+
+
+class Basket(NamedTuple):
+    """One optimal per-person daily basket."""
+    items:         pd.DataFrame   # chosen items with CupsPerDay, Share and DailyCost
+    cost_per_day:  float          # $ per person per day, unrounded
+    price_per_cup: float          # cost_per_day / cups_per_day, unrounded
+    cups_per_day:  float
+
+
+class BasketOptimizer:
+    """
+    Cheapest-basket solver over one enriched frame.
+
+    The item prices and the form and base-fruit membership matrices are
+    built in the constructor. solve() only stacks the rows its arguments
+    need and makes one HiGHS call, so interactive controls and sweeps
+    can re-solve freely.
+    Items with a missing or non-positive price are left out.
+    """
+
+    def __init__(self, df: pd.DataFrame, commodity: str | None = None):
+        df = select_commodity(df, commodity)
+        self.item_col, self.base_col = _item_cols(df)
+        price = df["CupEquivalentPrice"].to_numpy(dtype="float64")
+        df = df.loc[np.isfinite(price) & (price > 0)]
+        self.items = df[[self.item_col, self.base_col, "Form", "CupEquivalentPrice"]].reset_index(drop=True)
+        self.prices = self.items["CupEquivalentPrice"].to_numpy(dtype="float64")
+        n = len(self.items)
+        if not n:
+            raise ValueError("no priced items to build a basket from")
+
+        form_codes, self.forms = pd.factorize(self.items["Form"].astype(str))
+        base_codes, self.bases = pd.factorize(self.items[self.base_col].astype(str))
+        cols = np.arange(n)
+        self._form_rows = sparse.csr_array((np.ones(n), (form_codes, cols)), shape=(len(self.forms), n))
+        self._base_rows = sparse.csr_array((np.ones(n), (base_codes, cols)), shape=(len(self.bases), n))
+        self._form_pos  = {f: i for i, f in enumerate(self.forms)}
+
+    # ── solving ──────────────────────────────────────────────
+    def _form_constraint(self, shares: dict, cups: float, upper: bool) -> LinearConstraint | None:
+        unknown = set(shares) - set(self._form_pos)
+        if unknown:
+            raise ValueError(f"unknown form(s) {sorted(unknown)}; have {list(self.forms)}")
+        rows = [self._form_pos[f] for f in shares]
+        if not rows:
+            return None
+        rhs = np.array([shares[f] * cups for f in shares])
+        lb, ub = (np.full(len(rows), -np.inf), rhs) if upper else (rhs, np.full(len(rows), np.inf))
+        return LinearConstraint(self._form_rows[rows], lb, ub)
+
+    def solve(self, cups_per_day: float = DAILY_CUPS_ADULT, form_caps: dict | None = None,
+              form_mins: dict | None = None, min_distinct: int = 0,
+              min_portion: float = DEFAULT_MIN_PORTION, max_item_share: float | None = None,
+              prices: np.ndarray | None = None) -> Basket:
+        """
+        Cheapest per-person daily basket.
+
+        form_caps / form_mins map a Form to the largest / smallest share of
+        the daily cups it may take (form_caps defaults to DEFAULT_FORM_CAPS;
+        pass {} for none). min_distinct base fruits must each contribute at
+        least min_portion cups a day (an absolute amount, not scaled by
+        cups_per_day). max_item_share caps any single item.
+        prices overrides the $/cup of every item (same order as .items) for
+        what-if runs. Raises ValueError when the constraints are infeasible.
+        """
+        if min_distinct > len(self.bases):
+            raise ValueError(f"min_distinct={min_distinct} but only {len(self.bases)} base items")
+        if min_distinct * min_portion > cups_per_day + 1e-9:
+            raise ValueError(f"min_distinct · min_portion = {min_distinct * min_portion:g} cups "
+                             f"exceeds cups_per_day={cups_per_day:g}")
+        if form_caps is None:       # defaults apply only to forms this frame has
+            caps = {f: s for f, s in DEFAULT_FORM_CAPS.items() if f in self._form_pos}
+        else:
+            caps = form_caps
+        price = self.prices if prices is None else np.asarray(prices, dtype="float64")
+        n, m = len(self.prices), len(self.bases) if min_distinct else 0
+
+        c = np.concatenate([price, np.zeros(m)])
+        item_ub = cups_per_day * (max_item_share if max_item_share is not None else 1.0)
+        bounds = Bounds(np.zeros(n + m), np.concatenate([np.full(n, item_ub), np.ones(m)]))
+
+        def _rows(block):
+            return sparse.hstack([block, sparse.csr_array((block.shape[0], m))]) if m else block
+
+        constraints = [LinearConstraint(_rows(sparse.csr_array(np.ones((1, n)))), cups_per_day, cups_per_day)]
+        for shares, upper in ((caps, True), (form_mins or {}, False)):
+            con = self._form_constraint(shares, cups_per_day, upper)
+            if con is not None:
+                constraints.append(LinearConstraint(_rows(con.A), con.lb, con.ub))
+        if m:
+            # Σ_{i in base b} x_i ≥ min_portion · y_b, and Σ y_b ≥ min_distinct.
+            link = sparse.hstack([self._base_rows, sparse.diags_array(np.full(m, -min_portion))])
+            constraints.append(LinearConstraint(link, 0, np.inf))
+            count = sparse.hstack([sparse.csr_array((1, n)), sparse.csr_array(np.ones((1, m)))])
+            constraints.append(LinearConstraint(count, min_distinct, np.inf))
+
+        res = milp(c, constraints=constraints, bounds=bounds,
+                   integrality=np.concatenate([np.zeros(n), np.ones(m)]))
+        if res.status != 0 or res.x is None:
+            raise ValueError(f"no feasible basket: {res.message}")
+        return self._basket(res.x[:n], price, cups_per_day)
+
+    def _basket(self, x: np.ndarray, price: np.ndarray, cups: float) -> Basket:
+        x = np.where(x > 1e-9, x, 0.0)
+        chosen = np.flatnonzero(x)
+        items = self.items.iloc[chosen].reset_index(drop=True)
+        items["CupEquivalentPrice"] = price[chosen]
+        items["CupsPerDay"]  = x[chosen].round(4)
+        items["CupsPerWeek"] = (x[chosen] * 7).round(3)
+        items["Share"]       = (x[chosen] / cups).round(4)
+        items["DailyCost"]   = (x[chosen] * price[chosen]).round(4)
+        items = items.sort_values("CupsPerDay", ascending=False, kind="stable").reset_index(drop=True)
+        cost = float(x @ price)
+        return Basket(items, cost, cost / cups, cups)
+
+    # ── household and what-if views ──────────────────────────
+    def household_budget(self, **constraints) -> pd.DataFrame:
+        """
+        household_annual_budget()-shaped table for the optimal basket: one
+        row per HOUSEHOLD_SIZES entry, every member eating the per-person
+        optimum. Costs come from the unrounded per-cup price; only the
+        PricePerCup column is rounded. Keyword arguments are passed to solve().
+        """
+        basket = self.solve(**constraints)
+        members = np.fromiter(HOUSEHOLD_SIZES.values(), dtype="int64")
+        costs = household_cost_matrix(dict.fromkeys(STRATEGIES, basket.price_per_cup), members,
+                                      basket.cups_per_day)[:, 0, :]
+        out = pd.DataFrame({
+            "Household":   list(HOUSEHOLD_SIZES),
+            "Members":     members,
+            "PricePerCup": round(basket.price_per_cup, 4),
+        })
+        for j, col in enumerate(BUDGET_PERIODS):
+            out[col] = costs[:, j]
+        return out
+
+    def sweep(self, grid: dict, **fixed) -> pd.DataFrame:
+        """
+        Solve every combination of the values in grid ({solve() argument:
+        list of values}) with the other arguments in fixed. Returns one row
+        per combination with the parameters, CostPerDay, PricePerCup,
+        Annual_Cost (one person), Items and DistinctBase. Infeasible
+        combinations get NaN costs instead of raising.
+        """
+        names = list(grid)
+        rows = []
+        for values in itertools.product(*(grid[n] for n in names)):
+            params = dict(zip(names, values))
+            try:
+                b = self.solve(**fixed, **params)
+                row = {"CostPerDay": round(b.cost_per_day, 4), "PricePerCup": round(b.price_per_cup, 4),
+                       "Annual_Cost": household_cost_matrix(
+                           dict.fromkeys(STRATEGIES, b.price_per_cup), [1], b.cups_per_day)[0, 0, 0],
+                       "Items": len(b.items), "DistinctBase": b.items[self.base_col].nunique()}
+            except ValueError:
+                row = {"CostPerDay": np.nan, "PricePerCup": np.nan, "Annual_Cost": np.nan,
+                       "Items": 0, "DistinctBase": 0}
+            rows.append({**{n: params[n] for n in names}, **row})
+        return pd.DataFrame(rows)
+
+
+def _parse_share(text: str) -> tuple:
+    form, _, share = text.partition("=")
+    if not share:
+        raise argparse.ArgumentTypeError(f"expected FORM=SHARE, got {text!r}")
+    return form, float(share)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Cheapest fruit basket meeting the daily recommendation.")
+    ap.add_argument("--cups", type=float, default=DAILY_CUPS_ADULT, help="cup-equivalents per person per day")
+    ap.add_argument("--min-distinct", type=int, default=0, help="minimum distinct base fruits")
+    ap.add_argument("--min-portion", type=float, default=DEFAULT_MIN_PORTION,
+                    help="cups/day a base fruit needs to count as distinct")
+    ap.add_argument("--cap", type=_parse_share, action="append", metavar="FORM=SHARE",
+                    help="largest share of the daily cups for a form (default Juice=0.5)")
+    ap.add_argument("--min", type=_parse_share, action="append", metavar="FORM=SHARE",
+                    help="smallest share of the daily cups for a form")
+    ap.add_argument("--max-item-share", type=float, help="largest share for any single item")
+    args = ap.parse_args(argv)
+
+    opt = BasketOptimizer(load_dataframe())
+    kwargs = dict(cups_per_day=args.cups, min_distinct=args.min_distinct,
+                  min_portion=args.min_portion, max_item_share=args.max_item_share,
+                  form_caps=dict(args.cap) if args.cap else None,
+                  form_mins=dict(args.min) if args.min else None)
+    t0 = time.perf_counter()
+    basket = opt.solve(**kwargs)
+    took = time.perf_counter() - t0
+    print(basket.items.to_string(index=False))
+    print(f"\n${basket.cost_per_day:.4f}/day per person (${basket.price_per_cup:.4f}/cup), "
+          f"solved in {took * 1000:.1f} ms\n")
+    print(opt.household_budget(**kwargs).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+batch.py — Parallel build of many regional / yearly price files
+================================================================
+Fans build_dataframe() out over a process pool, one task per CSV. Each worker
+also computes cost_summary_by_form() and best_value_per_base_fruit() for its
+file, so the parent receives everything it needs in one round trip.
+
+The enriched frame is handed back through shared memory as an Arrow IPC
+stream rather than as a pickled DataFrame: the worker writes the stream once
+into a SharedMemory block and returns only its name and size, and the parent
+maps the block and decodes it with pyarrow. The two small summary frames are
+returned by ordinary pickling.
+
+    results = batch_build(["data/fruits_2020.csv", "data/fruits_2022.csv"])
+    results["data/fruits_2022.csv"].summary
+
+    python batch.py data/fruits_*.csv --workers 8
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import resource_tracker, shared_memory
+from typing import NamedTuple
+
+import pandas as pd
+import pyarrow as pa
+
+from utils import best_value_per_base_fruit, build_dataframe, cost_summary_by_form
+
+
+class BuildResult(NamedTuple):
+    """Everything batch_build() returns for one file."""
+    df:         pd.DataFrame    # build_dataframe() output
+    summary:    pd.DataFrame    # cost_summary_by_form()
+    best_value: pd.DataFrame    # best_value_per_base_fruit()
+
+
+def _write_stream(table: pa.Table, sink) -> None:
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _read_stream(view: memoryview) -> pd.DataFrame:
+    # Kept in its own frame so every Arrow view of the shared block is gone
+    # by the time the caller closes it.
+    with pa.ipc.open_stream(pa.py_buffer(view)) as reader:
+        table = reader.read_all()
+    # to_pandas copies numeric columns into pandas-owned blocks, but the codes
+    # of dictionary (categorical) columns stay views of the Arrow buffers.
+    df = table.to_pandas()
+    for col in df.select_dtypes("category").columns:
+        df[col] = df[col].copy()
+    return df
+
+
+def _build_one(csv_path: str, item_col: str, compact: bool) -> tuple:
+    """Worker: build one file, park the frame in shared memory as Arrow IPC."""
+    df = build_dataframe(csv_path, item_col=item_col, compact=compact)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Size the stream with a counting sink, then serialize straight into the
+    # shared block (no intermediate buffer).
+    counter = pa.MockOutputStream()
+    _write_stream(table, counter)
+    size = counter.size()
+
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        _write_stream(table, pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf)))
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    name = shm.name
+    shm.close()     # the parent owns the block from here and unlinks it
+    return name, size, cost_summary_by_form(df), best_value_per_base_fruit(df)
+
+
+def _release(name: str) -> None:
+    """Unlink a worker's shared block without reading it."""
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def _read_shared(name: str, size: int) -> pd.DataFrame:
+    """Parent: decode a worker's Arrow stream and release the shared block."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return _read_stream(shm.buf[:size])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def batch_build(paths, item_col: str = "Fruit", compact: bool = False,
+                max_workers: int | None = None) -> dict:
+    """
+    Build every CSV in paths in parallel and return {path: BuildResult}, in
+    the order given.
+
+    paths is a list of CSV paths (all using item_col), or a dict mapping each
+    path to its own item column, e.g. {"fruits.csv": "Fruit",
+    "vegetables.csv": "Vegetable"}. max_workers defaults to the CPU count,
+    capped at the number of files. If any file fails, the remaining work is
+    cancelled, every shared block is released, and the first error is raised.
+    """
+    if not isinstance(paths, dict):
+        paths = dict.fromkeys(paths, item_col)
+    if not paths:
+        return {}
+    workers = min(max_workers or os.cpu_count() or 1, len(paths))
+
+    # Start the resource tracker here so workers share it: blocks they create
+    # are then unregistered by the parent's unlink, and any block still
+    # registered when the parent exits is cleaned up instead of leaking.
+    resource_tracker.ensure_running()
+
+    results, error = {}, None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_build_one, p, col, compact): p for p, col in paths.items()}
+        # Decode each frame as soon as its worker finishes, overlapping with
+        # the files still building.
+        for fut in as_completed(futures):
+            if fut.cancelled():
+                continue
+            if fut.exception() is not None:
+                if error is None:
+                    error = fut.exception()
+                    for other in futures:
+                        other.cancel()
+                continue
+            name, size, summary, best = fut.result()
+            if error is not None:
+                _release(name)
+            else:
+                results[futures[fut]] = BuildResult(_read_shared(name, size), summary, best)
+    if error is not None:
+        raise error
+    return {p: results[p] for p in paths}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build many USDA price CSVs in parallel.")
+    ap.add_argument("paths", nargs="+", help="CSV files to build")
+    ap.add_argument("--item-col", default="Fruit", help="item column name (default: Fruit)")
+    ap.add_argument("--workers", type=int, default=None, help="process count (default: CPUs)")
+    ap.add_argument("--compact", action="store_true", help="build compact frames")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    results = batch_build(args.paths, args.item_col, args.compact, args.workers)
+    elapsed = time.perf_counter() - t0
+    for path, res in results.items():
+        print(f"{path}: {len(res.df):,} rows, {len(res.summary)} forms, "
+              f"{len(res.best_value)} base items")
+    print(f"built {len(results)} file(s) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+bench_batch.py — Serial vs process-pool builds of many price files
+===================================================================
+Writes ``--files`` synthetic fruits.csv-shaped CSVs of ``--rows`` rows each,
+builds them one after another with ``build_dataframe`` and then with
+``batch.batch_build`` at each worker count, and prints wall time and speed-up.
+
+    python benchmarks/bench_batch.py [--files 8] [--rows 300000] [--workers 1 2 4 8]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from synthetic import write_raw_csv
+from batch import batch_build
+from utils import best_value_per_base_fruit, build_dataframe, cost_summary_by_form
+
+
+def _serial(paths):
+    for p in paths:
+        df = build_dataframe(p)
+        cost_summary_by_form(df)
+        best_value_per_base_fruit(df)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--files", type=int, default=8)
+    ap.add_argument("--rows", type=int, default=300_000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = ap.parse_args(argv)
+
+    print(f"{args.files} files × {args.rows:,} rows, {os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [write_raw_csv(os.path.join(tmp, f"{i}.csv"), args.rows, seed=i)
+                 for i in range(args.files)]
+        t0 = time.perf_counter()
+        _serial(paths)
+        serial = time.perf_counter() - t0
+        print(f"{'serial':>10} {serial:>8.2f}s")
+        for w in args.workers:
+            t0 = time.perf_counter()
+            batch_build(paths, max_workers=w)
+            took = time.perf_counter() - t0
+            print(f"{w:>8} w {took:>8.2f}s  ×{serial / took:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+bench_callbacks.py — Server payload and time per dashboard interaction
+=======================================================================
+Replays the ``/_dash-update-component`` requests the browser sends for each
+interaction (tab switch, theme toggle, strategy change) against the Flask
+server behind ``run.app`` and reports response bytes and server time.
+
+    python benchmarks/bench_callbacks.py [--reps 5]
+
+Theme toggles and style updates run as clientside callbacks, so they only
+cost the figure requests listed here.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import run  # noqa: E402
+
+TABS = ["overview", "byform", "households", "explorer", "heatmap"]
+
+
+def _dep(cid, prop, value=None):
+    d = {"id": cid, "property": prop}
+    if value is not None:
+        d["value"] = value
+    return d
+
+
+def _out_key(cid, prop):
+    # Pattern-matched outputs are registered under their wildcard form.
+    if isinstance(cid, dict):
+        cid = json.dumps({**cid, "name": ["MATCH"]}, sort_keys=True, separators=(",", ":"))
+    return f"{cid}.{prop}"
+
+
+def _request(outputs, inputs, state=(), changed=()):
+    if len(outputs) == 1:
+        output = _out_key(*outputs[0])
+        outs = _dep(*outputs[0])
+    else:
+        output = ".." + "...".join(_out_key(*o) for o in outputs) + ".."
+        outs = [_dep(*o) for o in outputs]
+    return {
+        "output": output,
+        "outputs": outs,
+        "inputs": [_dep(*i) for i in inputs],
+        "state": [_dep(*s) for s in state],
+        "changedPropIds": list(changed),
+    }
+
+
+def _graph_ids(node, found):
+    """Collect pattern-matched figure ids from a rendered component tree."""
+    if isinstance(node, dict):
+        cid = node.get("props", {}).get("id")
+        if isinstance(cid, dict) and cid.get("type") == "fig":
+            found.append(cid)
+        for v in node.values():
+            _graph_ids(v, found)
+    elif isinstance(node, list):
+        for v in node:
+            _graph_ids(v, found)
+    return found
+
+
+def tab_requests(tab, strategy="average"):
+    return [_request([("tab-content", "children")],
+                     [("tabs", "value", tab)],
+                     [("strategy-store", "data", strategy)], ["tabs.value"])]
+
+
+def figure_requests(tab, dark, strategy, client):
+    body = client.post("/_dash-update-component", json=tab_requests(tab, strategy)[0]).get_json()
+    reqs = [_request([(gid, "figure")], [("dark-store", "data", dark)],
+                     [(gid, "id", gid)], ["dark-store.data"])
+            for gid in _graph_ids(body, [])]
+    if tab == "households":
+        reqs.append(_request([("hh-graph", "figure")],
+                             [("dark-store", "data", dark), ("strategy-store", "data", strategy)],
+                             changed=["dark-store.data"]))
+    return reqs
+
+
+def grid_requests(start=0, end=50):
+    """First page of the Explorer data grid, sorted by $/cup."""
+    req = {"startRow": start, "endRow": end, "filterModel": {},
+           "sortModel": [{"colId": "CupEquivalentPrice", "sort": "asc"}]}
+    return [_request([("data-grid", "getRowsResponse")],
+                     [("data-grid", "getRowsRequest", req)], changed=["data-grid.getRowsRequest"])]
+
+
+def strategy_requests(strategy, dark=False):
+    return [
+        _request([("strategy-store", "data")], [("strategy-ctrl", "value", strategy)],
+                 changed=["strategy-ctrl.value"]),
+        _request([("hh-cards", "children"), ("hh-body", "children")],
+                 [("strategy-store", "data", strategy)], changed=["strategy-store.data"]),
+        _request([("hh-graph", "figure")],
+                 [("dark-store", "data", dark), ("strategy-store", "data", strategy)],
+                 changed=["strategy-store.data"]),
+    ]
+
+
+def measure(client, reqs, reps):
+    """Total response bytes and mean wall time for one round of reqs."""
+    nbytes = 0
+    for r in reqs:
+        resp = client.post("/_dash-update-component", json=r)
+        assert resp.status_code in (200, 204), (resp.status_code, r["output"])
+        nbytes += len(resp.data)
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        for r in reqs:
+            client.post("/_dash-update-component", json=r)
+    return nbytes, (time.perf_counter() - t0) / reps
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--reps", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    run.warm_figure_cache()
+    client = run.app.server.test_client()
+    client.get("/_dash-dependencies")
+
+    print(f"{'interaction':<28} {'requests':>8} {'bytes':>10} {'server ms':>10}")
+    rows = []
+    for tab in TABS:
+        reqs = tab_requests(tab) + figure_requests(tab, False, "average", client)
+        if tab == "households":
+            reqs += strategy_requests("average")[1:2]
+        if tab == "explorer":
+            reqs += grid_requests()
+        rows.append((f"open {tab}", reqs))
+    for tab in TABS:
+        rows.append((f"theme toggle on {tab}", figure_requests(tab, True, "average", client)))
+    rows.append(("strategy change", strategy_requests("premium")))
+
+    for label, reqs in rows:
+        nbytes, dt = measure(client, reqs, args.reps)
+        print(f"{label:<28} {len(reqs):>8} {nbytes:>10,} {dt * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
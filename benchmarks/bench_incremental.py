@@ -0,0 +1,115 @@
+"""
+bench_incremental.py — Incremental upserts vs a full rebuild
+============================================================
+Fuzzes IncrementalAnalysis with random upserts, re-inserts, invalid rows and
+deletes on fruits.csv and checks every summary against the utils function
+run on ``inc.frame()``: best_value, cheapest and most_expensive exactly,
+form_summary up to float rounding (the running mean is an exact integer sum,
+pandas' is a float sum), and form_dist up to the order of tied counts. Then
+times a 10-row upsert plus the summaries against enrich + summaries.
+
+    python benchmarks/bench_incremental.py [--sizes 10000 1000000] [--ops 300]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from synthetic import make_raw_frame
+from incremental import IncrementalAnalysis
+from utils import (
+    CSV_PATH, best_value_per_base_fruit, cheapest_items, cost_summary_by_form,
+    enrich_dataframe, form_distribution, most_expensive_items,
+)
+
+PRICE_COLS = ["AvgCupPrice", "MinCupPrice", "MaxCupPrice"]
+ANNUAL_COLS = ["Annual_Avg", "Annual_Min", "Annual_Max"]
+
+
+def check(inc: IncrementalAnalysis) -> None:
+    """Assert the guarantees IncrementalAnalysis documents against frame()."""
+    df = inc.frame()
+    pd.testing.assert_frame_equal(inc.best_value(), best_value_per_base_fruit(df))
+    pd.testing.assert_frame_equal(inc.cheapest(15), cheapest_items(df, 15))
+    pd.testing.assert_frame_equal(inc.most_expensive(15), most_expensive_items(df, 15))
+
+    got, want = (f.assign(Form=f["Form"].astype(str)).sort_values("Form").reset_index(drop=True)
+                 for f in (inc.form_summary(), cost_summary_by_form(df)))
+    assert (got["Count"].to_numpy() == want["Count"].to_numpy()).all()
+    np.testing.assert_allclose(got[PRICE_COLS], want[PRICE_COLS], rtol=1e-12)
+    np.testing.assert_allclose(got[ANNUAL_COLS], want[ANNUAL_COLS], atol=0.01)
+
+    got, want = inc.form_dist(), form_distribution(df)
+    assert (np.diff(got["Count"].to_numpy()) <= 0).all(), got
+    got, want = (f.assign(Form=f["Form"].astype(str)).sort_values("Form").reset_index(drop=True)
+                 for f in (got, want))
+    pd.testing.assert_frame_equal(got, want, check_dtype=False)
+
+
+def fuzz(ops: int, seed: int = 0) -> None:
+    """ops random upserts and deletes on fruits.csv, checked after each one."""
+    rng = np.random.default_rng(seed)
+    raw = pd.read_csv(CSV_PATH)
+    inc = IncrementalAnalysis(enrich_dataframe(raw.copy()))
+    keys = list(zip(raw["Fruit"], raw["Form"]))
+    for i in range(ops):
+        op = rng.random()
+        if op < 0.25:
+            inc.delete([keys[rng.integers(len(keys))]])
+        else:
+            rows = raw.iloc[rng.integers(0, len(raw), size=rng.integers(1, 4))].copy()
+            rows["RetailPrice"] = (rows["RetailPrice"] * rng.uniform(0.5, 1.5, len(rows))).round(4)
+            if op < 0.35:                                   # fails validation: deletes the key
+                rows["RetailPrice"] = np.nan
+            elif op < 0.5:                                  # a key the frame has not seen
+                rows["Fruit"] = [f"{f} #{i}" for f in rows["Fruit"]]
+                keys += list(zip(rows["Fruit"], rows["Form"]))
+            inc.upsert(rows)
+        check(inc)
+
+
+def _corrections(raw: pd.DataFrame, seed: int) -> pd.DataFrame:
+    """10 raw rows with a 10% price change."""
+    rows = raw.sample(10, random_state=seed)
+    rows["RetailPrice"] = (rows["RetailPrice"] * 1.1).round(4)
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    ap.add_argument("--ops", type=int, default=300, help="random updates to check")
+    args = ap.parse_args(argv)
+    fuzz(args.ops)
+    print(f"{args.ops} random updates match the utils summaries on frame()\n")
+
+    print(f"{'rows':>12} {'rebuild':>10} {'upsert':>10} {'speedup':>8}")
+    for size in args.sizes:
+        raw = make_raw_frame(size)
+        raw["Fruit"] = raw["Fruit"] + " #" + pd.RangeIndex(size).astype(str)
+
+        def summaries(source):
+            return (source.form_summary(), source.best_value(), source.cheapest(15),
+                    source.most_expensive(15), source.form_dist())
+
+        t0 = time.perf_counter()
+        df = enrich_dataframe(raw.copy())
+        cost_summary_by_form(df), best_value_per_base_fruit(df), cheapest_items(df, 15)
+        most_expensive_items(df, 15), form_distribution(df)
+        t_rebuild = time.perf_counter() - t0
+
+        inc = IncrementalAnalysis(df)
+        inc.upsert(_corrections(raw, 0))                     # the first upsert warms the index
+        summaries(inc)
+        rows = _corrections(raw, 1)
+        t0 = time.perf_counter()
+        inc.upsert(rows)
+        summaries(inc)
+        t_inc = time.perf_counter() - t0
+        print(f"{size:>12,} {t_rebuild:>10.4f} {t_inc:>10.4f} {t_rebuild / t_inc:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+bench_memory.py — Bytes per row of the enriched frame, default vs compact
+=========================================================================
+Builds the enriched frame from synthetic fruits.csv-shaped files with
+``build_dataframe(compact=False)`` and ``compact=True`` and prints the deep
+memory footprint from ``utils.memory_report``.
+
+    python benchmarks/bench_memory.py [--sizes 62 10000 1000000] [--columns]
+"""
+
+import argparse
+import os
+import tempfile
+
+from synthetic import write_raw_csv
+from utils import CSV_PATH, build_dataframe, memory_report
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[62, 10_000, 1_000_000])
+    ap.add_argument("--columns", action="store_true", help="also print per-column bytes")
+    args = ap.parse_args(argv)
+
+    print(f"{'rows':>10} {'default B/row':>14} {'compact B/row':>14} {'saving':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = CSV_PATH if n == 62 else write_raw_csv(os.path.join(tmp, f"{n}.csv"), n)
+            full  = memory_report(build_dataframe(path))
+            small = memory_report(build_dataframe(path, compact=True))
+            saving = 1 - small["total_bytes"] / full["total_bytes"]
+            print(f"{n:>10,} {full['bytes_per_row']:>14} {small['bytes_per_row']:>14} {saving:>7.0%}")
+            if args.columns:
+                for col, nbytes in full["columns"].items():
+                    print(f"{'':>10} {col:<20} {nbytes / full['rows']:>8.1f} -> "
+                          f"{small['columns'][col] / small['rows']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
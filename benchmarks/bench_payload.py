@@ -0,0 +1,59 @@
+"""
+bench_payload.py — Figure payload size, full vs reduced rendering
+==================================================================
+Builds the strip, scatter and violin figures on synthetic enriched frames
+twice: once drawing every row (FRUITS_MAX_POINTS=0) and once with the
+data-reduction path (sampled WebGL traces, precomputed density and box
+statistics). For each it reports the serialized JSON size, the gzipped size
+(what actually crosses the wire) and build plus serialize time.
+
+    python benchmarks/bench_payload.py [--sizes 1000 100000 1000000] [--max-points 5000]
+
+Full rendering is skipped above ``--full-limit`` rows, where it only
+confirms that the full payload keeps growing linearly.
+"""
+
+import argparse
+import gzip
+import time
+
+from synthetic import make_raw_frame
+import figures
+from utils import AnalysisContext, enrich_dataframe
+
+CHARTS = ("strip", "scatter", "violin")
+
+
+def _measure(name, ctx):
+    t0 = time.perf_counter()
+    payload = figures.build_figure(name, ctx, False).to_json().encode()
+    took = time.perf_counter() - t0
+    return len(payload), len(gzip.compress(payload, 6)), took
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    ap.add_argument("--max-points", type=int, default=figures.MAX_POINTS,
+                    help="reduction threshold / point budget (default: FRUITS_MAX_POINTS)")
+    ap.add_argument("--full-limit", type=int, default=300_000,
+                    help="skip full rendering above this many rows")
+    args = ap.parse_args(argv)
+
+    print(f"{'rows':>10} {'chart':<8} {'mode':<8} {'json':>12} {'gzip':>12} {'time':>8}")
+    for size in args.sizes:
+        ctx = AnalysisContext(enrich_dataframe(make_raw_frame(size)))
+        for name in CHARTS:
+            modes = [("reduced", args.max_points)]
+            if size <= args.full_limit:
+                modes.insert(0, ("full", 0))
+            for mode, limit in modes:
+                figures.MAX_POINTS = limit
+                raw, packed, took = _measure(name, ctx)
+                if mode == "reduced" and size <= limit:
+                    mode = "(full)"     # under the threshold nothing is reduced
+                print(f"{size:>10,} {name:<8} {mode:<8} {raw:>12,} {packed:>12,} {took:>7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
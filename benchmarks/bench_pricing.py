@@ -0,0 +1,57 @@
+"""
+bench_pricing.py — Row-wise vs vectorized CupEquivalentPrice
+=============================================================
+Times the legacy ``df.apply(_cup_price, axis=1)`` path against
+``utils.cup_equivalent_price`` and checks both agree to 4 decimals.
+
+    python benchmarks/bench_pricing.py
+    python benchmarks/bench_pricing.py --sizes 10000 1000000 --legacy-max 10000000
+
+The row-wise path takes minutes at 10M rows, so by default it is only run up
+to ``--legacy-max`` rows; larger sizes report the vectorized timing alone.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from synthetic import make_raw_frame
+from utils import cup_equivalent_price
+
+
+def _legacy_cup_price(row):
+    if str(row["CupEquivalentUnit"]).strip().lower() == "fluid ounces":
+        return row["RetailPrice"] * (row["CupEquivalentSize"] / 16.0) / row["Yield"]
+    else:
+        return (row["RetailPrice"] * row["CupEquivalentSize"]) / row["Yield"]
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    ap.add_argument("--legacy-max", type=int, default=1_000_000,
+                    help="largest row count to run the row-wise path on")
+    args = ap.parse_args(argv)
+
+    print(f"{'rows':>12} {'apply (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for n in args.sizes:
+        df = make_raw_frame(n)
+        fast, t_fast = _timed(cup_equivalent_price, df)
+        if n <= args.legacy_max:
+            slow, t_slow = _timed(lambda d: d.apply(_legacy_cup_price, axis=1), df)
+            if not np.array_equal(slow.round(4).to_numpy(), fast.round(4).to_numpy()):
+                raise SystemExit(f"mismatch at {n} rows")
+            print(f"{n:>12,} {t_slow:>12.3f} {t_fast:>15.4f} {t_slow / t_fast:>8.0f}x")
+        else:
+            print(f"{n:>12,} {'skipped':>12} {t_fast:>15.4f} {'-':>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+bench_startup.py — Cold-start cost of the dashboard worker
+==========================================================
+Two measurements, each in a fresh interpreter:
+
+  * ``-X importtime`` breakdown of ``import run``: total and the heaviest
+    modules imported directly by run.py.
+  * time to first response: wall time from launching Python to having served
+    ``/``, ``/_dash-layout`` and ``/_dash-dependencies`` through the Flask
+    test client (median of ``--runs``).
+
+It doubles as a regression check. The exit status is 1 when the median time
+to first response exceeds ``--max-seconds``, or when a module that should
+load lazily (plotly.express, figures) is imported before the first response.
+
+    python benchmarks/bench_startup.py [--runs 5] [--max-seconds 5] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported until a figure is actually requested.
+LAZY_MODULES = ("plotly.express", "figures")
+
+_FIRST_RESPONSE = """
+import json, sys
+import run
+client = run.app.server.test_client()
+for path in ("/", "/_dash-layout", "/_dash-dependencies"):
+    assert client.get(path).status_code == 200, path
+print(json.dumps(sorted(m for m in %r if m in sys.modules)))
+""" % (LAZY_MODULES,)
+
+
+def import_breakdown(top: int) -> tuple[float, list]:
+    """(total seconds for `import run`, [(seconds, module)] of run's heaviest direct imports)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import run"],
+                          cwd=_ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, int(cumulative) / 1e6, name.strip()))
+    total = next(sec for depth, sec, name in rows if name == "run")
+    run_depth = next(depth for depth, sec, name in rows if name == "run")
+    children = sorted(((sec, name) for depth, sec, name in rows if depth == run_depth + 1),
+                      reverse=True)
+    return total, children[:top]
+
+
+def first_response() -> tuple[float, list]:
+    """(wall seconds from interpreter launch to the first served layout, lazy modules loaded)."""
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", _FIRST_RESPONSE], cwd=_ROOT,
+                          capture_output=True, text=True, check=True)
+    return time.perf_counter() - t0, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=10, help="direct imports to list")
+    ap.add_argument("--max-seconds", type=float, default=5.0,
+                    help="fail when the median time to first response exceeds this")
+    ap.add_argument("--json", help="also write the results to this file")
+    args = ap.parse_args(argv)
+
+    total, children = import_breakdown(args.top)
+    print(f"import run: {total:.3f}s")
+    for sec, name in children:
+        print(f"  {sec:>7.3f}s  {name}")
+
+    times, eager = [], set()
+    for _ in range(args.runs):
+        took, loaded = first_response()
+        times.append(took)
+        eager.update(loaded)
+    median = statistics.median(times)
+    print(f"time to first response: median {median:.3f}s "
+          f"(min {min(times):.3f}s, max {max(times):.3f}s, {args.runs} runs)")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"import_s": total, "imports": [[n, s] for s, n in children],
+                       "first_response_s": times, "eager_lazy_modules": sorted(eager)},
+                      fh, indent=2)
+
+    failed = False
+    if eager:
+        print(f"FAIL: imported before the first figure request: {', '.join(sorted(eager))}")
+        failed = True
+    if median > args.max_seconds:
+        print(f"FAIL: median time to first response {median:.3f}s > {args.max_seconds}s")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+bench_suite.py — Time and memory of the analysis functions and figure builders
+===============================================================================
+Runs every case below on synthetic price files in the fruits.csv and the
+vegetables.csv schema at each ``--sizes`` row count:
+
+  * build_dataframe            read + enrich a CSV (the file is written first,
+                               outside the measurement)
+  * cost_summary_by_form, best_value_per_base_fruit, household_annual_budget
+  * fig_<name>                 every figures.FIGURES builder plus to_json(), on a
+                               fresh AnalysisContext so its summaries are
+                               included. Fruits schema only: the dashboard
+                               charts are fruit charts.
+
+Each case is timed (best of ``--repeat``) and then run once more under
+tracemalloc for its peak traced allocation. numpy and pandas report their
+buffers to tracemalloc, so the peak covers the frames as well.
+
+Results are compared with a stored baseline. A case fails when it is slower
+than the baseline by more than ``--time-tolerance`` or uses more than
+``--memory-tolerance`` extra peak memory. The exit status is 1 if any case
+fails. ``--save`` records the current run as the new baseline (merged into
+the file, so a partial run only replaces the cases it ran).
+
+    python benchmarks/bench_suite.py                       # compare to baselines.json
+    python benchmarks/bench_suite.py --save                # record a new baseline
+    python benchmarks/bench_suite.py --sizes 10000000 --only "build_*" "fig_*"
+
+Baselines are machine specific; record them on the machine that compares.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from synthetic import make_raw_frame
+import figures
+from utils import (
+    CSV_PATH, VEG_CSV_PATH, AnalysisContext, best_value_per_base_fruit, build_dataframe,
+    cost_summary_by_form, household_annual_budget,
+)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(HERE, "baselines.json")
+
+# name → (template CSV, item column, whether the figure builders apply)
+DATASETS = {
+    "fruits":     (CSV_PATH,     "Fruit",     True),
+    "vegetables": (VEG_CSV_PATH, "Vegetable", False),
+}
+
+
+def cases(csv_path: str, item_col: str, df, with_figures: bool) -> dict:
+    """{case name: zero-argument callable} for one dataset."""
+    out = {
+        "build_dataframe":           lambda: build_dataframe(csv_path, item_col=item_col),
+        "cost_summary_by_form":      lambda: cost_summary_by_form(df),
+        "best_value_per_base_fruit": lambda: best_value_per_base_fruit(df),
+        "household_annual_budget":   lambda: household_annual_budget(df, "average"),
+    }
+    if with_figures:
+        for name in figures.FIGURES:
+            strategy = "average" if name == "household" else None
+            out[f"fig_{name}"] = (lambda n=name, s=strategy:
+                                  figures.build_figure(n, AnalysisContext(df), False, s).to_json())
+    return out
+
+
+def measure(fn, repeat: int) -> dict:
+    """Best wall time over repeat calls, then one traced call for peak memory."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(best, 6), "peak_bytes": int(peak - base)}
+
+
+def compare(result: dict, baseline: dict | None, time_tol: float, mem_tol: float,
+            min_seconds: float) -> str:
+    """'new', 'ok' or a FAIL message for one case."""
+    if baseline is None:
+        return "new"
+    problems = []
+    limit = max(baseline["seconds"], min_seconds) * (1 + time_tol)
+    if result["seconds"] > limit:
+        problems.append(f"time {result['seconds'] / baseline['seconds']:.2f}x")
+    if result["peak_bytes"] > baseline["peak_bytes"] * (1 + mem_tol) + 64 * 1024:
+        problems.append(f"memory {result['peak_bytes'] / max(baseline['peak_bytes'], 1):.2f}x")
+    return "FAIL " + ", ".join(problems) if problems else "ok"
+
+
+def _load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {"meta": {}, "results": {}}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    ap.add_argument("--datasets", nargs="+", choices=list(DATASETS), default=list(DATASETS))
+    ap.add_argument("--only", nargs="+", default=["*"], metavar="PATTERN",
+                    help="case names to run (shell patterns, e.g. 'fig_*')")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    ap.add_argument("--save", action="store_true", help="write this run into the baseline")
+    ap.add_argument("--time-tolerance", type=float, default=0.5,
+                    help="allowed slowdown as a fraction (default 0.5 = 50%%)")
+    ap.add_argument("--memory-tolerance", type=float, default=0.2,
+                    help="allowed extra peak memory as a fraction (default 0.2)")
+    ap.add_argument("--min-seconds", type=float, default=0.01,
+                    help="timings under this are compared against it (timer noise)")
+    ap.add_argument("--json", help="also write this run's results to this file")
+    args = ap.parse_args(argv)
+
+    stored = _load_baseline(args.baseline)
+    # Pay plotly's one-off import and validator set-up before anything is timed.
+    figures.build_figure("form_bars", AnalysisContext(build_dataframe()), False).to_json()
+    results, failed = {}, []
+    print(f"{'case':<52} {'seconds':>9} {'peak MB':>9} {'vs base':>8}  status")
+    with tempfile.TemporaryDirectory() as tmp:
+        for dataset in args.datasets:
+            template, item_col, with_figures = DATASETS[dataset]
+            for size in args.sizes:
+                path = os.path.join(tmp, f"{dataset}-{size}.csv")
+                make_raw_frame(size, csv_path=template).to_csv(path, index=False)
+                df = build_dataframe(path, item_col=item_col)
+                for name, fn in cases(path, item_col, df, with_figures).items():
+                    if not any(fnmatch.fnmatch(name, p) for p in args.only):
+                        continue
+                    key = f"{dataset}/{size}/{name}"
+                    res = results[key] = measure(fn, args.repeat)
+                    base = stored["results"].get(key)
+                    status = compare(res, base, args.time_tolerance, args.memory_tolerance,
+                                     args.min_seconds)
+                    ratio = f"{res['seconds'] / base['seconds']:.2f}x" if base else "-"
+                    print(f"{key:<52} {res['seconds']:>9.4f} {res['peak_bytes'] / 1e6:>9.1f} "
+                          f"{ratio:>8}  {status}")
+                    if status.startswith("FAIL"):
+                        failed.append(key)
+                del df
+                os.remove(path)
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+    if args.save:
+        stored["results"].update(results)
+        stored["meta"] = {
+            "saved_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python":   platform.python_version(),
+            "machine":  f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+            "repeat":   args.repeat,
+        }
+        with open(args.baseline, "w") as fh:
+            json.dump(stored, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"saved {len(results)} results to {args.baseline}")
+        return 0
+    if failed:
+        print(f"FAIL: {len(failed)} case(s) regressed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
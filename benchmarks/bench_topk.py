@@ -0,0 +1,78 @@
+"""
+bench_topk.py — Full sort vs partial selection for top-N queries
+================================================================
+Times ``sort_values().head(n)`` (the previous cheapest_items path),
+``Series.nsmallest`` and ``utils.top_k`` on synthetic enriched frames, plus the
+grouped "top N per Form" case against ``sort_values().groupby().head(n)``, and
+checks that every variant returns the same rows, including when some rows
+have no Form (groupby() leaves those out).
+
+    python benchmarks/bench_topk.py [--sizes 10000 1000000 10000000] [-n 15]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from synthetic import make_raw_frame
+from utils import enrich_dataframe, top_k
+
+COLS = ["Fruit", "Form", "CupEquivalentPrice", "RetailPrice", "RetailPriceUnit", "Yield"]
+
+
+def _best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def _grouped_reference(df, n):
+    return (df[COLS].sort_values("CupEquivalentPrice", kind="stable")
+            .groupby("Form", sort=True).head(n)
+            .sort_values("Form", kind="stable").reset_index(drop=True))
+
+
+def check_missing_keys():
+    """Grouped top_k with missing group keys returns one row per real group."""
+    df = pd.DataFrame({"Form": [None, "A", "A", "B", "B", None],
+                       "CupEquivalentPrice": [5, 1, 2, 3, 4, 0.1]})
+    out = top_k(df, 1, by="Form")
+    assert out["Form"].tolist() == ["A", "B"], out
+    assert out["CupEquivalentPrice"].tolist() == [1.0, 3.0], out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    ap.add_argument("-n", type=int, default=15, help="rows to select (per group when grouped)")
+    args = ap.parse_args(argv)
+    n = args.n
+    check_missing_keys()
+
+    print(f"{'rows':>12} {'query':<10} {'sort+head':>10} {'nsmallest':>10} {'top_k':>10} {'speedup':>8}")
+    for size in args.sizes:
+        df = enrich_dataframe(make_raw_frame(size))
+
+        full, t_sort = _best_of(lambda: df[COLS].sort_values(
+            "CupEquivalentPrice", kind="stable").head(n).reset_index(drop=True))
+        nsm, t_nsm = _best_of(lambda: df[COLS].nsmallest(n, "CupEquivalentPrice").reset_index(drop=True))
+        fast, t_fast = _best_of(lambda: top_k(df, n, columns=COLS))
+        pd.testing.assert_frame_equal(full, fast)
+        pd.testing.assert_frame_equal(nsm, fast)
+        print(f"{size:>12,} {'global':<10} {t_sort:>10.4f} {t_nsm:>10.4f} {t_fast:>10.4f} {t_sort / t_fast:>7.1f}x")
+
+        full, t_sort = _best_of(lambda: _grouped_reference(df, n))
+        fast, t_fast = _best_of(lambda: top_k(df, n, by="Form", columns=COLS))
+        pd.testing.assert_frame_equal(full, fast)
+        holes = df.assign(Form=df["Form"].where(np.arange(size) % 97 != 0))
+        pd.testing.assert_frame_equal(_grouped_reference(holes, n), top_k(holes, n, by="Form", columns=COLS))
+        print(f"{size:>12,} {'per Form':<10} {t_sort:>10.4f} {'-':>10} {t_fast:>10.4f} {t_sort / t_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
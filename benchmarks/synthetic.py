@@ -0,0 +1,36 @@
+"""
+synthetic.py — Synthetic USDA-style price frames for benchmarking
+==================================================================
+Resamples the bundled fruits.csv rows and jitters the numeric columns so the
+generated frame has the same schema, unit mix, and rough price distribution as
+the real data at any row count.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+from utils import CSV_PATH  # noqa: E402
+
+
+def make_raw_frame(n_rows: int, seed: int = 0, csv_path: str = CSV_PATH) -> pd.DataFrame:
+    """Return n_rows raw (un-enriched) rows shaped like fruits.csv."""
+    rng  = np.random.default_rng(seed)
+    base = pd.read_csv(csv_path)
+    pick = rng.integers(0, len(base), size=n_rows)
+    df   = base.iloc[pick].reset_index(drop=True)
+    df["RetailPrice"] = (df["RetailPrice"] * rng.uniform(0.8, 1.2, n_rows)).round(4)
+    df["Yield"]       = (df["Yield"] * rng.uniform(0.95, 1.0, n_rows)).round(4)
+    return df
+
+
+def write_raw_csv(path: str, n_rows: int, seed: int = 0) -> str:
+    """Write a synthetic fruits-style CSV to path and return the path."""
+    make_raw_frame(n_rows, seed).to_csv(path, index=False)
+    return path
@@ -0,0 +1,102 @@
+"""
+datasource.py — Hot reload of the price data without restarting workers
+========================================================================
+DataSource polls the modification time and size of its source files from a
+daemon thread. When they change (and have stopped changing, so a file that is
+still being copied in is not read half-way), it calls the loader in that same
+background thread and hands the new frame to every subscriber. Requests keep
+being served from the old data while the rebuild runs.
+
+    source = DataSource([CSV_PATH], load_dataframe, interval=5)
+    source.subscribe(reload_data)      # swap the frame, clear caches
+    source.start()
+
+A failed rebuild leaves the current data in place. The error is kept in
+``last_error`` and the reload is retried the next time the files change.
+"""
+
+import os
+import threading
+import traceback
+
+
+class DataSource:
+    """Watch source files and push freshly loaded frames to subscribers."""
+
+    def __init__(self, paths, load, interval: float = 5.0):
+        self.paths    = [os.path.abspath(p) for p in paths]
+        self.interval = interval
+        self.generation = 0             # successful reloads so far
+        self.last_error: BaseException | None = None
+        self._load      = load
+        self._listeners = []
+        self._current   = self._signature()
+        self._pending   = None
+        self._reload_lock = threading.Lock()
+        self._stop   = threading.Event()
+        self._thread = None
+
+    def _signature(self) -> tuple:
+        sig = []
+        for p in self.paths:
+            try:
+                st = os.stat(p)
+                sig.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def subscribe(self, fn) -> None:
+        """Call fn(new_frame) after every successful reload, in order of subscription."""
+        self._listeners.append(fn)
+
+    # ── reloading ────────────────────────────────────────────
+    def check(self) -> bool:
+        """
+        One poll: reload if the files changed and have been stable since the
+        previous poll. Returns True when a reload happened.
+        """
+        sig = self._signature()
+        if sig == self._current:
+            self._pending = None
+            return False
+        if sig != self._pending or None in sig:
+            self._pending = sig         # still changing (or missing); wait a poll
+            return False
+        self._current, self._pending = sig, None
+        return self.reload()
+
+    def reload(self) -> bool:
+        """Load now and notify subscribers; False (old data kept) on failure."""
+        with self._reload_lock:
+            try:
+                df = self._load()
+                for fn in self._listeners:
+                    fn(df)
+            except Exception as exc:    # keep serving the previous data
+                self.last_error = exc
+                traceback.print_exc()
+                return False
+            self.last_error = None
+            self.generation += 1
+            return True
+
+    # ── background thread ────────────────────────────────────
+    def start(self) -> "DataSource":
+        """Start polling every ``interval`` seconds in a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="datasource-watch",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
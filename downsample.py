@@ -0,0 +1,118 @@
+"""
+downsample.py — Data reduction for figures over large price frames
+===================================================================
+The strip, scatter and violin charts send one value per row to the browser.
+Above a few thousand rows, figures.py uses these helpers instead, so the
+payload stays bounded however large the dataset gets:
+
+  * ``sample_groups``  — a reproducible per-group sample under a point
+    budget. Each group keeps a share proportional to its size, plus its
+    minimum and maximum, so the visible range is never clipped.
+  * ``box_stats``      — the quartiles, whisker fences and mean Plotly would
+    compute for a box trace, computed here so only five numbers are sent.
+  * ``kde_curve``      — a binned Gaussian kernel density estimate on a fixed
+    grid, used to draw violin outlines without shipping the raw values.
+
+Everything is numpy; costs are O(n) per group except ``box_stats``, which
+takes percentiles (O(n) selection) of the group's values.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def group_positions(col: pd.Series) -> dict:
+    """{value: row positions} for every non-null value of col, in order of first appearance."""
+    codes, uniques = pd.factorize(col, sort=False)
+    keep  = np.flatnonzero(codes >= 0)
+    order = keep[np.argsort(codes[keep], kind="stable")]
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {u: order[bounds[i]:bounds[i + 1]] for i, u in enumerate(uniques)}
+
+
+def sample_groups(groups: dict, budget: int, values: np.ndarray | None = None,
+                  seed: int = 0) -> dict:
+    """
+    Reduce {key: positions} to about ``budget`` positions in total.
+
+    Each group keeps round(budget × its share of the rows), at least one.
+    When values (indexed by position) are given, the positions of each
+    group's minimum and maximum are always kept as well. Kept positions stay
+    in their original order. Groups already within budget are returned as-is.
+    """
+    total = sum(len(p) for p in groups.values())
+    if total <= budget:
+        return groups
+    rng = np.random.default_rng(seed)
+    out = {}
+    for key, pos in groups.items():
+        quota = max(1, round(budget * len(pos) / total))
+        if quota >= len(pos):
+            out[key] = pos
+            continue
+        keep = rng.choice(len(pos), quota, replace=False)
+        if values is not None:
+            v = values[pos]
+            if not np.isnan(v).all():
+                keep = np.append(keep, [np.nanargmin(v), np.nanargmax(v)])
+        out[key] = pos[np.unique(keep)]
+    return out
+
+
+def box_stats(values: np.ndarray) -> dict:
+    """
+    Box-plot statistics for values (NaN ignored), matching Plotly's defaults:
+    linear-interpolated quartiles and whiskers at the furthest points within
+    1.5 × IQR of the box.
+    """
+    v = np.asarray(values, dtype=float)
+    v = v[~np.isnan(v)]
+    if not len(v):
+        return {"n": 0}
+    q1, median, q3 = np.percentile(v, [25, 50, 75])
+    iqr = q3 - q1
+    return {
+        "n": int(len(v)), "min": float(v.min()), "max": float(v.max()), "mean": float(v.mean()),
+        "q1": float(q1), "median": float(median), "q3": float(q3),
+        "lowerfence": float(v[v >= q1 - 1.5 * iqr].min()),
+        "upperfence": float(v[v <= q3 + 1.5 * iqr].max()),
+    }
+
+
+def kde_curve(values: np.ndarray, points: int = 128, bins: int = 1024
+              ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (grid, density) of a Gaussian KDE of values (NaN ignored) at ``points``
+    evenly spaced positions.
+
+    The bandwidth follows Plotly's violin rule (Silverman), using the
+    standard deviation alone when the IQR is 0 (mostly-identical prices),
+    and the grid extends two bandwidths past the data as Plotly's default
+    "soft" span does.
+    The values are first counted into ``bins`` bins and the kernel is applied
+    by convolution, so the cost does not grow with the product of n and grid
+    size. Returns empty arrays when there are no values.
+    """
+    v = np.asarray(values, dtype=float)
+    v = v[~np.isnan(v)]
+    if not len(v):
+        return np.empty(0), np.empty(0)
+    q1, q3 = np.percentile(v, [25, 75])
+    std = v.std(ddof=1) if len(v) > 1 else 0.0
+    spread = min(std, (q3 - q1) / 1.349) if q3 > q1 else std
+    bw = 1.059 * spread * len(v) ** -0.2
+    if not bw > 0:                      # constant data
+        bw = max(abs(v[0]) * 1e-3, 1e-6)
+    lo, hi = v.min() - 2 * bw, v.max() + 2 * bw
+
+    counts, edges = np.histogram(v, bins=bins, range=(lo, hi))
+    step = edges[1] - edges[0]
+    half = int(np.ceil(4 * bw / step))
+    offsets = np.arange(-half, half + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bw) ** 2)
+    smooth = np.convolve(counts, kernel, mode="full")[half:half + bins]
+    density = smooth / (len(v) * bw * np.sqrt(2 * np.pi))
+
+    grid = np.linspace(lo, hi, points)
+    centers = (edges[:-1] + edges[1:]) / 2
+    return grid, np.interp(grid, centers, density)
@@ -0,0 +1,370 @@
+"""
+export.py — Static snapshot of the dashboard for a plain file server / CDN
+==========================================================================
+What the dashboard shows is fixed by the dataset, the theme and the household
+strategy. This renders every combination once per data release, so a
+read-only copy can be served with no Python on the request path.
+
+    python export.py --out snapshot/                  # fruits.csv
+    python export.py --csv data/fruits_2024.csv --out snapshot/ --force
+
+Output layout (all paths relative to --out):
+
+    manifest.json                    export inputs, row count, asset map
+    layout.json                      serve_layout() component tree
+    data.json                        every row shown by the Explorer grid
+    figures/<name>-<theme>.json      Plotly figure JSON (household: -<strategy>)
+    tabs/<tab>-<theme>-<strategy>.json
+                                     render() output with every callback
+                                     result filled in (figures, household
+                                     cards and table, client-side grid rows)
+    <tab>-<theme>-<strategy>.html    standalone page per combination: the
+                                     tabs/ tree as plain HTML plus its plots
+    index.html                       copy of overview-light-average.html
+    plotly.min.js                    shared by every page
+
+The tab list, the graphs on each tab and the figures themselves come from
+run.py's own layout, render() and figure(), so the snapshot cannot drift
+from the live app. The manifest records every input that shapes the output:
+the CSV hash, the cost constants and schema version the Feather cache is
+keyed on, and a hash of the rendering code plus the Dash and Plotly
+versions. An export whose inputs all match the manifest already in --out is
+skipped unless --force is given.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import dash
+import plotly
+import plotly.io as pio
+from dash import dcc
+from dash.development.base_component import Component
+from plotly.offline import get_plotlyjs
+
+import run
+from theme import page_style
+from utils import (
+    CSV_PATH, DAILY_CUPS_ADULT, DAYS_PER_YEAR, STRATEGIES, _SCHEMA_VERSION, load_dataframe,
+)
+
+THEMES = {"light": False, "dark": True}
+DEFAULT_STRATEGY = "average"
+# Modules whose code shapes the snapshot; editing any of them re-exports.
+RENDER_MODULES = ("run", "figures", "downsample", "theme", "utils", "export")
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# ── HELPERS ─────────────────────────────────────────────────
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _inputs(csv_path: str) -> dict:
+    """Everything an export depends on, as recorded in manifest["source"]."""
+    code = hashlib.sha256()
+    for name in RENDER_MODULES:
+        with open(os.path.join(_HERE, f"{name}.py"), "rb") as fh:
+            code.update(fh.read())
+    code.update(f"dash={dash.__version__}|plotly={plotly.__version__}".encode())
+    return {"sha256": _sha256(csv_path), "daily_cups": DAILY_CUPS_ADULT,
+            "days_per_year": DAYS_PER_YEAR, "schema_version": _SCHEMA_VERSION,
+            "code": code.hexdigest()}
+
+
+def _write_json(out_dir: str, rel: str, obj) -> str:
+    """Write obj (Dash components and Plotly figures included) to out_dir/rel."""
+    path = os.path.join(out_dir, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(pio.json.to_json_plotly(obj))
+    return rel
+
+
+def _components(tree):
+    """tree itself followed by every component nested below it."""
+    yield tree
+    for _, child in tree._traverse_with_paths():
+        yield child
+
+
+def tabs() -> list:
+    """[(value, label)] of the dashboard tabs, in layout order."""
+    return [(c.value, c.children) for c in _components(run.serve_layout())
+            if type(c).__name__ == "TabsTab"]
+
+
+def _figure_key(component):
+    """(figure name, uses strategy) for a graph component, None for anything else."""
+    if not isinstance(component, dcc.Graph):
+        return None
+    gid = getattr(component, "id", None)
+    if gid == "hh-graph":
+        return "household", True
+    if isinstance(gid, dict) and gid.get("type") == "fig":
+        return gid["name"], False
+    return None
+
+
+def tab_figures(tab: str) -> list:
+    """Figure names drawn on a tab, in layout order."""
+    return [key[0] for key in map(_figure_key, _components(run.render(tab, DEFAULT_STRATEGY)))
+            if key is not None]
+
+
+# ── RESOLVED TABS ───────────────────────────────────────────
+def resolved_tab(tab: str, dark: bool, strategy: str):
+    """
+    render(tab, strategy) with every server callback's output already in
+    place, so the tree displays as-is with no server: figures set on each
+    graph, household cards and table filled, and the Explorer grid switched
+    to the client-side row model with every row inlined.
+    """
+    tree = run.render(tab, strategy)
+    for c in list(_components(tree)):
+        key = _figure_key(c)
+        if key is not None:
+            name, uses_strategy = key
+            c.figure = run.figure(name, dark, strategy if uses_strategy else None)
+            continue
+        cid = getattr(c, "id", None)
+        if cid == "hh-cards":
+            c.children = run.hh_cards(strategy)
+        elif cid == "hh-body":
+            c.children = run.hh_rows(strategy)
+        elif cid == "data-grid":
+            c.rowModelType = "clientSide"
+            c.rowData = grid_frame().to_dict("records")
+            c.className = "ag-theme-alpine-dark" if dark else "ag-theme-alpine"
+    return tree
+
+
+def grid_frame():
+    """Every Explorer row and column, in the grid's default sort order."""
+    sort_model = [{"colId": c["field"], "sort": c["sort"]} for c in run.GRID_COLUMNS if "sort" in c]
+    rows, _ = run.ctx.query_rows(0, len(run.ctx.df), sort_model)
+    return rows[[c["field"] for c in run.GRID_COLUMNS]]
+
+
+# ── STATIC PAGES ────────────────────────────────────────────
+_PAGE = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8">
+<title>{title} · FruitBudget Analytics</title>
+<script src="plotly.min.js"></script>
+<style>
+body{{margin:0;font-family:'DM Sans',sans-serif;background:{bg};color:{text}}}
+header{{background:{header_grad};color:#fff;padding:20px 32px}}
+header h1{{margin:0;font-size:1.6rem}} header p{{margin:4px 0 0;opacity:.75;font-size:.85rem}}
+nav{{background:{surface};border-bottom:1px solid {border};padding:10px 32px;font-size:.9rem}}
+nav a{{color:{sub};margin-right:14px;text-decoration:none}} nav a.on{{color:{primary};font-weight:700}}
+main{{max-width:1320px;margin:0 auto;padding:24px 32px}}
+.card{{background:{surface};border:1px solid {border};border-radius:8px;padding:16px;margin-bottom:20px}}
+table{{border-collapse:collapse;width:100%;font-size:.85rem}}
+.card .card{{margin-bottom:0}}
+.grid{{display:grid;grid-template-columns:repeat(auto-fit,minmax(180px,1fr));gap:16px;margin-bottom:20px}}
+.row{{display:flex;justify-content:space-between;align-items:center;gap:12px;flex-wrap:wrap}}
+.sub{{color:{sub};font-size:.8rem}} progress{{width:100%;height:6px}}
+th,td{{padding:6px 10px;border-bottom:1px solid {border};text-align:left}}
+footer{{color:{sub};font-size:.75rem;text-align:center;padding:18px}}
+</style></head><body>
+<header><h1>FruitBudget Analytics</h1><p>{subtitle}</p></header>
+<nav>{nav}</nav>
+<main>{body}</main>
+<footer>Static snapshot generated {generated} from {source} ({rows} rows).</footer>
+{scripts}
+</body></html>
+"""
+
+
+def page_name(tab: str, theme: str, strategy: str) -> str:
+    return f"{tab}-{theme}-{strategy}.html"
+
+
+def _nav(tab_list, tab, theme, strategy) -> str:
+    def link(label, t, th, s, on):
+        cls = ' class="on"' if on else ""
+        return f'<a{cls} href="{page_name(t, th, s)}">{html.escape(str(label))}</a>'
+    parts = [link(label, value, theme, strategy, value == tab) for value, label in tab_list]
+    parts.append("&nbsp;|&nbsp;")
+    parts += [link(th, tab, th, strategy, th == theme) for th in THEMES]
+    parts.append("&nbsp;|&nbsp;")
+    parts += [link(s, tab, theme, s, s == strategy) for s in STRATEGIES]
+    return "".join(parts)
+
+
+def _table(frame) -> str:
+    return f'<div class="card">{frame.to_html(index=False, border=0, float_format=lambda v: f"{v:,.4f}")}</div>'
+
+
+# Tag each layout component becomes on a static page; anything not listed is
+# a <div>, and the controls/icons in _SKIP have no static counterpart (the
+# nav bar stands in for the strategy control).
+_TAGS = {"Paper": 'div class="card"', "Alert": 'div class="card"',
+         "SimpleGrid": 'div class="grid"', "Group": 'div class="row"',
+         "Table": "table", "TableThead": "thead", "TableTbody": "tbody", "TableTr": "tr",
+         "TableTh": "th", "TableTd": "td", "Badge": "span"}
+_SKIP = {"SegmentedControl", "ThemeIcon", "DashIconify"}
+
+
+def _html(node, figures: list) -> str:
+    """
+    A resolved_tab() tree as plain HTML, in layout order. Graphs become
+    empty <div id="figN"> placeholders and their figures are appended to
+    figures for page_html to plot; the Explorer grid becomes a full table.
+    """
+    if node is None:
+        return ""
+    if isinstance(node, (list, tuple)):
+        return "".join(_html(n, figures) for n in node)
+    if not isinstance(node, Component):
+        return html.escape(str(node))
+    name = type(node).__name__
+    if name in _SKIP:
+        return ""
+    if isinstance(node, dcc.Graph):
+        figures.append(node.figure)
+        return f'<div id="fig{len(figures) - 1}"></div>'
+    if getattr(node, "id", None) == "data-grid":
+        return _table(grid_frame())
+    if name == "Divider":
+        return "<hr>"
+    if name == "Progress":
+        return f'<progress max="100" value="{node.value:.1f}"></progress>'
+    tag = _TAGS.get(name, 'div class="sub"' if getattr(node, "c", None) == "dimmed" else "div")
+    return f"<{tag}>{_html(getattr(node, 'children', None), figures)}</{tag.split()[0]}>"
+
+
+def page_html(tab_list, tab, theme, strategy, tree, meta) -> str:
+    """Standalone page for tree, a resolved_tab(tab, theme, strategy) result."""
+    dark = THEMES[theme]
+    style = page_style(dark)
+    tokens = {k[len("--fb-"):].replace("-", "_"): v for k, v in style.items()
+              if k.startswith("--fb-")}
+    figures = []
+    body = _html(tree, figures)
+    scripts = []
+    for i, fig in enumerate(figures):
+        payload = json.dumps(fig).replace("</", "<\\/")
+        scripts.append(f"<script>(function(f){{Plotly.newPlot('fig{i}',f.data,f.layout,"
+                       f"{json.dumps(run.PLOT_CONFIG)});}})({payload});</script>")
+    label = dict(tab_list)[tab]
+    return _PAGE.format(
+        title=html.escape(str(label)),
+        subtitle=f"{html.escape(str(label))} · {theme} theme · {strategy} strategy",
+        nav=_nav(tab_list, tab, theme, strategy),
+        body=body,
+        scripts="\n".join(scripts),
+        generated=meta["generated_at"], source=html.escape(os.path.basename(meta["source"]["path"])),
+        rows=meta["source"]["rows"], **tokens)
+
+
+# ── EXPORT ──────────────────────────────────────────────────
+def export_snapshot(out_dir: str, csv_path: str = CSV_PATH, pages: bool = True,
+                    force: bool = False) -> dict | None:
+    """
+    Render the whole dashboard for csv_path into out_dir and return the
+    manifest. Returns None (nothing written) when out_dir already holds an
+    export with the same _inputs() and force is False.
+    """
+    inputs = _inputs(csv_path)
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    if not force and os.path.exists(manifest_path):
+        with open(manifest_path) as fh:
+            source = json.load(fh).get("source", {})
+        if all(source.get(k) == v for k, v in inputs.items()):
+            return None
+
+    if os.path.abspath(csv_path) != os.path.abspath(CSV_PATH):
+        run.reload_data(load_dataframe(csv_path))
+    os.makedirs(out_dir, exist_ok=True)
+
+    meta = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "source": {"path": csv_path, **inputs, "rows": len(run.ctx.df)},
+        "themes": list(THEMES), "strategies": list(STRATEGIES),
+        "default": {"tab": "overview", "theme": "light", "strategy": DEFAULT_STRATEGY},
+        "page_style": {theme: page_style(dark) for theme, dark in THEMES.items()},
+    }
+    tab_list = tabs()
+    meta["tabs"] = [{"value": v, "label": label} for v, label in tab_list]
+    meta["layout"] = _write_json(out_dir, "layout.json", run.serve_layout())
+    meta["data"] = _write_json(out_dir, "data.json", grid_frame().to_dict("records"))
+
+    # Figures: one file per theme, and per strategy for the household chart.
+    figures = {}
+    for name in sorted({n for value, _ in tab_list for n in tab_figures(value)}):
+        per_theme = figures[name] = {}
+        for theme, dark in THEMES.items():
+            if name == "household":
+                per_theme[theme] = {s: _write_json(out_dir, f"figures/{name}-{theme}-{s}.json",
+                                                   run.figure(name, dark, s))
+                                    for s in STRATEGIES}
+            else:
+                per_theme[theme] = _write_json(out_dir, f"figures/{name}-{theme}.json",
+                                               run.figure(name, dark))
+    meta["figures"] = figures
+
+    # Tabs: every tab × theme × strategy, fully resolved.
+    tab_assets = {}
+    for value, _ in tab_list:
+        names = tab_figures(value)
+        for theme, dark in THEMES.items():
+            for s in STRATEGIES:
+                tree = resolved_tab(value, dark, s)
+                entry = tab_assets.setdefault(value, {}).setdefault(theme, {})[s] = {
+                    "json": _write_json(out_dir, f"tabs/{value}-{theme}-{s}.json", tree),
+                    "figures": names,
+                }
+                if pages:
+                    entry["html"] = page_name(value, theme, s)
+                    with open(os.path.join(out_dir, entry["html"]), "w", encoding="utf-8") as fh:
+                        fh.write(page_html(tab_list, value, theme, s, tree, meta))
+    meta["tab_assets"] = tab_assets
+
+    if pages:
+        with open(os.path.join(out_dir, "plotly.min.js"), "w", encoding="utf-8") as fh:
+            fh.write(get_plotlyjs())
+        home = tab_assets[meta["default"]["tab"]][meta["default"]["theme"]][DEFAULT_STRATEGY]["html"]
+        with open(os.path.join(out_dir, home), encoding="utf-8") as src, \
+             open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as dst:
+            dst.write(src.read())
+
+    # Written last: a manifest present means the export finished.
+    with open(manifest_path, "w") as fh:
+        json.dump(meta, fh, indent=2)
+    return meta
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Export a static snapshot of the dashboard.")
+    ap.add_argument("--out", default="snapshot", help="output folder (default: snapshot/)")
+    ap.add_argument("--csv", default=CSV_PATH, help="price CSV to render (default: fruits.csv)")
+    ap.add_argument("--no-html", dest="pages", action="store_false",
+                    help="write only the JSON assets")
+    ap.add_argument("--force", action="store_true",
+                    help="export even if --out already holds this data release")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    meta = export_snapshot(args.out, args.csv, pages=args.pages, force=args.force)
+    if meta is None:
+        print(f"{args.out}: already up to date with {args.csv}")
+        return 0
+    n_files = sum(len(files) for _, _, files in os.walk(args.out))
+    print(f"exported {len(meta['tabs'])} tabs × {len(THEMES)} themes × {len(STRATEGIES)} strategies "
+          f"to {args.out}/ ({n_files} files) in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+figcache.py — Bounded LRU cache for serialized Plotly figures
+==============================================================
+The dashboard's figures depend only on the dataset, the theme, and (for the
+household chart) the shopping strategy, so the render callback can reuse the
+serialized JSON of a figure instead of rebuilding it on every request.
+
+Entries are stored as JSON strings so cached figures cannot be mutated by
+callers and their size is easy to account for.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class FigureCache:
+    """
+    Thread-safe LRU mapping of key → serialized figure JSON.
+
+    Keys are arbitrary hashables; run.py uses (figure name, dark, strategy,
+    data version). Figures are built outside the lock so a slow miss never
+    blocks hits for other keys; two threads missing the same key at once may
+    both build it, and the later result wins.
+
+    on_build, if given, is called after every miss as
+    on_build(key, nbytes, build_s, serialize_s) so callers can record what
+    each figure costs to compute and to serialize.
+    """
+
+    def __init__(self, maxsize: int = 64, on_build=None):
+        self.maxsize   = maxsize
+        self.on_build  = on_build
+        self._data     = OrderedDict()
+        self._lock     = threading.Lock()
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+    def get_or_build(self, key, build) -> dict:
+        """Return the cached figure dict for key, calling build() on a miss."""
+        with self._lock:
+            payload = self._data.get(key)
+            if payload is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+        if payload is None:
+            t0 = time.perf_counter()
+            fig = build()
+            t1 = time.perf_counter()
+            payload = fig.to_json()
+            t2 = time.perf_counter()
+            if self.on_build is not None:
+                self.on_build(key, len(payload), t1 - t0, t2 - t1)
+            with self._lock:
+                self.misses += 1
+                self._data[key] = payload
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+        return json.loads(payload)
+
+    def clear(self) -> None:
+        """Drop every entry (e.g. after the dataset is reloaded)."""
+        with self._lock:
+            self.evictions += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits":      self.hits,
+                "misses":    self.misses,
+                "evictions": self.evictions,
+                "size":      len(self._data),
+                "maxsize":   self.maxsize,
+                "bytes":     sum(len(v) for v in self._data.values()),
+            }
@@ -0,0 +1,270 @@
+"""
+figures.py — Plotly figure builders for the dashboard
+======================================================
+Every builder takes the AnalysisContext to draw from plus the theme flag, and
+returns a go.Figure. run.py imports this module on the first figure request,
+and plotly.express (the slowest import in the app) is only loaded by the
+builders that use it, so neither is paid for at worker startup.
+
+Above MAX_POINTS rows the strip, scatter and violin charts stop sending one
+value per row. The strip and scatter become WebGL traces over a sample of at
+most MAX_POINTS rows. The violins are drawn from a server-side density
+estimate and precomputed box statistics. Set FRUITS_MAX_POINTS to change the
+threshold, or to 0 to always draw every row.
+"""
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+
+from downsample import box_stats, group_positions, kde_curve, sample_groups
+from theme import fc, tok
+
+MAX_POINTS = int(os.environ.get("FRUITS_MAX_POINTS", "5000"))
+
+
+def _px():
+    """plotly.express, imported on first use."""
+    import plotly.express as px
+    return px
+
+def base_lo(t, title="", height=None):
+    lo = dict(paper_bgcolor=t["surface"], plot_bgcolor="rgba(0,0,0,0)",
+              font=dict(family="'DM Sans',sans-serif", color=t["text"], size=12),
+              margin=dict(l=10,r=10,t=44,b=10),
+              title=dict(text=title, font=dict(size=14,color=t["text"]), x=0.01,xanchor="left"),
+              legend=dict(bgcolor=t["surface2"],bordercolor=t["border"],borderwidth=1,
+                          font=dict(size=11,color=t["text"])))
+    if height: lo["height"]=height
+    return lo
+
+def fig_form_bars(ctx,dark):
+    t=tok(dark)
+    fig=go.Figure()
+    for col,label,color in [("Annual_Min","Best-case","#48aa68"),
+                              ("Annual_Avg","Typical",t["primary"]),
+                              ("Annual_Max","Worst-case","#e05252")]:
+        fig.add_trace(go.Bar(name=label, x=ctx.form_summary["Form"], y=ctx.form_summary[col],
+                             marker_color=color, marker_line_width=0,
+                             hovertemplate="<b>%{x}</b><br>"+label+": <b>$%{y:,.2f}</b>/yr<extra></extra>"))
+    fig.update_layout(**base_lo(t,"Annual Per-Person Cost by Form"), barmode="group")
+    fig.update_yaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
+    fig.update_xaxes(color=t["sub"])
+    return fig
+
+def _reduced(df):
+    return MAX_POINTS>0 and len(df)>MAX_POINTS
+
+def _sampled_title(title,groups,n_rows):
+    shown=sum(len(p) for p in groups.values())
+    return f"{title}<br><sup>{shown:,} of {n_rows:,} items sampled</sup>"
+
+def _form_axis(fig,forms,t):
+    fig.update_xaxes(tickmode="array",tickvals=list(range(len(forms))),
+                     ticktext=[str(f) for f in forms],color=t["sub"],zeroline=False,showgrid=False)
+
+def _strip_sampled(ctx,dark):
+    """Jittered WebGL strip over a per-form sample (min and max of each form kept)."""
+    t=tok(dark)
+    df=ctx.df
+    price=df["CupEquivalentPrice"].to_numpy(float)
+    groups=sample_groups(group_positions(df["Form"]),MAX_POINTS,price)
+    names=df["Fruit"].to_numpy()
+    rng=np.random.default_rng(0)
+    fig=go.Figure()
+    for i,(form,pos) in enumerate(groups.items()):
+        fig.add_trace(go.Scattergl(x=i+rng.uniform(-0.2,0.2,len(pos)),y=price[pos],
+                                   mode="markers",name=str(form),hovertext=names[pos],
+                                   marker=dict(size=6,opacity=0.6,color=fc(dark).get(form,"#888")),
+                                   hovertemplate="<b>%{hovertext}</b><br>$%{y:.4f}/cup<extra></extra>"))
+    fig.update_layout(**base_lo(t,_sampled_title("Price Distribution by Form",groups,len(df))))
+    fig.update_yaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"],title="$/cup-equiv.")
+    _form_axis(fig,list(groups),t)
+    return fig
+
+def fig_strip(ctx,dark):
+    if _reduced(ctx.df):
+        return _strip_sampled(ctx,dark)
+    t=tok(dark)
+    fig=_px().strip(ctx.df,x="Form",y="CupEquivalentPrice",color="Form",hover_name="Fruit",
+                 color_discrete_map=fc(dark),
+                 labels={"CupEquivalentPrice":"$/cup-equiv.","Form":""},
+                 title="Price Distribution by Form")
+    fig.update_traces(jitter=0.4,marker=dict(size=9,opacity=0.8,
+                      line=dict(width=1,color=t["surface"])),
+                      hovertemplate="<b>%{hovertext}</b><br>$%{y:.4f}/cup<extra></extra>")
+    fig.update_layout(**base_lo(t,"Price Distribution by Form"))
+    fig.update_yaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
+    fig.update_xaxes(color=t["sub"])
+    return fig
+
+
+def fig_cheapest(ctx,dark):
+    t=tok(dark)
+    fig=_px().bar(ctx.cheapest(15),x="CupEquivalentPrice",y="Fruit",orientation="h",color="Form",
+               color_discrete_map=fc(dark),text="CupEquivalentPrice",
+               labels={"CupEquivalentPrice":"$/cup","Fruit":""},
+               title="15 Most Affordable (per Cup-Equivalent)")
+    fig.update_traces(texttemplate="$%{text:.3f}",textposition="outside",marker_line_width=0,
+                      hovertemplate="<b>%{y}</b><br>$%{x:.4f}/cup<extra></extra>")
+    fig.update_layout(**base_lo(t,"15 Most Affordable (per Cup-Equivalent)",height=490))
+    fig.update_xaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
+    fig.update_yaxes(color=t["sub"],categoryorder="total ascending")
+    return fig
+
+def fig_expensive(ctx,dark):
+    t=tok(dark)
+    fig=_px().bar(ctx.most_expensive(15),x="CupEquivalentPrice",y="Fruit",orientation="h",color="Form",
+               color_discrete_map=fc(dark),text="CupEquivalentPrice",
+               labels={"CupEquivalentPrice":"$/cup","Fruit":""},
+               title="15 Most Expensive (per Cup-Equivalent)")
+    fig.update_traces(texttemplate="$%{text:.3f}",textposition="outside",marker_line_width=0,
+                      hovertemplate="<b>%{y}</b><br>$%{x:.4f}/cup<extra></extra>")
+    fig.update_layout(**base_lo(t,"15 Most Expensive (per Cup-Equivalent)",height=490))
+    fig.update_xaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
+    fig.update_yaxes(color=t["sub"],categoryorder="total descending")
+    return fig
+
+def fig_household(ctx,strategy,dark):
+    t=tok(dark)
+    hh=ctx.household(strategy)
+    fig=go.Figure()
+    bars=[("Annual","Annual_Cost",t["primary"]),
+          ("Monthly","Monthly_Cost","#48aa68" if not dark else "#2ed581"),
+          ("Weekly","Weekly_Cost",t["accent"])]
+    for label,col,color in bars:
+        fig.add_trace(go.Bar(name=label,x=hh["Household"],y=hh[col],
+                             marker_color=color,marker_line_width=0,
+                             hovertemplate=f"<b>%{{x}}</b><br>{label}: <b>${{y:,.2f}}</b><extra></extra>"))
+    title_map={"budget":"Budget Mix (Cheapest 25%)","average":"Average Mix (Median)",
+               "premium":"Premium Mix (Costliest 25%)"}
+    fig.update_layout(**base_lo(t,f"Household Fruit Cost — {title_map[strategy]}"),barmode="group")
+    fig.update_yaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
+    fig.update_xaxes(color=t["sub"])
+    return fig
+
+def fig_donut(ctx,dark):
+    t=tok(dark)
+    form_dist=ctx.form_dist
+    colors=[fc(dark).get(f,"#888") for f in form_dist["Form"]]
+    fig=go.Figure(go.Pie(labels=form_dist["Form"],values=form_dist["Count"],hole=0.6,
+                         marker=dict(colors=colors,line=dict(color=t["surface"],width=3)),
+                         textinfo="label+percent",
+                         hovertemplate="<b>%{label}</b><br>%{value} items (%{percent})<extra></extra>"))
+    fig.update_layout(**base_lo(t,"Dataset Composition by Form"),showlegend=False)
+    return fig
+
+def _violin_precomputed(ctx,dark):
+    """Violins from a binned KDE outline plus a box of precomputed statistics per form."""
+    t=tok(dark)
+    df=ctx.df
+    cost=df["Annual_Cost"].to_numpy(float)
+    groups=group_positions(df["Form"])
+    fig=go.Figure()
+    for i,(form,pos) in enumerate(groups.items()):
+        color=fc(dark).get(form,"#888")
+        y,dens=kde_curve(cost[pos])
+        if not len(y):
+            continue
+        half=0.4*dens/dens.max()
+        fig.add_trace(go.Scatter(x=np.r_[i-half,(i+half)[::-1]],y=np.r_[y,y[::-1]],
+                                 mode="lines",fill="toself",fillcolor=color,
+                                 line=dict(color=t["border"],width=1),
+                                 name=str(form),legendgroup=str(form),hoverinfo="skip"))
+        s=box_stats(cost[pos])
+        fig.add_trace(go.Box(x=[i],q1=[s["q1"]],median=[s["median"]],q3=[s["q3"]],
+                             lowerfence=[s["lowerfence"]],upperfence=[s["upperfence"]],
+                             mean=[s["mean"]],boxmean=True,width=0.08,
+                             fillcolor=t["surface"],line=dict(color=t["text"],width=1),
+                             name=str(form),legendgroup=str(form),showlegend=False,
+                             hoverinfo="y"))
+    fig.update_layout(**base_lo(t,"Annual Cost Distribution (1 Person) by Form"
+                                  f"<br><sup>density of {len(df):,} items</sup>"))
+    fig.update_yaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
+    _form_axis(fig,list(groups),t)
+    return fig
+
+def fig_violin(ctx,dark):
+    if _reduced(ctx.df):
+        return _violin_precomputed(ctx,dark)
+    t=tok(dark)
+    df=ctx.df
+    fig=go.Figure()
+    for form in df["Form"].unique():
+        sub=df[df["Form"]==form]
+        fig.add_trace(go.Violin(x=[form]*len(sub),y=sub["Annual_Cost"],name=form,
+                                fillcolor=fc(dark).get(form,"#888"),line_color=t["border"],
+                                box_visible=True,meanline_visible=True,
+                                hovertemplate="<b>%{x}</b><br>Annual: $%{y:,.2f}<extra></extra>"))
+    fig.update_layout(**base_lo(t,"Annual Cost Distribution (1 Person) by Form"))
+    fig.update_yaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
+    fig.update_xaxes(color=t["sub"])
+    return fig
+
+def _scatter_sampled(ctx,dark):
+    """WebGL scatter over a per-form sample, sized by Yield on the full data's scale."""
+    t=tok(dark)
+    df=ctx.df
+    retail=df["RetailPrice"].to_numpy(float)
+    cup=df["CupEquivalentPrice"].to_numpy(float)
+    yld=df["Yield"].to_numpy(float)
+    groups=sample_groups(group_positions(df["Form"]),MAX_POINTS,cup)
+    names=df["Fruit"].to_numpy()
+    sizeref=2.0*np.nanmax(yld)/20**2          # plotly.express' size_max=20
+    fig=go.Figure()
+    for form,pos in groups.items():
+        fig.add_trace(go.Scattergl(x=retail[pos],y=cup[pos],mode="markers",name=str(form),
+                                   hovertext=names[pos],
+                                   marker=dict(size=yld[pos],sizemode="area",sizeref=sizeref,
+                                               opacity=0.7,color=fc(dark).get(form,"#888")),
+                                   hovertemplate="<b>%{hovertext}</b><br>Retail: $%{x:.4f}"
+                                                 "<br>Cup: $%{y:.4f}<extra></extra>"))
+    fig.update_layout(**base_lo(t,_sampled_title("Retail Price vs Cup-Equivalent Price",
+                                                 groups,len(df))))
+    fig.update_yaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"],title="Cup-Equivalent Price ($)")
+    fig.update_xaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"],
+                     title="Retail Price ($/lb or $/pint)")
+    return fig
+
+def fig_scatter(ctx,dark):
+    if _reduced(ctx.df):
+        return _scatter_sampled(ctx,dark)
+    t=tok(dark)
+    fig=_px().scatter(ctx.df,x="RetailPrice",y="CupEquivalentPrice",color="Form",
+                   size="Yield",hover_name="Fruit",color_discrete_map=fc(dark),
+                   labels={"RetailPrice":"Retail Price ($/lb or $/pint)",
+                           "CupEquivalentPrice":"Cup-Equivalent Price ($)","Yield":"Yield"},
+                   title="Retail Price vs Cup-Equivalent Price")
+    fig.update_traces(marker=dict(opacity=0.82,line=dict(width=1,color=t["surface"])),
+                      hovertemplate="<b>%{hovertext}</b><br>Retail: $%{x:.4f}<br>Cup: $%{y:.4f}<extra></extra>")
+    fig.update_layout(**base_lo(t,"Retail Price vs Cup-Equivalent Price"))
+    fig.update_yaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
+    fig.update_xaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
+    return fig
+
+def fig_heatmap(ctx,dark):
+    t=tok(dark)
+    pivot=ctx.price_index.matrix()
+    cs=[[0,"#084d36"],[0.5,"#48aa68"],[1,"#fef9c3"]] if not dark else \
+       [[0,"#052810"],[0.5,"#1a7f5a"],[1,"#fefce8"]]
+    fig=go.Figure(go.Heatmap(z=pivot.values,x=pivot.columns.tolist(),y=pivot.index.tolist(),
+                              colorscale=cs,hoverongaps=False,
+                              hovertemplate="<b>%{y}</b> — %{x}<br>$%{z:.4f}/cup<extra></extra>",
+                              colorbar=dict(title="$/cup",tickprefix="$",
+                                            tickfont=dict(color=t["sub"]),
+                                           )))
+    fig.update_layout(**base_lo(t,"Cup Price Heatmap: Fruit × Form",height=900))
+    fig.update_yaxes(tickfont=dict(size=10),color=t["sub"])
+    fig.update_xaxes(color=t["sub"])
+    return fig
+
+# Theme-only figures take (ctx, dark); the household chart also takes a strategy.
+FIGURES = {"form_bars":fig_form_bars, "strip":fig_strip, "cheapest":fig_cheapest,
+           "expensive":fig_expensive, "donut":fig_donut, "violin":fig_violin,
+           "scatter":fig_scatter, "heatmap":fig_heatmap, "household":fig_household}
+
+def build_figure(name, ctx, dark, strategy=None):
+    """Build figure ``name`` from ctx for the given theme (and household strategy)."""
+    if name=="household":
+        return FIGURES[name](ctx,strategy,dark)
+    return FIGURES[name](ctx,dark)
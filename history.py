@@ -0,0 +1,403 @@
+"""
+history.py — Append-only price history across USDA releases
+============================================================
+One snapshot CSV answers "what does fruit cost now". Trend views need every
+release side by side, without re-reading a folder of CSVs or holding them all
+in memory. HistoryStore keeps the releases in one directory:
+
+    manifest.json       releases in order, the name dictionaries and the
+                        item → releases index
+    r00000.npz, ...     one columnar segment per release
+
+Encodings
+─────────
+  • Names (item, Form, units) are dictionary-encoded. Each segment stores
+    small integer codes, and manifest.json stores the append-only lists
+    they index.
+  • Prices, Yield and CupEquivalentSize are published to 4 decimals, so they
+    are stored as fixed-point integers (value × 10⁴). A column that does not
+    round-trip exactly stays float64 for that release.
+  • Most releases are stored as deltas against a key-frame release. Each
+    value is stored as value − value in the key frame for the same
+    (item, Form). Prices move little between releases, so the deltas fit
+    in int8/int16 and compress well. A key frame is written every
+    ``keyframe_every`` releases, or when under half of the keys match. A
+    release is decoded from at most two segments.
+  • Rows within a segment are sorted by (item code, Form code). An item's
+    rows are then found by binary search. The manifest lists the releases
+    each item appears in, so item_history() opens only those segments.
+
+Range queries read one release at a time and only the columns they need,
+so memory depends on the largest release, not the history. Release labels
+must sort in publication order as strings (years, or ISO dates).
+
+    store = HistoryStore("data/history")
+    store.append("2023", pd.read_csv("data/fruits.csv"))
+    store.load("2023")                        # enriched frame, like build_dataframe
+    store.item_history("Apples", form="Fresh")
+    store.form_trend("2013", "2023")          # cost_summary_by_form per release
+    store.summarize(best_value_per_base_fruit, start="2020")
+
+    python history.py add 2023 data/fruits.csv
+    python history.py item Apples --form Fresh
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils import DAILY_CUPS_ADULT, DAYS_PER_YEAR, _item_cols, detect_item_column, enrich_dataframe
+
+HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "history")
+SCALE = 10_000                  # fixed point: the USDA files publish 4 decimals
+NUMERIC = ("RetailPrice", "Yield", "CupEquivalentSize", "CupEquivalentPrice")
+UNITS = ("RetailPriceUnit", "CupEquivalentUnit")
+_FORMAT_VERSION = 1
+
+
+def _narrow(a: np.ndarray) -> np.ndarray:
+    """a in the smallest signed integer dtype that holds its values."""
+    if not len(a):
+        return a.astype("int8")
+    lo, hi = int(a.min()), int(a.max())
+    for dt in ("int8", "int16", "int32"):
+        info = np.iinfo(dt)
+        if info.min <= lo and hi <= info.max:
+            return a.astype(dt)
+    return a.astype("int64")
+
+
+class HistoryStore:
+    """
+    Append-only store of price releases for one commodity, keyed by
+    (item, Form, release).
+
+    Releases are added with append() and never rewritten. Every reader
+    method takes a release label or an inclusive start/end range (either
+    end may be None).
+    """
+
+    def __init__(self, root: str = HISTORY_DIR, keyframe_every: int = 8):
+        self.root = root
+        self.keyframe_every = keyframe_every
+        self._manifest_path = os.path.join(root, "manifest.json")
+        try:
+            with open(self._manifest_path) as fh:
+                self._manifest = json.load(fh)
+        except FileNotFoundError:
+            self._manifest = {"version": _FORMAT_VERSION, "item_col": None, "releases": [],
+                              "names": {"item": [], "form": [], "unit": []}, "items": []}
+        if self._manifest["version"] != _FORMAT_VERSION:
+            raise ValueError(f"{self._manifest_path}: unsupported format "
+                             f"version {self._manifest['version']}")
+        self._codes = {kind: {name: i for i, name in enumerate(names)}
+                       for kind, names in self._manifest["names"].items()}
+        self._position = {r["release"]: i for i, r in enumerate(self._manifest["releases"])}
+        self._keyframe = (None, None)           # (release position, decoded columns)
+
+    @property
+    def item_col(self) -> str | None:
+        return self._manifest["item_col"]
+
+    # ── writing ──────────────────────────────────────────────
+    def _encode(self, kind: str, labels) -> np.ndarray:
+        """Dictionary codes of labels, adding unseen names to the dictionary."""
+        codes, uniques = pd.factorize(np.asarray(labels, dtype=object))
+        table, names = self._codes[kind], self._manifest["names"][kind]
+        for u in uniques:
+            if u not in table:
+                table[u] = len(names)
+                names.append(u)
+        return np.fromiter((table[u] for u in uniques), dtype="int64", count=len(uniques))[codes]
+
+    def append(self, release, df: pd.DataFrame) -> dict:
+        """
+        Store one release. df holds raw CSV rows (as read by read_csv) or an
+        enriched frame; rows build_dataframe would drop are dropped here too.
+        release must sort after every stored release. Returns its manifest entry.
+        """
+        release = str(release)
+        stored = self._manifest["releases"]
+        if release in self._position:
+            raise ValueError(f"release {release!r} is already stored")
+        if stored and release < stored[-1]["release"]:
+            raise ValueError(f"release {release!r} sorts before the latest stored "
+                             f"release {stored[-1]['release']!r}")
+        item_col, _ = _item_cols(df)
+        if self.item_col not in (None, item_col):
+            raise ValueError(f"store holds {self.item_col!r} rows, got {item_col!r}")
+        df = enrich_dataframe(df.copy(), item_col)
+
+        item = self._encode("item", df[item_col])
+        form = self._encode("form", df["Form"])
+        order = np.lexsort((form, item))
+        item, form = item[order], form[order]
+        arrays = {"item": _narrow(item), "form": _narrow(form)}
+        for col in UNITS:
+            arrays[col] = _narrow(self._encode("unit", df[col])[order])
+
+        fixed, floats = {}, []
+        for col in NUMERIC:
+            v = df[col].to_numpy(dtype="float64")[order]
+            q = np.round(v * SCALE)
+            if np.array_equal(q / SCALE, v):
+                fixed[col] = q.astype("int64")
+            else:
+                floats.append(col)
+                arrays[col] = v
+
+        # Delta against the latest key frame when enough keys line up.
+        key = (item << 16) | form
+        ref = self._latest_keyframe()
+        if ref is not None and len(stored) - ref < self.keyframe_every:
+            base = self._decoded(ref)
+            pos = np.minimum(np.searchsorted(base["key"], key), max(len(base["key"]) - 1, 0))
+            hit = (base["key"][pos] == key) if len(base["key"]) else np.zeros(len(key), bool)
+            if not len(key) or hit.mean() < 0.5 or any(c in base["floats"] for c in fixed):
+                ref = None
+            else:
+                for col, q in fixed.items():
+                    fixed[col] = q - np.where(hit, base[col][pos], 0)
+        else:
+            ref = None
+        arrays.update({col: _narrow(q) for col, q in fixed.items()})
+
+        os.makedirs(self.root, exist_ok=True)
+        name = f"r{len(stored):05d}.npz"
+        tmp = os.path.join(self.root, f"{name}.{os.getpid()}.tmp.npz")
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, os.path.join(self.root, name))
+
+        entry = {"release": release, "file": name, "rows": len(df), "ref": ref, "float": floats}
+        stored.append(entry)
+        self._position[release] = len(stored) - 1
+        items = self._manifest["items"]
+        items.extend([] for _ in range(len(self._manifest["names"]["item"]) - len(items)))
+        for code in np.unique(item).tolist():
+            items[code].append(len(stored) - 1)
+        self._manifest["item_col"] = item_col
+        self._write_manifest()
+        return entry
+
+    def append_csv(self, release, csv_path: str) -> dict:
+        """append() a USDA price CSV."""
+        item_col = detect_item_column(csv_path)
+        return self.append(release, pd.read_csv(csv_path, dtype={item_col: object}))
+
+    def _write_manifest(self) -> None:
+        tmp = f"{self._manifest_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fh:
+            fh.write(json.dumps(self._manifest))      # dumps uses the C encoder
+        os.replace(tmp, self._manifest_path)
+
+    def _latest_keyframe(self) -> int | None:
+        for i in range(len(self._manifest["releases"]) - 1, -1, -1):
+            if self._manifest["releases"][i]["ref"] is None:
+                return i
+        return None
+
+    # ── decoding ─────────────────────────────────────────────
+    def _decoded(self, i: int, columns=None) -> dict:
+        """
+        Columns of release position i: codes for names, fixed-point int64 for
+        the fixed numeric columns (float64 for the rest), plus "key" and
+        "floats". Only the requested numeric columns are read.
+        """
+        entry = self._manifest["releases"][i]
+        if entry["ref"] is None and self._keyframe[0] == i and columns is None:
+            return self._keyframe[1]
+        wanted = NUMERIC if columns is None else [c for c in NUMERIC if c in columns]
+        with np.load(os.path.join(self.root, entry["file"])) as seg:
+            out = {c: seg[c].astype("int64") for c in ("item", "form")}
+            for c in UNITS:
+                if columns is None or c in columns:
+                    out[c] = seg[c].astype("int64")
+            for c in wanted:
+                out[c] = seg[c] if c in entry["float"] else seg[c].astype("int64")
+        out["key"] = (out["item"] << 16) | out["form"]
+        out["floats"] = entry["float"]
+        if entry["ref"] is not None:
+            base = self._decoded(entry["ref"])
+            pos = np.minimum(np.searchsorted(base["key"], out["key"]), len(base["key"]) - 1)
+            hit = base["key"][pos] == out["key"]
+            for c in wanted:
+                if c not in entry["float"]:
+                    out[c] = out[c] + np.where(hit, base[c][pos], 0)
+        elif columns is None:
+            self._keyframe = (i, out)           # delta releases reuse it
+        return out
+
+    def _values(self, cols: dict, col: str) -> np.ndarray:
+        v = cols[col]
+        return v if col in cols["floats"] else v / SCALE
+
+    # ── reading ──────────────────────────────────────────────
+    def releases(self, start=None, end=None) -> list:
+        """Stored release labels in [start, end], oldest first."""
+        return [r["release"] for r in self._manifest["releases"]
+                if (start is None or r["release"] >= str(start))
+                and (end is None or r["release"] <= str(end))]
+
+    def _index(self, release) -> int:
+        try:
+            return self._position[str(release)]
+        except KeyError:
+            raise KeyError(f"release {release!r} not in store; have {self.releases()}") from None
+
+    def _raw(self, cols: dict, rows=slice(None)) -> pd.DataFrame:
+        """Raw CSV-shaped rows (plus CupEquivalentPrice) from decoded columns."""
+        names = self._manifest["names"]
+        item, form, unit = (np.asarray(names[k], dtype=object) for k in ("item", "form", "unit"))
+        return pd.DataFrame({
+            self.item_col:       item[cols["item"][rows]],
+            "Form":              form[cols["form"][rows]],
+            "RetailPrice":       self._values(cols, "RetailPrice")[rows],
+            "RetailPriceUnit":   unit[cols["RetailPriceUnit"][rows]],
+            "Yield":             self._values(cols, "Yield")[rows],
+            "CupEquivalentSize": self._values(cols, "CupEquivalentSize")[rows],
+            "CupEquivalentUnit": unit[cols["CupEquivalentUnit"][rows]],
+            "CupEquivalentPrice": self._values(cols, "CupEquivalentPrice")[rows],
+        })
+
+    def load(self, release, compact: bool = False) -> pd.DataFrame:
+        """
+        One release as an enriched frame, with the same columns and values
+        as build_dataframe() on its CSV. Rows are ordered by item and Form.
+        """
+        raw = self._raw(self._decoded(self._index(release))).drop(columns="CupEquivalentPrice")
+        return enrich_dataframe(raw, self.item_col, compact)
+
+    def item_history(self, item: str, form: str | None = None,
+                     start=None, end=None) -> pd.DataFrame:
+        """
+        Every stored row of one item (optionally one Form) in the range, one
+        row per release and form. Only releases that list the item are read.
+        """
+        code = self._codes["item"].get(item)
+        in_range = {self._position[r] for r in self.releases(start, end)}
+        found = [] if code is None else [i for i in self._manifest["items"][code] if i in in_range]
+        frames = []
+        for i in found:
+            cols = self._decoded(i)
+            lo, hi = np.searchsorted(cols["item"], [code, code + 1])
+            rows = self._raw(cols, slice(lo, hi))
+            if form is not None:
+                rows = rows[rows["Form"] == form]
+            rows.insert(0, "Release", self._manifest["releases"][i]["release"])
+            frames.append(rows)
+        if not frames:
+            return pd.DataFrame(columns=["Release", self.item_col or "Item", "Form",
+                                         "RetailPrice", "RetailPriceUnit", "Yield",
+                                         "CupEquivalentSize", "CupEquivalentUnit",
+                                         "CupEquivalentPrice"])
+        return pd.concat(frames, ignore_index=True)
+
+    def form_trend(self, start=None, end=None) -> pd.DataFrame:
+        """
+        cost_summary_by_form() for every release in the range, with a
+        Release column. Reads only the Form and CupEquivalentPrice columns.
+        """
+        forms = np.asarray(self._manifest["names"]["form"], dtype=object)
+        frames = []
+        for release in self.releases(start, end):
+            cols = self._decoded(self._index(release), columns=("CupEquivalentPrice",))
+            price, code = self._values(cols, "CupEquivalentPrice"), cols["form"]
+            count = np.bincount(code, minlength=len(forms))
+            present = np.flatnonzero(count)
+            lo = np.full(len(forms), np.inf)
+            hi = np.full(len(forms), -np.inf)
+            np.minimum.at(lo, code, price)
+            np.maximum.at(hi, code, price)
+            out = pd.DataFrame({
+                "Release":     release,
+                "Form":        forms[present],
+                "AvgCupPrice": np.bincount(code, price, len(forms))[present] / count[present],
+                "MinCupPrice": lo[present],
+                "MaxCupPrice": hi[present],
+                "Count":       count[present],
+            }).sort_values("Form")
+            for col, src in (("Annual_Avg", "AvgCupPrice"), ("Annual_Min", "MinCupPrice"),
+                             ("Annual_Max", "MaxCupPrice")):
+                out[col] = (out[src] * DAILY_CUPS_ADULT * DAYS_PER_YEAR).round(2)
+            frames.append(out.sort_values("AvgCupPrice", kind="stable"))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def price_change(self, start, end) -> pd.DataFrame:
+        """
+        CupEquivalentPrice of every (item, Form) stored in both releases,
+        with the change between them, largest rise first.
+        """
+        a = self._decoded(self._index(start), columns=("CupEquivalentPrice",))
+        b = self._decoded(self._index(end), columns=("CupEquivalentPrice",))
+        common, ia, ib = np.intersect1d(a["key"], b["key"], return_indices=True)
+        before = self._values(a, "CupEquivalentPrice")[ia]
+        after = self._values(b, "CupEquivalentPrice")[ib]
+        names = self._manifest["names"]
+        out = pd.DataFrame({
+            self.item_col: np.asarray(names["item"], dtype=object)[common >> 16],
+            "Form":        np.asarray(names["form"], dtype=object)[common & 0xFFFF],
+            f"Price_{start}": before,
+            f"Price_{end}":   after,
+            "Change":      (after - before).round(4),
+            "ChangePct":   ((after / before - 1) * 100).round(1),
+        })
+        return out.sort_values("Change", ascending=False, kind="stable").reset_index(drop=True)
+
+    def summarize(self, func, start=None, end=None, **kwargs) -> pd.DataFrame:
+        """
+        Run a utils summary (any function of an enriched frame returning a
+        DataFrame) on each release in the range, one release in memory at a
+        time. The results are concatenated with a Release column.
+        """
+        frames = []
+        for release in self.releases(start, end):
+            out = func(self.load(release), **kwargs)
+            out.insert(0, "Release", release)
+            frames.append(out)
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def catalog(self) -> pd.DataFrame:
+        """One row per stored release: rows, segment bytes and encoding."""
+        stored = self._manifest["releases"]
+        return pd.DataFrame({
+            "Release":  [r["release"] for r in stored],
+            "Rows":     [r["rows"] for r in stored],
+            "Bytes":    [os.path.getsize(os.path.join(self.root, r["file"])) for r in stored],
+            "Encoding": ["key frame" if r["ref"] is None else f"delta vs {stored[r['ref']]['release']}"
+                         for r in stored],
+        })
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Append-only price history across releases.")
+    ap.add_argument("--store", default=HISTORY_DIR, help="history directory (default data/history)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    add = sub.add_parser("add", help="store a release from a CSV")
+    add.add_argument("release")
+    add.add_argument("csv")
+    sub.add_parser("list", help="list stored releases")
+    item = sub.add_parser("item", help="price history of one item")
+    item.add_argument("item")
+    item.add_argument("--form")
+    for p in (item, sub.add_parser("trend", help="per-form summary of every release")):
+        p.add_argument("--start")
+        p.add_argument("--end")
+    args = ap.parse_args(argv)
+
+    store = HistoryStore(args.store)
+    if args.cmd == "add":
+        entry = store.append_csv(args.release, args.csv)
+        print(store.catalog().tail(1).to_string(index=False))
+    elif args.cmd == "list":
+        print(store.catalog().to_string(index=False))
+    elif args.cmd == "item":
+        print(store.item_history(args.item, args.form, args.start, args.end).to_string(index=False))
+    else:
+        print(store.form_trend(args.start, args.end).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
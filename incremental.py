@@ -0,0 +1,371 @@
+"""
+incremental.py — Apply price corrections without rebuilding every table
+========================================================================
+A USDA correction usually touches a handful of rows. IncrementalAnalysis
+keeps the enriched rows in growable column arrays, plus the running state
+behind each dashboard summary, and changes that state in place:
+
+    summary                      state kept                          per changed row
+    ───────────────────────────  ──────────────────────────────────  ───────────────
+    form_summary / form_dist     per-Form count, exact sum,          O(log n)
+                                 min/max RowHeaps
+    best_value                   utils.PriceIndex (per-cell heaps)   O(log n)
+    cheapest / most_expensive    sorted buffer of the ~4k extreme    O(k)
+                                 rows; refilled from all rows only
+                                 when deletes leave fewer than k
+
+Upserted rows go through utils.enrich_dataframe, so CupEquivalentPrice and
+the Daily/Weekly/Monthly/Annual cost columns are computed exactly as a
+rebuild would compute them. Rows are matched on ``key`` (item and Form by
+default). An upserted row that fails validation is deleted, as a rebuild
+would drop it. best_value(), cheapest() and most_expensive() equal the utils
+function run on frame(). form_summary() equals it up to float rounding: its
+mean is an exact integer sum over the count, pandas' a float sum, so the
+two can differ in the last few bits. form_dist() has the same counts and
+percentages, but tied counts may be listed in a different order.
+benchmarks/bench_incremental.py checks these guarantees.
+
+    inc = IncrementalAnalysis(load_dataframe())
+    inc.upsert(corrected_rows)          # raw CSV rows, new or changed
+    inc.delete([("Apples, fresh", "Fresh")])
+    inc.form_summary(); inc.best_value(); inc.cheapest(15); inc.form_dist()
+"""
+
+import bisect
+
+import numpy as np
+import pandas as pd
+
+from utils import (
+    DAILY_CUPS_ADULT, DAYS_PER_YEAR, PriceIndex, RowHeap, _item_cols, enrich_dataframe,
+    top_k_positions,
+)
+
+# Sums are kept in integer 1/10000 dollars: prices are rounded to 4 decimals,
+# so adding and subtracting never drifts.
+_UNITS = 10_000
+_ITEM_VIEW = ("Form", "CupEquivalentPrice", "RetailPrice", "RetailPriceUnit", "Yield")
+
+
+class _FormState:
+    """Running count, sum and extremes of one Form's live prices."""
+
+    __slots__ = ("count", "units", "slots", "low", "high", "first")
+
+    def __init__(self):
+        self.count = 0
+        self.units = 0                  # Σ round(price · _UNITS) over live slots
+        self.slots: list = []           # every slot ever given to this form
+        self.low   = RowHeap()          # (price, slot)
+        self.high  = RowHeap()          # (-price, slot)
+        self.first = RowHeap()          # (slot, slot): earliest live slot
+
+
+class _TopK:
+    """
+    The live rows with the smallest sort keys, (price, slot) ascending or
+    (-price, slot) for the most expensive.
+
+    Holds every live row whose key is <= cutoff, in key order, so the first
+    n entries are the answer while at least n are held. add() and discard()
+    cost one bisect each; refill() rescans all rows and is only needed once
+    deletes have used up the spare entries.
+    """
+
+    def __init__(self, k: int, largest: bool):
+        self.largest = largest
+        self.size = max(4 * k, 64)
+        self.keys: list = []
+        self.cutoff = None              # None: every live row is held
+
+    def key(self, price: float, slot: int) -> tuple:
+        return (-price if self.largest else price, slot)
+
+    def refill(self, prices: np.ndarray) -> None:
+        """Rebuild from the price of every slot (NaN for dead slots)."""
+        pos = top_k_positions(prices, self.size + 1, self.largest)
+        pos = pos[~np.isnan(prices[pos])]
+        self.keys = [self.key(float(prices[p]), int(p)) for p in pos[: self.size]]
+        self.cutoff = self.keys[-1] if len(pos) > self.size else None
+
+    def add(self, price: float, slot: int) -> None:
+        key = self.key(price, slot)
+        if self.cutoff is None or key <= self.cutoff:
+            bisect.insort(self.keys, key)
+            if len(self.keys) > 2 * self.size:          # keep the buffer bounded
+                del self.keys[self.size:]
+                self.cutoff = self.keys[-1]
+
+    def discard(self, price: float, slot: int) -> None:
+        key = self.key(price, slot)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def holds(self, n: int) -> bool:
+        """True while the buffer is known to contain the first n rows."""
+        return self.cutoff is None or len(self.keys) >= n
+
+
+class IncrementalAnalysis:
+    """
+    Enriched rows and the dashboard summaries derived from them, updated
+    row by row.
+
+    Each row lives in a slot. A row keeps its slot while it is updated; a
+    deleted row's slot is reused if the same key is upserted again, and new
+    keys take new slots at the end. frame() lists live rows in slot order,
+    which is the original row order until rows are added or re-added.
+    ``key`` must include the item column and Form, so a slot never moves
+    between forms or base items.
+    """
+
+    def __init__(self, df: pd.DataFrame, key: tuple | None = None, k: int = 15):
+        self.item_col, self.base_col = _item_cols(df)
+        self.key = tuple(key) if key is not None else (self.item_col, "Form")
+        if not {self.item_col, "Form"} <= set(self.key):
+            raise ValueError(f"key must include {self.item_col!r} and 'Form'")
+        if df.duplicated(list(self.key)).any():
+            raise ValueError(f"rows are not unique on {list(self.key)}; pass a finer key")
+        self.columns = list(df.columns)
+        self._dtypes = {c: "category" if isinstance(d, pd.CategoricalDtype) else d
+                        for c, d in df.dtypes.items()}
+        self._compact = df["Daily_Cost"].dtype == "float32"
+        self._floats = {c for c in self.columns if pd.api.types.is_float_dtype(df[c].dtype)}
+
+        n = len(df)
+        self._n = 0                     # slots in use, live or dead
+        self._cols = {c: np.empty(0, dtype="float64" if c in self._floats else object)
+                      for c in self.columns}
+        self._alive = np.empty(0, dtype=bool)
+        self._grow(n)
+        for c in self.columns:
+            self._cols[c][:n] = df[c].to_numpy(dtype="float64" if c in self._floats else object)
+        self._alive[:n] = True
+        self._n = n
+        self._slot = {key_: slot for slot, key_ in enumerate(self._keys(df))}
+
+        self.index = PriceIndex(self.base_col, self.item_col)
+        self.index.append(df)
+        self._forms: dict = {}
+        self._live = n
+        forms = self._cols["Form"][:n]
+        codes, labels = pd.factorize(forms)
+        prices = self._cols["CupEquivalentPrice"][:n]
+        for code, form in enumerate(labels):
+            slots = np.flatnonzero(codes == code)
+            p = prices[slots]
+            st = self._forms[form] = _FormState()
+            st.count, st.slots = len(slots), slots.tolist()
+            st.units = int(np.round(p * _UNITS).astype("int64").sum())
+            st.low   = RowHeap(zip(p.tolist(), st.slots))
+            st.high  = RowHeap(zip((-p).tolist(), st.slots))
+            st.first = RowHeap(zip(st.slots, st.slots))
+        self._cheap = _TopK(k, largest=False)
+        self._dear  = _TopK(k, largest=True)
+        self._cheap.refill(self._live_prices())
+        self._dear.refill(self._live_prices())
+
+    def __len__(self) -> int:
+        return self._live
+
+    def _keys(self, df: pd.DataFrame) -> list:
+        return list(zip(*(df[c].to_numpy(dtype=object) for c in self.key)))
+
+    def _grow(self, need: int) -> None:
+        """Make room for need slots, doubling so appends are amortized O(1)."""
+        cap = len(self._alive)
+        if need <= cap:
+            return
+        cap = max(need, 2 * cap, 16)
+        for c, arr in self._cols.items():
+            grown = np.full(cap, np.nan) if c in self._floats else np.empty(cap, dtype=object)
+            grown[: self._n] = arr[: self._n]
+            self._cols[c] = grown
+        alive = np.zeros(cap, dtype=bool)
+        alive[: self._n] = self._alive[: self._n]
+        self._alive = alive
+
+    def _live_prices(self) -> np.ndarray:
+        """CupEquivalentPrice per slot, NaN for dead slots (O(slots))."""
+        return np.where(self._alive[: self._n], self._cols["CupEquivalentPrice"][: self._n], np.nan)
+
+    # ── per-slot bookkeeping ─────────────────────────────────
+    def _price(self, slot: int) -> float:
+        """Live price of a slot; NaN once deleted, so no heap entry matches it."""
+        return float(self._cols["CupEquivalentPrice"][slot]) if self._alive[slot] else np.nan
+
+    def _enter(self, slot: int, new: bool = False) -> None:
+        """Count a live slot's price in its form and top-k buffers; new = first use of the slot."""
+        form = self._cols["Form"][slot]
+        st = self._forms.get(form)
+        if st is None:
+            st = self._forms[form] = _FormState()
+        if new:
+            st.slots.append(slot)
+        price = float(self._cols["CupEquivalentPrice"][slot])
+        st.count += 1
+        st.units += round(price * _UNITS)
+        st.low.push(price, slot)
+        st.high.push(-price, slot)
+        st.first.push(slot, slot)
+        self._live += 1
+        self._cheap.add(price, slot)
+        self._dear.add(price, slot)
+
+    def _leave(self, slot: int) -> None:
+        """Take a live slot's stored price out of its form and the top-k buffers."""
+        st = self._forms[self._cols["Form"][slot]]
+        price = float(self._cols["CupEquivalentPrice"][slot])
+        st.count -= 1
+        st.units -= round(price * _UNITS)
+        self._live -= 1
+        self._cheap.discard(price, slot)
+        self._dear.discard(price, slot)
+
+    # ── updates ──────────────────────────────────────────────
+    def upsert(self, rows: pd.DataFrame) -> dict:
+        """
+        Insert or replace raw rows (CSV columns, as read by read_csv). Rows
+        are enriched like build_dataframe; one that fails validation deletes
+        its key instead. Later rows win when a key repeats.
+        Returns {"inserted", "updated", "deleted"} counts.
+        """
+        raw = rows.reset_index(drop=True)
+        keys = self._keys(raw)
+        raw = raw.assign(_upsert_pos=np.arange(len(raw)))
+        enriched = enrich_dataframe(raw, self.item_col, self._compact)
+        at = dict(zip(enriched.pop("_upsert_pos").tolist(), range(len(enriched))))
+        values = {c: enriched[c].to_numpy(dtype="float64" if c in self._floats else object)
+                  for c in self.columns}
+
+        counts = {"inserted": 0, "updated": 0, "deleted": 0}
+        indexed, touched = self._n, set()
+        for pos, key in enumerate(keys):
+            j = at.get(pos)
+            if j is None:
+                counts["deleted"] += self._drop(key, touched)
+                continue
+            slot = self._slot.get(key)
+            if slot is None:
+                slot = self._slot[key] = self._n
+                self._grow(self._n + 1)
+                self._n += 1
+                new = True
+                counts["inserted"] += 1
+            else:
+                new = False
+                if self._alive[slot]:
+                    self._leave(slot)
+                    counts["updated"] += 1
+                else:
+                    counts["inserted"] += 1
+            for c in self.columns:
+                self._cols[c][slot] = values[c][j]
+            self._alive[slot] = True
+            self._enter(slot, new=new)
+            touched.add(slot)
+        self._sync_index(indexed, touched)
+        return counts
+
+    def delete(self, keys) -> int:
+        """Delete rows by key (tuples in ``key`` order); returns how many existed."""
+        touched = set()
+        n = sum(self._drop(tuple(k), touched) for k in keys)
+        self._sync_index(self._n, touched)
+        return n
+
+    def _drop(self, key: tuple, touched: set) -> int:
+        slot = self._slot.get(key)
+        if slot is None or not self._alive[slot]:
+            return 0
+        self._leave(slot)
+        self._alive[slot] = False
+        touched.add(slot)
+        return 1
+
+    def _sync_index(self, indexed: int, touched: set) -> None:
+        """Bring the PriceIndex to the final state of the touched slots."""
+        if self._n > indexed:           # slots new in this batch, in order
+            self.index.append(pd.DataFrame(
+                {c: self._cols[c][indexed: self._n]
+                 for c in (self.item_col, self.base_col, "Form", "CupEquivalentPrice")}))
+        old = sorted(s for s in touched if s < indexed)
+        gone = [s for s in range(indexed, self._n) if not self._alive[s]]
+        if old:
+            self.index.set_prices(old, [self._price(s) for s in old])
+        if gone:
+            self.index.remove(gone)
+
+    # ── summaries ────────────────────────────────────────────
+    def _top(self, st: _FormState, heap: str, sign: int) -> float:
+        """Cheapest (sign=1) or dearest (sign=-1) live price of a form."""
+        if len(getattr(st, heap)) > 2 * st.count + 16:      # drop stale entries
+            setattr(st, heap, RowHeap((sign * self._price(s), s) for s in st.slots
+                                      if self._alive[s]))
+        return sign * getattr(st, heap).top(lambda s: sign * self._price(s))[0]
+
+    def form_summary(self) -> pd.DataFrame:
+        """cost_summary_by_form(frame()) up to float rounding, from the running per-form totals."""
+        forms = sorted(f for f, st in self._forms.items() if st.count)
+        st = [self._forms[f] for f in forms]
+        out = pd.DataFrame({
+            "Form":        forms,
+            "AvgCupPrice": [s.units / _UNITS / s.count for s in st],
+            "MinCupPrice": [self._top(s, "low", 1) for s in st],
+            "MaxCupPrice": [self._top(s, "high", -1) for s in st],
+            "Count":       [s.count for s in st],
+        })
+        for col, src in (("Annual_Avg", "AvgCupPrice"), ("Annual_Min", "MinCupPrice"),
+                         ("Annual_Max", "MaxCupPrice")):
+            out[col] = (out[src] * DAILY_CUPS_ADULT * DAYS_PER_YEAR).round(2)
+        return out.sort_values("AvgCupPrice", kind="stable").reset_index(drop=True)
+
+    def form_dist(self) -> pd.DataFrame:
+        """form_distribution(frame()): count desc, ties in order of first row (pandas may differ)."""
+        live = [(f, st) for f, st in self._forms.items() if st.count]
+        first = {f: self._first(st) for f, st in live}
+        live.sort(key=lambda fs: (-fs[1].count, first[fs[0]]))
+        counts = [st.count for _, st in live]
+        return pd.DataFrame({
+            "Form":       [f for f, _ in live],
+            "Count":      np.array(counts, dtype="int64"),
+            "Percentage": (np.array(counts, dtype="float64") / self._live * 100).round(1),
+        })
+
+    def _first(self, st: _FormState) -> int:
+        if len(st.first) > 2 * st.count + 16:
+            st.first = RowHeap((s, s) for s in st.slots if self._alive[s])
+        return st.first.top(lambda s: s if self._alive[s] else -1)[0]
+
+    def best_value(self) -> pd.DataFrame:
+        """best_value_per_base_fruit(frame()), from the PriceIndex."""
+        return self.index.best_value()
+
+    def _extreme(self, buf: _TopK, n: int) -> pd.DataFrame:
+        if n > buf.size:                # more than the buffer keeps: one full pass
+            prices = self._live_prices()
+            slots = top_k_positions(prices, n, buf.largest)
+            slots = slots[~np.isnan(prices[slots])]
+        else:
+            if not buf.holds(n):
+                buf.refill(self._live_prices())
+            slots = np.array([s for _, s in buf.keys[:n]], dtype="int64")
+        return self._rows(slots, [self.item_col, *_ITEM_VIEW])
+
+    def cheapest(self, n: int = 15) -> pd.DataFrame:
+        """cheapest_items(frame(), n)."""
+        return self._extreme(self._cheap, n)
+
+    def most_expensive(self, n: int = 15) -> pd.DataFrame:
+        """most_expensive_items(frame(), n)."""
+        return self._extreme(self._dear, n)
+
+    # ── materializing ────────────────────────────────────────
+    def _rows(self, slots: np.ndarray, columns: list) -> pd.DataFrame:
+        out = pd.DataFrame({c: self._cols[c][slots] for c in columns})
+        return out.astype({c: self._dtypes[c] for c in columns})
+
+    def frame(self) -> pd.DataFrame:
+        """The live rows as an enriched frame, in slot order (O(rows))."""
+        return self._rows(np.flatnonzero(self._alive[: self._n]), self.columns)
@@ -0,0 +1,196 @@
+"""
+metrics.py — Response compression and payload metrics for the Dash server
+=========================================================================
+Hooks into the Flask server behind a Dash app to
+
+  * gzip JSON and HTML responses (callback outputs, layout, dependencies,
+    the index page) for clients that accept it;
+  * record, per callback, the compute time of the Python function, the time
+    Dash then spends serializing its output, and the response size before
+    and after compression;
+  * record, per figure builder, compute time, ``to_json`` time and payload
+    size (fed from FigureCache's on_build hook);
+  * serve everything recorded as JSON on ``/metrics``, to loopback clients
+    only.
+
+    metrics = Metrics()
+    install(app.server, metrics, extra=lambda: {"figure_cache": cache.stats()})
+
+    @callback(Output("tab-content", "children"), Input("tabs", "value"))
+    @metrics.timed(lambda tab: f"render[{tab}]")
+    def render(tab): ...
+
+Static assets (the Dash and component JS bundles under
+``/_dash-component-suites/``, ``/assets/`` and ``/static/``) are compressed
+once per path and ETag and then served from an in-process cache, so a
+multi-megabyte bundle is not gzipped again on every request. Responses that
+Flask streams straight from a file (``direct_passthrough``) are left alone.
+"""
+
+import functools
+import gzip
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, has_request_context, jsonify, request
+
+COMPRESSIBLE = ("application/json", "text/html", "text/css", "text/plain",
+                "application/javascript", "text/javascript")
+LOCAL_ADDRS = ("127.0.0.1", "::1", "localhost")
+# Routes whose bodies are fixed for the life of the process (per path and ETag).
+STATIC_PREFIXES = ("/_dash-component-suites/", "/assets/", "/static/")
+
+
+class Metrics:
+    """
+    Thread-safe running totals, keyed by (kind, name).
+
+    Every ``record`` adds one observation of any number of named values
+    (bytes, seconds, ...). ``snapshot`` reports the count plus the total,
+    mean and max of each value.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def record(self, kind: str, name: str, **values) -> None:
+        with self._lock:
+            entry = self._data.setdefault((kind, name), {"count": 0, "values": {}})
+            entry["count"] += 1
+            for field, v in values.items():
+                total, peak = entry["values"].get(field, (0, v))
+                entry["values"][field] = (total + v, max(peak, v))
+
+    def snapshot(self) -> dict:
+        """{kind: {name: {"count": n, field: {"total", "mean", "max"}}}}."""
+        out = {}
+        with self._lock:
+            for (kind, name), entry in sorted(self._data.items()):
+                n = entry["count"]
+                row = {"count": n}
+                for field, (total, peak) in entry["values"].items():
+                    row[field] = {"total": round(total, 6), "mean": round(total / n, 6),
+                                  "max": round(peak, 6)}
+                out.setdefault(kind, {})[name] = row
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def timed(self, name):
+        """
+        Decorator for a Dash callback function: time the call and label the
+        request, so the response hook can attribute size and serialization
+        time to it. name is a string, or a function of the callback's
+        arguments returning one (e.g. to split a render callback by tab).
+        """
+        def wrap(fn):
+            @functools.wraps(fn)
+            def inner(*args, **kwargs):
+                if not has_request_context():     # called directly, e.g. by export.py
+                    return fn(*args, **kwargs)
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    g.callback_name = name(*args, **kwargs) if callable(name) else name
+                    g.callback_done = time.perf_counter()
+                    g.callback_compute_s = g.callback_done - t0
+            return inner
+        return wrap
+
+
+def _accepts_gzip() -> bool:
+    return "gzip" in request.headers.get("Accept-Encoding", "").lower()
+
+
+class _GzipCache:
+    """Bounded LRU of gzipped static bodies, keyed by (path, ETag, raw size)."""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get_or_compress(self, key, raw: bytes, level: int) -> bytes:
+        with self._lock:
+            packed = self._data.get(key)
+            if packed is not None:
+                self._data.move_to_end(key)
+                return packed
+        packed = gzip.compress(raw, compresslevel=level)
+        with self._lock:
+            self._data[key] = packed
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return packed
+
+
+def _compress(response, level: int, min_size: int, cache: _GzipCache | None = None):
+    """gzip response in place when it is worth it; returns (raw bytes, sent bytes)."""
+    if response.direct_passthrough or response.is_streamed:
+        return None, None
+    raw = response.get_data()
+    if (level <= 0 or len(raw) < min_size or response.status_code != 200
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE or not _accepts_gzip()):
+        return len(raw), len(raw)
+    if cache is not None and request.path.startswith(STATIC_PREFIXES):
+        key = (request.full_path, response.headers.get("ETag"), len(raw))
+        packed = cache.get_or_compress(key, raw, level)
+    else:
+        packed = gzip.compress(raw, compresslevel=level)
+    response.set_data(packed)
+    response.headers["Content-Encoding"] = "gzip"
+    response.headers["Content-Length"] = str(len(packed))
+    response.vary.add("Accept-Encoding")
+    return len(raw), len(packed)
+
+
+def install(server, metrics: Metrics, level: int = 6, min_size: int = 1024,
+            extra=None, path: str = "/metrics") -> None:
+    """
+    Add compression and request metrics to a Flask server, and the metrics
+    endpoint at ``path``. level=0 turns compression off. extra, if given,
+    returns a dict merged into the endpoint's output (e.g. cache stats).
+    """
+    static_cache = _GzipCache()
+
+    @server.before_request
+    def _start_timer():
+        g.request_t0 = time.perf_counter()
+
+    @server.after_request
+    def _compress_and_record(response):
+        t0 = time.perf_counter()
+        raw, sent = _compress(response, level, min_size, static_cache)
+        if raw is None or request.path == path:
+            return response
+        done = time.perf_counter()
+        name = g.get("callback_name")
+        if name is None and request.path.endswith("/_dash-update-component"):
+            body = request.get_json(silent=True) or {}
+            name = body.get("output", "?")
+        values = {"bytes": raw, "sent_bytes": sent, "compress_s": done - t0,
+                  "request_s": done - g.get("request_t0", t0)}
+        if "callback_done" in g:
+            values["compute_s"] = g.callback_compute_s
+            values["serialize_s"] = t0 - g.callback_done
+        if name:
+            metrics.record("callback", name, **values)
+        else:       # by URL rule, so arbitrary paths cannot grow the table
+            rule = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+            metrics.record("route", rule, **values)
+        return response
+
+    @server.route(path)
+    def _metrics():
+        if request.remote_addr not in LOCAL_ADDRS:
+            return "Not Found", 404
+        out = metrics.snapshot()
+        if extra is not None:
+            out.update(extra())
+        return jsonify(out)
@@ -0,0 +1,136 @@
+"""
+report.py — Headless summary report (no Dash, no Plotly)
+========================================================
+Computes the numbers behind the dashboard's "CHART DATA SUMMARY" for one or
+more price CSVs and writes them as JSON, CSV or Parquet. Only utils (pandas,
+numpy) is imported, so a nightly job starts in a fraction of run.py's time.
+
+    python report.py                                   # fruits.csv → JSON on stdout
+    python report.py data/*.csv --format csv --out reports/
+    python report.py a.csv b.csv --format parquet --out reports/ --timings
+
+Sections per file: stats, form_summary, best_value, cheapest, most_expensive,
+form_distribution, and household_<strategy> for every strategy. JSON output
+is one document keyed by file; CSV/Parquet write <out>/<file stem>/<section>.*
+"""
+
+import time
+
+_T0 = time.perf_counter()
+
+import argparse  # noqa: E402
+import json      # noqa: E402
+import os        # noqa: E402
+import sys       # noqa: E402
+
+import pandas as pd  # noqa: E402
+
+from utils import (  # noqa: E402
+    CSV_PATH, STRATEGIES, AnalysisContext, build_dataframe, detect_item_column,
+    load_dataframe,
+)
+
+_IMPORT_S = time.perf_counter() - _T0
+
+FORMATS = ("json", "csv", "parquet")
+
+
+def report_sections(df: pd.DataFrame, top: int = 15) -> dict:
+    """Every report section for one enriched frame: {name: DataFrame or dict}."""
+    ctx = AnalysisContext(df)
+    sections = {
+        "stats":             ctx.stats,
+        "form_summary":      ctx.form_summary,
+        "best_value":        ctx.best_value,
+        "cheapest":          ctx.cheapest(top),
+        "most_expensive":    ctx.most_expensive(top),
+        "form_distribution": ctx.form_dist,
+    }
+    for strategy in STRATEGIES:
+        sections[f"household_{strategy}"] = ctx.household(strategy)
+    return sections
+
+
+def _unique_stems(paths: list) -> list:
+    """File stems for output folders, suffixed -2, -3, … when two inputs collide."""
+    seen, stems = {}, []
+    for p in paths:
+        stem = os.path.splitext(os.path.basename(p))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        stems.append(stem if seen[stem] == 1 else f"{stem}-{seen[stem]}")
+    return stems
+
+
+def _as_frame(value) -> pd.DataFrame:
+    return pd.DataFrame([value]) if isinstance(value, dict) else value
+
+
+def _as_json(value):
+    if isinstance(value, dict):
+        return value
+    return json.loads(value.to_json(orient="records"))
+
+
+def write_tables(sections: dict, folder: str, fmt: str) -> None:
+    """Write each section to folder/<section>.csv or .parquet."""
+    os.makedirs(folder, exist_ok=True)
+    for name, value in sections.items():
+        frame = _as_frame(value)
+        path = os.path.join(folder, f"{name}.{fmt}")
+        if fmt == "csv":
+            frame.to_csv(path, index=False)
+        else:
+            frame.to_parquet(path, index=False)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Headless fruit-cost summary report.")
+    ap.add_argument("paths", nargs="*", default=[CSV_PATH], help="price CSVs (default: fruits.csv)")
+    ap.add_argument("--item-col", help="item column name (default: read from each header)")
+    ap.add_argument("--format", choices=FORMATS, default="json")
+    ap.add_argument("--out", help="output folder (JSON: file path; default stdout)")
+    ap.add_argument("--top", type=int, default=15, help="rows in the cheapest/most expensive lists")
+    ap.add_argument("--cache", action="store_true",
+                    help="load files through the Feather cache")
+    ap.add_argument("--timings", action="store_true", help="print timings to stderr")
+    args = ap.parse_args(argv)
+
+    if args.format != "json" and not args.out:
+        ap.error(f"--format {args.format} needs --out")
+
+    timings = {"import_s": round(_IMPORT_S, 4), "files": {}}
+    document = {}
+    for path, stem in zip(args.paths, _unique_stems(args.paths)):
+        t0 = time.perf_counter()
+        item = args.item_col or detect_item_column(path)
+        if args.cache:
+            df = load_dataframe(path, item_col=item)
+        else:
+            df = build_dataframe(path, item_col=item)
+        t1 = time.perf_counter()
+        sections = report_sections(df, args.top)
+        t2 = time.perf_counter()
+        if args.format == "json":
+            document[path] = {name: _as_json(v) for name, v in sections.items()}
+        else:
+            write_tables(sections, os.path.join(args.out, stem), args.format)
+        t3 = time.perf_counter()
+        timings["files"][path] = {"rows": len(df), "load_s": round(t1 - t0, 4),
+                                  "summaries_s": round(t2 - t1, 4), "write_s": round(t3 - t2, 4)}
+
+    if args.format == "json":
+        text = json.dumps(document, indent=2)
+        if args.out:
+            with open(args.out, "w") as fh:
+                fh.write(text + "\n")
+        else:
+            print(text)
+
+    if args.timings:
+        timings["total_s"] = round(time.perf_counter() - _T0, 4)
+        print(json.dumps(timings, indent=2), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
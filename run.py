@@ -1,201 +1,112 @@
 """
 run.py — U.S. Household Fruit Cost Dashboard
 """
+import json
+import os
+import threading
+
+import dash_ag_grid as dag
 import dash_mantine_components as dmc
-import plotly.express as px
-import plotly.graph_objects as go
-from dash import Dash, Input, Output, State, callback, dcc, html
+from dash import (
+    MATCH, Dash, Input, Output, State, callback, clientside_callback, dcc, html,
+    no_update,
+)
 from dash_iconify import DashIconify
 
-from utils import (
-    DAILY_CUPS_ADULT, DAYS_PER_YEAR, FORM_COLORS, HOUSEHOLD_SIZES,
-    best_value_per_base_fruit, build_dataframe, cheapest_items,
-    cost_summary_by_form, form_distribution, household_annual_budget,
-    most_expensive_items, price_range_stats,
-)
+from datasource import DataSource
+from figcache import FigureCache
+from metrics import Metrics, install
+from theme import CSS, page_style
+from utils import CSV_PATH, FORM_COLORS, STRATEGIES, AnalysisContext, load_dataframe
 
-df           = build_dataframe()
-stats        = price_range_stats(df)
-form_summary = cost_summary_by_form(df)
-best_value   = best_value_per_base_fruit(df)
-cheap_15     = cheapest_items(df, 15)
-exp_15       = most_expensive_items(df, 15)
-form_dist    = form_distribution(df)
+# Summaries are computed on first use and memoized by the context, so worker
+# startup only pays for loading the (cached) dataframe.
+ctx = AnalysisContext(load_dataframe())
 
 # ── PRINT DATA FOR CHARTS ───────────────────────────────────────────────────
-print("\n" + "="*80)
-print("CHART DATA SUMMARY")
-print("="*80)
-print(f"\n[PRICE STATS] min=${stats['min']}, max=${stats['max']}, mean=${stats['mean']}, median=${stats['median']}")
-print(f"\n[FORM SUMMARY]\n{form_summary.to_string()}")
-print(f"\n[BEST VALUE BY FRUIT]\n{best_value.to_string()}")
-print(f"\n[CHEAPEST 15 ITEMS]\n{cheap_15[['Fruit','Form','CupEquivalentPrice']].to_string()}")
-print(f"\n[MOST EXPENSIVE 15 ITEMS]\n{exp_15[['Fruit','Form','CupEquivalentPrice']].to_string()}")
-print(f"\n[FORM DISTRIBUTION]\n{form_dist.to_string()}")
-print(f"\n[HOUSEHOLD BUDGET - AVERAGE]\n{household_annual_budget(df, 'average').to_string()}")
-print(f"\n[HOUSEHOLD BUDGET - BUDGET]\n{household_annual_budget(df, 'budget').to_string()}")
-print(f"\n[HOUSEHOLD BUDGET - PREMIUM]\n{household_annual_budget(df, 'premium').to_string()}")
-print(f"\n[SCATTER DATA] rows={len(df)}, columns={df[['RetailPrice','CupEquivalentPrice','Yield','Form']].shape[1]}")
-print(f"\n[HEATMAP DATA] pivot shape={df.pivot_table(index='BaseFruit', columns='Form', values='CupEquivalentPrice', aggfunc='min').shape}")
-print("="*80 + "\n")
-
-LIGHT = {"bg":"#f3f8f5","surface":"#ffffff","surface2":"#eaf4ef","border":"#c8e0d4",
-         "text":"#0f1e16","sub":"#4d7060","primary":"#1a7f5a","accent":"#f59e0b",
-         "grid":"#ddeee5","header_grad":"linear-gradient(135deg,#0c3d27 0%,#1a7f5a 100%)"}
-DARK  = {"bg":"#0e1b14","surface":"#152319","surface2":"#1d3026","border":"#2a4535",
-         "text":"#e6f4ec","sub":"#7dab91","primary":"#2ed581","accent":"#fbbf24",
-         "grid":"#1e3a2a","header_grad":"linear-gradient(135deg,#061108 0%,#0f3d24 100%)"}
-
-FORM_COLORS_DARK = {"Fresh":"#2ed581","Canned":"#fb923c","Frozen":"#60a5fa",
-                    "Dried":"#c084fc","Juice":"#fde047"}
+def print_chart_summary():
+    df    = ctx.df
+    stats = ctx.stats
+    print("\n" + "="*80)
+    print("CHART DATA SUMMARY")
+    print("="*80)
+    print(f"\n[PRICE STATS] min=${stats['min']}, max=${stats['max']}, mean=${stats['mean']}, median=${stats['median']}")
+    print(f"\n[FORM SUMMARY]\n{ctx.form_summary.to_string()}")
+    print(f"\n[BEST VALUE BY FRUIT]\n{ctx.best_value.to_string()}")
+    print(f"\n[CHEAPEST 15 ITEMS]\n{ctx.cheapest(15)[['Fruit','Form','CupEquivalentPrice']].to_string()}")
+    print(f"\n[MOST EXPENSIVE 15 ITEMS]\n{ctx.most_expensive(15)[['Fruit','Form','CupEquivalentPrice']].to_string()}")
+    print(f"\n[FORM DISTRIBUTION]\n{ctx.form_dist.to_string()}")
+    print(f"\n[HOUSEHOLD BUDGET - AVERAGE]\n{ctx.household('average').to_string()}")
+    print(f"\n[HOUSEHOLD BUDGET - BUDGET]\n{ctx.household('budget').to_string()}")
+    print(f"\n[HOUSEHOLD BUDGET - PREMIUM]\n{ctx.household('premium').to_string()}")
+    print(f"\n[SCATTER DATA] rows={len(df)}, columns={df[['RetailPrice','CupEquivalentPrice','Yield','Form']].shape[1]}")
+    print(f"\n[HEATMAP DATA] pivot shape={ctx.price_index.shape}")
+    print("="*80 + "\n")
 
 PLOT_CONFIG = {"displayModeBar":True,
                "modeBarButtonsToRemove":["select2d","lasso2d","toImage"],
                "displaylogo":False}
 
-def tok(dark): return DARK if dark else LIGHT
-def fc(dark):  return FORM_COLORS_DARK if dark else FORM_COLORS
-
-def base_lo(t, title="", height=None):
-    lo = dict(paper_bgcolor=t["surface"], plot_bgcolor="rgba(0,0,0,0)",
-              font=dict(family="'DM Sans',sans-serif", color=t["text"], size=12),
-              margin=dict(l=10,r=10,t=44,b=10),
-              title=dict(text=title, font=dict(size=14,color=t["text"]), x=0.01,xanchor="left"),
-              legend=dict(bgcolor=t["surface2"],bordercolor=t["border"],borderwidth=1,
-                          font=dict(size=11,color=t["text"])))
-    if height: lo["height"]=height
-    return lo
-
-def fig_form_bars(dark):
-    t=tok(dark)
-    fig=go.Figure()
-    for col,label,color in [("Annual_Min","Best-case","#48aa68"),
-                              ("Annual_Avg","Typical",t["primary"]),
-                              ("Annual_Max","Worst-case","#e05252")]:
-        fig.add_trace(go.Bar(name=label, x=form_summary["Form"], y=form_summary[col],
-                             marker_color=color, marker_line_width=0,
-                             hovertemplate="<b>%{x}</b><br>"+label+": <b>$%{y:,.2f}</b>/yr<extra></extra>"))
-    fig.update_layout(**base_lo(t,"Annual Per-Person Cost by Form"), barmode="group")
-    fig.update_yaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
-    fig.update_xaxes(color=t["sub"])
-    return fig
-
-def fig_strip(dark):
-    t=tok(dark)
-    fig=px.strip(df,x="Form",y="CupEquivalentPrice",color="Form",hover_name="Fruit",
-                 color_discrete_map=fc(dark),
-                 labels={"CupEquivalentPrice":"$/cup-equiv.","Form":""},
-                 title="Price Distribution by Form")
-    fig.update_traces(jitter=0.4,marker=dict(size=9,opacity=0.8,
-                      line=dict(width=1,color=t["surface"])),
-                      hovertemplate="<b>%{hovertext}</b><br>$%{y:.4f}/cup<extra></extra>")
-    fig.update_layout(**base_lo(t,"Price Distribution by Form"))
-    fig.update_yaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
-    fig.update_xaxes(color=t["sub"])
-    return fig
-
-
-def fig_cheapest(dark):
-    t=tok(dark)
-    fig=px.bar(cheap_15,x="CupEquivalentPrice",y="Fruit",orientation="h",color="Form",
-               color_discrete_map=fc(dark),text="CupEquivalentPrice",
-               labels={"CupEquivalentPrice":"$/cup","Fruit":""},
-               title="15 Most Affordable (per Cup-Equivalent)")
-    fig.update_traces(texttemplate="$%{text:.3f}",textposition="outside",marker_line_width=0,
-                      hovertemplate="<b>%{y}</b><br>$%{x:.4f}/cup<extra></extra>")
-    fig.update_layout(**base_lo(t,"15 Most Affordable (per Cup-Equivalent)",height=490))
-    fig.update_xaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
-    fig.update_yaxes(color=t["sub"],categoryorder="total ascending")
-    return fig
-
-def fig_expensive(dark):
-    t=tok(dark)
-    fig=px.bar(exp_15,x="CupEquivalentPrice",y="Fruit",orientation="h",color="Form",
-               color_discrete_map=fc(dark),text="CupEquivalentPrice",
-               labels={"CupEquivalentPrice":"$/cup","Fruit":""},
-               title="15 Most Expensive (per Cup-Equivalent)")
-    fig.update_traces(texttemplate="$%{text:.3f}",textposition="outside",marker_line_width=0,
-                      hovertemplate="<b>%{y}</b><br>$%{x:.4f}/cup<extra></extra>")
-    fig.update_layout(**base_lo(t,"15 Most Expensive (per Cup-Equivalent)",height=490))
-    fig.update_xaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
-    fig.update_yaxes(color=t["sub"],categoryorder="total descending")
-    return fig
-
-def fig_household(strategy,dark):
-    t=tok(dark)
-    hh=household_annual_budget(df,strategy)
-    fig=go.Figure()
-    bars=[("Annual","Annual_Cost",t["primary"]),
-          ("Monthly","Monthly_Cost","#48aa68" if not dark else "#2ed581"),
-          ("Weekly","Weekly_Cost",t["accent"])]
-    for label,col,color in bars:
-        fig.add_trace(go.Bar(name=label,x=hh["Household"],y=hh[col],
-                             marker_color=color,marker_line_width=0,
-                             hovertemplate=f"<b>%{{x}}</b><br>{label}: <b>${{y:,.2f}}</b><extra></extra>"))
-    title_map={"budget":"Budget Mix (Cheapest 25%)","average":"Average Mix (Median)",
-               "premium":"Premium Mix (Costliest 25%)"}
-    fig.update_layout(**base_lo(t,f"Household Fruit Cost — {title_map[strategy]}"),barmode="group")
-    fig.update_yaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
-    fig.update_xaxes(color=t["sub"])
-    return fig
-
-def fig_donut(dark):
-    t=tok(dark)
-    colors=[fc(dark).get(f,"#888") for f in form_dist["Form"]]
-    fig=go.Figure(go.Pie(labels=form_dist["Form"],values=form_dist["Count"],hole=0.6,
-                         marker=dict(colors=colors,line=dict(color=t["surface"],width=3)),
-                         textinfo="label+percent",
-                         hovertemplate="<b>%{label}</b><br>%{value} items (%{percent})<extra></extra>"))
-    fig.update_layout(**base_lo(t,"Dataset Composition by Form"),showlegend=False)
-    return fig
-
-def fig_violin(dark):
-    t=tok(dark)
-    fig=go.Figure()
-    for form in df["Form"].unique():
-        sub=df[df["Form"]==form]
-        fig.add_trace(go.Violin(x=[form]*len(sub),y=sub["Annual_Cost"],name=form,
-                                fillcolor=fc(dark).get(form,"#888"),line_color=t["border"],
-                                box_visible=True,meanline_visible=True,
-                                hovertemplate="<b>%{x}</b><br>Annual: $%{y:,.2f}<extra></extra>"))
-    fig.update_layout(**base_lo(t,"Annual Cost Distribution (1 Person) by Form"))
-    fig.update_yaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
-    fig.update_xaxes(color=t["sub"])
-    return fig
-
-def fig_scatter(dark):
-    t=tok(dark)
-    fig=px.scatter(df,x="RetailPrice",y="CupEquivalentPrice",color="Form",
-                   size="Yield",hover_name="Fruit",color_discrete_map=fc(dark),
-                   labels={"RetailPrice":"Retail Price ($/lb or $/pint)",
-                           "CupEquivalentPrice":"Cup-Equivalent Price ($)","Yield":"Yield"},
-                   title="Retail Price vs Cup-Equivalent Price")
-    fig.update_traces(marker=dict(opacity=0.82,line=dict(width=1,color=t["surface"])),
-                      hovertemplate="<b>%{hovertext}</b><br>Retail: $%{x:.4f}<br>Cup: $%{y:.4f}<extra></extra>")
-    fig.update_layout(**base_lo(t,"Retail Price vs Cup-Equivalent Price"))
-    fig.update_yaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
-    fig.update_xaxes(gridcolor=t["grid"],tickprefix="$",color=t["sub"])
-    return fig
-
-def fig_heatmap(dark):
-    t=tok(dark)
-    pivot=df.pivot_table(index="BaseFruit",columns="Form",values="CupEquivalentPrice",aggfunc="min")
-    cs=[[0,"#084d36"],[0.5,"#48aa68"],[1,"#fef9c3"]] if not dark else \
-       [[0,"#052810"],[0.5,"#1a7f5a"],[1,"#fefce8"]]
-    fig=go.Figure(go.Heatmap(z=pivot.values,x=pivot.columns.tolist(),y=pivot.index.tolist(),
-                              colorscale=cs,hoverongaps=False,
-                              hovertemplate="<b>%{y}</b> — %{x}<br>$%{z:.4f}/cup<extra></extra>",
-                              colorbar=dict(title="$/cup",tickprefix="$",
-                                            tickfont=dict(color=t["sub"]),
-                                           )))
-    fig.update_layout(**base_lo(t,"Cup Price Heatmap: Fruit × Form",height=900))
-    fig.update_yaxes(tickfont=dict(size=10),color=t["sub"])
-    fig.update_xaxes(color=t["sub"])
-    return fig
+
+# ── FIGURE CACHE ────────────────────────────────────────────
+# The builders live in figures.py, imported on the first cache miss so plotly
+# stays off the startup path.
+metrics = Metrics()
+
+def _record_build(key,nbytes,build_s,serialize_s):
+    metrics.record("figure",f"fig_{key[0]}",bytes=nbytes,compute_s=build_s,serialize_s=serialize_s)
+
+figure_cache = FigureCache(maxsize=64,on_build=_record_build)
+
+def figure(name,dark,strategy=None):
+    """Serialized figure from the cache, built on a miss. The figure is built
+    from a snapshot of ctx and cached under that snapshot's version, so a
+    render that straddles a reload never caches a stale figure."""
+    dark=bool(dark)
+    strategy=strategy if name=="household" else None
+    snap=ctx.snapshot()
+    def build():
+        from figures import build_figure
+        return build_figure(name,snap,dark,strategy)
+    return figure_cache.get_or_build((name,dark,strategy,snap.version),build)
+
+def warm_figure_cache():
+    """Build every figure for both themes (and every household strategy)."""
+    from figures import FIGURES
+    for dark in (False,True):
+        for name in FIGURES:
+            if name=="household":
+                for s in STRATEGIES: figure(name,dark,s)
+            else:
+                figure(name,dark)
+
+def reload_data(df):
+    """Swap in a new enriched frame and evict everything derived from the old one.
+    Summaries are computed before the swap, so callbacks never wait on them."""
+    ctx.set_data(df,warm=True)
+    figure_cache.clear()
+
+# ── HOT RELOAD ──────────────────────────────────────────────
+# Each server polls the CSV every FRUITS_RELOAD_INTERVAL seconds (0 disables)
+# and rebuilds in a background thread; requests keep using the old data until
+# the swap, and the figures are re-warmed right after it. The watcher is
+# started by start_watcher() (from __main__, or create_server() under a WSGI
+# server), never on import, so tools that import run get no background thread.
+def _on_new_data(df):
+    reload_data(df)
+    warm_figure_cache()
+
+source = DataSource([CSV_PATH], load_dataframe,
+                    interval=float(os.environ.get("FRUITS_RELOAD_INTERVAL", "5")))
+source.subscribe(_on_new_data)
+
+def start_watcher():
+    if source.interval>0:
+        source.start()
 
 # ── UI HELPERS ──────────────────────────────────────────────
-def kpi(label,value,sub,icon,color,dark):
-    t=tok(dark)
+def kpi(label,value,sub,icon,color):
+    t=CSS
     return dmc.Paper(radius="md",p="md",shadow="sm",
                      style={"background":t["surface"],"borderLeft":f"4px solid {color}",
                             "border":f"1px solid {t['border']}"},
@@ -231,14 +142,14 @@ def _td(val,t,bold=False,mono=False,color=None):
     if bold: s["fontWeight"]=700
     return dmc.TableTd(dmc.Text(val,size="sm",style=s))
 
-def fbadge(form,dark):
+def fbadge(form):
     cm={"Fresh":"teal","Canned":"orange","Frozen":"blue","Dried":"violet","Juice":"yellow"}
     return dmc.Badge(form,color=cm.get(form,"gray"),
-                     variant="light" if not dark else "filled",size="xs")
+                     variant="light",size="xs")
 
-def hh_rows(strategy,dark):
-    t=tok(dark)
-    hh=household_annual_budget(df,strategy)
+def hh_rows(strategy):
+    t=CSS
+    hh=ctx.household(strategy)
     return [dmc.TableTr([_td(r["Household"],t,bold=True),
                           _td(f"${r['Daily_Cost']:.2f}",t,mono=True),
                           _td(f"${r['Weekly_Cost']:.2f}",t,mono=True),
@@ -246,30 +157,41 @@ def hh_rows(strategy,dark):
                           _td(f"${r['Annual_Cost']:,.2f}",t,mono=True,bold=True,color=t["primary"])])
             for _,r in hh.iterrows()]
 
-def full_table(dark):
-    t=tok(dark)
-    rows=[dmc.TableTr([
-        _td(r["Fruit"],t,bold=True),
-        dmc.TableTd(fbadge(r["Form"],dark),
-                    style={"padding":"7px 12px","borderBottom":f"1px solid {t['border']}"}),
-        _td(f"${r['RetailPrice']:.4f}",t,mono=True),
-        _td(r["RetailPriceUnit"],t),
-        _td(f"{r['Yield']:.2f}",t,mono=True),
-        _td(f"${r['CupEquivalentPrice']:.4f}",t,mono=True,bold=True,color=t["primary"]),
-        _td(f"${r['Annual_Cost']:,.2f}",t,mono=True,color=t["accent"]),
-    ]) for _,r in df.sort_values("CupEquivalentPrice").iterrows()]
-    return dmc.ScrollArea(h=480,children=dmc.Table(striped=True,highlightOnHover=True,
-        style={"fontSize":"0.82rem"},children=[
-            dmc.TableThead(dmc.TableTr([_th(h,t) for h in
-                ["Fruit","Form","Retail Price","Unit","Yield","$/Cup","Annual/Person"]])),
-            dmc.TableTbody(rows)]))
-
-def bv_table(dark):
-    t=tok(dark)
-    bv=best_value.sort_values("CupEquivalentPrice")
+# Only the rows AG Grid asks for (one cache block) are sent; sorting,
+# filtering, and paging happen in pandas via ctx.query_rows().
+GRID_COLUMNS = [
+    {"field":"Fruit","headerName":"Fruit","filter":"agTextColumnFilter","minWidth":220,
+     "cellStyle":{"fontWeight":700}},
+    {"field":"Form","headerName":"Form","filter":"agTextColumnFilter"},
+    {"field":"RetailPrice","headerName":"Retail Price","filter":"agNumberColumnFilter",
+     "valueFormatter":{"function":"d3.format('$.4f')(params.value)"}},
+    {"field":"RetailPriceUnit","headerName":"Unit","filter":"agTextColumnFilter"},
+    {"field":"Yield","headerName":"Yield","filter":"agNumberColumnFilter",
+     "valueFormatter":{"function":"d3.format('.2f')(params.value)"}},
+    {"field":"CupEquivalentPrice","headerName":"$/Cup","filter":"agNumberColumnFilter","sort":"asc",
+     "valueFormatter":{"function":"d3.format('$.4f')(params.value)"},
+     "cellStyle":{"fontWeight":700,"color":CSS["primary"]}},
+    {"field":"Annual_Cost","headerName":"Annual/Person","filter":"agNumberColumnFilter",
+     "valueFormatter":{"function":"d3.format('$,.2f')(params.value)"},
+     "cellStyle":{"color":CSS["accent"]}},
+]
+GRID_PAGE_SIZE = 50
+
+def data_grid():
+    return dag.AgGrid(id="data-grid",rowModelType="infinite",columnDefs=GRID_COLUMNS,
+                      defaultColDef={"sortable":True,"resizable":True,"flex":1,
+                                     "filterParams":{"maxNumConditions":2}},
+                      dashGridOptions={"pagination":True,"paginationPageSize":GRID_PAGE_SIZE,
+                                       "cacheBlockSize":GRID_PAGE_SIZE,"maxBlocksInCache":10,
+                                       "rowBuffer":0},
+                      className="ag-theme-alpine",style={"height":480})
+
+def bv_table():
+    t=CSS
+    bv=ctx.best_value.sort_values("CupEquivalentPrice")
     rows=[dmc.TableTr([
         _td(r["BaseFruit"],t,bold=True),
-        dmc.TableTd(fbadge(r["Form"],dark),
+        dmc.TableTd(fbadge(r["Form"]),
                     style={"padding":"6px 10px","borderBottom":f"1px solid {t['border']}"}),
         _td(f"${r['CupEquivalentPrice']:.4f}",t,mono=True,bold=True,color=t["primary"]),
     ]) for _,r in bv.iterrows()]
@@ -284,87 +206,110 @@ app = Dash(__name__, title="FruitBudget Analytics",
            external_stylesheets=[
                "https://fonts.googleapis.com/css2?family=DM+Sans:wght@400;500;600;700;800;900&display=swap"])
 
-app.layout = dmc.MantineProvider(
-    id="mantine-provider",
-    defaultColorScheme="light",
-    theme={"primaryColor":"green","fontFamily":"'DM Sans',sans-serif","defaultRadius":"md"},
-    children=[
-        html.Link(rel="stylesheet",
-                  href="https://fonts.googleapis.com/css2?family=DM+Sans:wght@400;500;600;700;800;900&display=swap"),
-        dcc.Store(id="dark-store", data=False),
-        dcc.Store(id="strategy-store", data="average"),
-
-        dmc.Box(id="page-wrap", style={"background":LIGHT["bg"],"minHeight":"100vh"},children=[
-
-            # HEADER
-            dmc.Box(id="hdr",style={"background":LIGHT["header_grad"],"padding":"32px 0 24px"},children=[
-                dmc.Container(size="xl",children=[
-                    dmc.Group(justify="space-between",align="flex-start",children=[
-                        dmc.Stack(gap=6,children=[
-                            dmc.Group(gap="sm",align="center",children=[
-                                DashIconify(icon="twemoji:green-apple",width=36),
-                                dmc.Text("FruitBudget Analytics",
-                                         style={"fontSize":"1.85rem","fontWeight":900,
-                                                "color":"white","letterSpacing":"-0.02em"}),
+def serve_layout():
+    """Page layout, rebuilt per page load so a data reload shows up on refresh."""
+    return dmc.MantineProvider(
+        id="mantine-provider",
+        defaultColorScheme="light",
+        theme={"primaryColor":"green","fontFamily":"'DM Sans',sans-serif","defaultRadius":"md"},
+        children=[
+            html.Link(rel="stylesheet",
+                      href="https://fonts.googleapis.com/css2?family=DM+Sans:wght@400;500;600;700;800;900&display=swap"),
+            dcc.Store(id="dark-store", data=False),
+            dcc.Store(id="strategy-store", data="average"),
+
+            dmc.Box(id="page-wrap", style=page_style(False),children=[
+
+                # HEADER
+                dmc.Box(id="hdr",style={"background":CSS["header_grad"],"padding":"32px 0 24px"},children=[
+                    dmc.Container(size="xl",children=[
+                        dmc.Group(justify="space-between",align="flex-start",children=[
+                            dmc.Stack(gap=6,children=[
+                                dmc.Group(gap="sm",align="center",children=[
+                                    DashIconify(icon="twemoji:green-apple",width=36),
+                                    dmc.Text("FruitBudget Analytics",
+                                             style={"fontSize":"1.85rem","fontWeight":900,
+                                                    "color":"white","letterSpacing":"-0.02em"}),
+                                ]),
+                                dmc.Text("How much do U.S. households spend to meet fruit intake recommendations?",
+                                         style={"color":"rgba(255,255,255,0.75)","maxWidth":620,"fontSize":"0.9rem"}),
+                                dmc.Group(gap="xs",mt=4,children=[
+                                    dmc.Badge("USDA ERS Data",color="lime",variant="filled",radius="xl",size="sm"),
+                                    dmc.Badge(f"{len(ctx.df)} Fruit Items",color="teal",variant="light",radius="xl",size="sm"),
+                                    dmc.Badge("1.5 cups/day Recommended",color="green",variant="light",radius="xl",size="sm"),
+                                ]),
                             ]),
-                            dmc.Text("How much do U.S. households spend to meet fruit intake recommendations?",
-                                     style={"color":"rgba(255,255,255,0.75)","maxWidth":620,"fontSize":"0.9rem"}),
-                            dmc.Group(gap="xs",mt=4,children=[
-                                dmc.Badge("USDA ERS Data",color="lime",variant="filled",radius="xl",size="sm"),
-                                dmc.Badge(f"{len(df)} Fruit Items",color="teal",variant="light",radius="xl",size="sm"),
-                                dmc.Badge("1.5 cups/day Recommended",color="green",variant="light",radius="xl",size="sm"),
+                            dmc.Stack(gap=4,align="center",children=[
+                                dmc.Tooltip(label="Toggle light / dark mode",children=
+                                    dmc.ActionIcon(DashIconify(icon="ph:moon-stars-bold",width=20,id="theme-icon"),
+                                                   id="theme-btn",variant="light",color="green",size="lg",radius="xl")),
+                                dmc.Text("Dark mode",size="xs",style={"color":"rgba(255,255,255,0.6)"}),
                             ]),
                         ]),
-                        dmc.Stack(gap=4,align="center",children=[
-                            dmc.Tooltip(label="Toggle light / dark mode",children=
-                                dmc.ActionIcon(DashIconify(icon="ph:moon-stars-bold",width=20,id="theme-icon"),
-                                               id="theme-btn",variant="light",color="green",size="lg",radius="xl")),
-                            dmc.Text("Dark mode",size="xs",style={"color":"rgba(255,255,255,0.6)"}),
-                        ]),
                     ]),
                 ]),
-            ]),
 
-            # STICKY NAV
-            dmc.Box(id="nav-box",
-                    style={"background":LIGHT["surface"],
-                           "borderBottom":f"1px solid {LIGHT['border']}",
-                           "position":"sticky","top":0,"zIndex":100},
-                    children=[dmc.Container(size="xl",children=[
-                        dmc.Tabs(id="tabs",value="overview",children=[
-                            dmc.TabsList([
-                                dmc.TabsTab("Overview",   value="overview",
-                                            leftSection=DashIconify(icon="mdi:chart-bar",width=15)),
-                                dmc.TabsTab("By Form",    value="byform",
-                                            leftSection=DashIconify(icon="mdi:shape-outline",width=15)),
-                                dmc.TabsTab("Households", value="households",
-                                            leftSection=DashIconify(icon="mdi:account-group",width=15)),
-                                dmc.TabsTab("Explorer",   value="explorer",
-                                            leftSection=DashIconify(icon="mdi:table-search",width=15)),
-                                dmc.TabsTab("Heatmap",    value="heatmap",
-                                            leftSection=DashIconify(icon="mdi:grid",width=15)),
+                # STICKY NAV
+                dmc.Box(id="nav-box",
+                        style={"background":CSS["surface"],
+                               "borderBottom":f"1px solid {CSS['border']}",
+                               "position":"sticky","top":0,"zIndex":100},
+                        children=[dmc.Container(size="xl",children=[
+                            dmc.Tabs(id="tabs",value="overview",children=[
+                                dmc.TabsList([
+                                    dmc.TabsTab("Overview",   value="overview",
+                                                leftSection=DashIconify(icon="mdi:chart-bar",width=15)),
+                                    dmc.TabsTab("By Form",    value="byform",
+                                                leftSection=DashIconify(icon="mdi:shape-outline",width=15)),
+                                    dmc.TabsTab("Households", value="households",
+                                                leftSection=DashIconify(icon="mdi:account-group",width=15)),
+                                    dmc.TabsTab("Explorer",   value="explorer",
+                                                leftSection=DashIconify(icon="mdi:table-search",width=15)),
+                                    dmc.TabsTab("Heatmap",    value="heatmap",
+                                                leftSection=DashIconify(icon="mdi:grid",width=15)),
+                                ]),
                             ]),
-                        ]),
-                    ])]),
-
-            # CONTENT
-            dmc.Container(size="xl",p="xl",children=[html.Div(id="tab-content")]),
-
-            # FOOTER
-            dmc.Box(id="ftr",
-                    style={"borderTop":f"1px solid {LIGHT['border']}","padding":"18px 0","marginTop":"16px"},
-                    children=[dmc.Container(size="xl",children=[
-                        dmc.Text("Source: USDA ERS Fruit & Vegetable Prices Dataset  •  "
-                                 "Recommendation: 1.5 cups/day (USDA Dietary Guidelines 2020–2025)  •  "
-                                 "Annual cost = daily cups × $/cup × 365",
-                                 size="xs",c="dimmed",ta="center"),
-                    ])]),
-        ]),
-    ],
-)
+                        ])]),
+
+                # CONTENT
+                dmc.Container(size="xl",p="xl",children=[html.Div(id="tab-content")]),
+
+                # FOOTER
+                dmc.Box(id="ftr",
+                        style={"borderTop":f"1px solid {CSS['border']}","padding":"18px 0","marginTop":"16px"},
+                        children=[dmc.Container(size="xl",children=[
+                            dmc.Text("Source: USDA ERS Fruit & Vegetable Prices Dataset  •  "
+                                     "Recommendation: 1.5 cups/day (USDA Dietary Guidelines 2020–2025)  •  "
+                                     "Annual cost = daily cups × $/cup × 365",
+                                     size="xs",c="dimmed",ta="center"),
+                        ])]),
+            ]),
+        ],
+    )
+
+app.layout = serve_layout
+
+def create_server():
+    """WSGI entry point with hot reload, e.g. gunicorn "run:create_server()"."""
+    start_watcher()
+    return app.server
+
+# ── COMPRESSION & METRICS ───────────────────────────────────
+# JSON/HTML responses are gzipped; per-callback and per-figure sizes and
+# timings are served to local clients on /metrics.
+install(app.server,metrics,extra=lambda:{"figure_cache":figure_cache.stats(),
+                                         "data":{"rows":len(ctx.df),"version":ctx.version}})
 
 # ── DARK MODE TOGGLE ────────────────────────────────────────
-@callback(
+# Runs in the browser: flips the store, the Mantine scheme, the icon, and the
+# CSS variables on #page-wrap. No server round trip and no layout re-render.
+clientside_callback(
+    """
+    function(n, dark) {
+        const nd = !dark;
+        return [nd, nd ? "dark" : "light", nd ? "ph:sun-bold" : "ph:moon-stars-bold"];
+    }
+    """,
     Output("dark-store",       "data"),
     Output("mantine-provider", "forceColorScheme"),
     Output("theme-icon",       "icon"),
@@ -372,30 +317,96 @@ app.layout = dmc.MantineProvider(
     State("dark-store",        "data"),
     prevent_initial_call=True,
 )
-def toggle_dark(n,dark):
-    nd = not dark
-    return nd, ("dark" if nd else "light"), ("ph:sun-bold" if nd else "ph:moon-stars-bold")
+
+clientside_callback(
+    "function(dark) { return (%s)[dark ? 1 : 0]; }"
+    % json.dumps([page_style(False), page_style(True)]),
+    Output("page-wrap","style"),
+    Input("dark-store","data"),
+    prevent_initial_call=True,
+)
+
+# ── FIGURES ─────────────────────────────────────────────────
+# Graphs are rendered empty by render() and filled here, so a theme toggle
+# only re-sends figures (from figure_cache), never the surrounding layout.
+def graph(name):
+    return dcc.Graph(id={"type":"fig","name":name},config=PLOT_CONFIG)
+
+@callback(
+    Output({"type":"fig","name":MATCH},"figure"),
+    Input("dark-store","data"),
+    State({"type":"fig","name":MATCH},"id"),
+)
+@metrics.timed(lambda dark,gid:f"update_figure[{gid['name']}]")
+def update_figure(dark, gid):
+    return figure(gid["name"],dark)
+
+@callback(
+    Output("hh-graph","figure"),
+    Input("dark-store","data"),
+    Input("strategy-store","data"),
+)
+@metrics.timed("update_household_figure")
+def update_household_figure(dark, strategy):
+    return figure("household",dark,strategy)
+
+# ── HOUSEHOLD STRATEGY ──────────────────────────────────────
+def hh_cards(strategy):
+    t=CSS
+    return [dmc.Paper(radius="md",p="md",
+                      style={"background":t["surface2"],"border":f"1px solid {t['border']}",
+                             "textAlign":"center"},
+                      children=[
+                          dmc.Text(r["Household"],size="xs",fw=700,c="dimmed"),
+                          dmc.Text(f"${r['Annual_Cost']:,.0f}",size="xl",fw=900,
+                                   style={"color":t["primary"],"fontVariantNumeric":"tabular-nums"}),
+                          dmc.Text("per year",size="xs",c="dimmed"),
+                          dmc.Text(f"${r['Monthly_Cost']:.2f}/mo",size="sm",fw=600,
+                                   style={"color":t["accent"]}),
+                      ])
+            for _,r in ctx.household(strategy).iterrows()]
+
+@callback(
+    Output("hh-cards","children"),
+    Output("hh-body","children"),
+    Input("strategy-store","data"),
+)
+@metrics.timed("update_household")
+def update_household(strategy):
+    return hh_cards(strategy), hh_rows(strategy)
+
+# ── DATA GRID ───────────────────────────────────────────────
+@callback(
+    Output("data-grid","getRowsResponse"),
+    Input("data-grid","getRowsRequest"),
+    prevent_initial_call=True,
+)
+@metrics.timed("grid_rows")
+def grid_rows(req):
+    if not req:
+        return no_update
+    rows,total=ctx.query_rows(req["startRow"],req["endRow"],
+                              req.get("sortModel"),req.get("filterModel"))
+    cols=[c["field"] for c in GRID_COLUMNS]
+    return {"rowData":rows[cols].to_dict("records"),"rowCount":total}
+
+clientside_callback(
+    "function(dark) { return dark ? 'ag-theme-alpine-dark' : 'ag-theme-alpine'; }",
+    Output("data-grid","className"),
+    Input("dark-store","data"),
+)
 
 # ── RENDER TABS ─────────────────────────────────────────────
 @callback(
     Output("tab-content","children"),
-    Output("page-wrap","style"),
-    Output("hdr","style"),
-    Output("nav-box","style"),
-    Output("ftr","style"),
     Input("tabs","value"),
-    Input("dark-store","data"),
-    Input("strategy-store","data"),
+    State("strategy-store","data"),
 )
-def render(tab, dark, strategy):
-    t = tok(dark)
-    pw  = {"background":t["bg"],"minHeight":"100vh","transition":"background 0.3s"}
-    hdr = {"background":t["header_grad"],"padding":"32px 0 24px"}
-    nav = {"background":t["surface"],"borderBottom":f"1px solid {t['border']}",
-           "position":"sticky","top":0,"zIndex":100}
-    ftr = {"borderTop":f"1px solid {t['border']}","padding":"18px 0","marginTop":"16px"}
-
-    hh_avg = household_annual_budget(df,"average")
+@metrics.timed(lambda tab,strategy:f"render[{tab}]")
+def render(tab, strategy):
+    t = CSS
+    stats  = ctx.stats
+    hh_avg = ctx.household("average")
     s1  = hh_avg.loc[hh_avg["Members"]==1,"Annual_Cost"].values[0]
     s4  = hh_avg.loc[hh_avg["Members"]==4,"Annual_Cost"].values[0]
 
@@ -404,13 +415,13 @@ def render(tab, dark, strategy):
         content = dmc.Stack(gap="lg",children=[
             dmc.SimpleGrid(cols={"base":1,"sm":2,"lg":4},spacing="md",children=[
                 kpi("Median $/Cup-Equiv.",f"${stats['median']:.4f}",
-                    "Across all 62 items","mdi:fruit-watermelon",t["primary"],dark),
+                    "Across all 62 items","mdi:fruit-watermelon",t["primary"]),
                 kpi("Cheapest Item",f"${stats['min']:.4f}",
-                    "Watermelon (fresh)","mdi:arrow-down-circle","#2d8b6e",dark),
+                    "Watermelon (fresh)","mdi:arrow-down-circle","#2d8b6e"),
                 kpi("Single Adult / Year",f"${s1:,.2f}",
-                    "Median mix · 1.5 cups/day","mdi:account",t["accent"],dark),
+                    "Median mix · 1.5 cups/day","mdi:account",t["accent"]),
                 kpi("Family of 4 / Year",f"${s4:,.2f}",
-                    "Median mix · 1.5 cups/day","mdi:account-group","#e07b39",dark),
+                    "Median mix · 1.5 cups/day","mdi:account-group","#e07b39"),
             ]),
             dmc.Alert(
                 dmc.Stack(gap=2,children=[
@@ -420,25 +431,25 @@ def render(tab, dark, strategy):
                         f"a single adult needs only ${s1/365:.2f}/day to meet the USDA recommended "
                         f"1.5 cups of fruit. A family of four spends ~${s4/12:.2f}/month. "
                         f"Juice forms offer the lowest average annual cost "
-                        f"(${form_summary.loc[form_summary['Form']=='Juice','Annual_Avg'].values[0]:,.2f}/yr), "
+                        f"(${ctx.form_summary.loc[ctx.form_summary['Form']=='Juice','Annual_Avg'].values[0]:,.2f}/yr), "
                         f"while canned items show the widest price range.",size="sm")]),
-                color="green",variant="light" if not dark else "filled",
+                color="green",variant="light",
                 icon=DashIconify(icon="mdi:lightbulb-on",width=20)),
             dmc.SimpleGrid(cols={"base":1,"lg":2},spacing="md",children=[
                 dmc.Paper(radius="md",p="lg",shadow="sm",
                           style={"background":t["surface"],"border":f"1px solid {t['border']}"},
-                          children=[dcc.Graph(figure=fig_form_bars(dark),config=PLOT_CONFIG)]),
+                          children=[graph("form_bars")]),
                 dmc.Paper(radius="md",p="lg",shadow="sm",
                           style={"background":t["surface"],"border":f"1px solid {t['border']}"},
-                          children=[dcc.Graph(figure=fig_strip(dark),config=PLOT_CONFIG)]),
+                          children=[graph("strip")]),
             ]),
             dmc.SimpleGrid(cols={"base":1,"lg":2},spacing="md",children=[
                 dmc.Paper(radius="md",p="lg",shadow="sm",
                           style={"background":t["surface"],"border":f"1px solid {t['border']}"},
-                          children=[dcc.Graph(figure=fig_cheapest(dark),config=PLOT_CONFIG)]),
+                          children=[graph("cheapest")]),
                 dmc.Paper(radius="md",p="lg",shadow="sm",
                           style={"background":t["surface"],"border":f"1px solid {t['border']}"},
-                          children=[dcc.Graph(figure=fig_expensive(dark),config=PLOT_CONFIG)]),
+                          children=[graph("expensive")]),
             ]),
         ])
 
@@ -473,24 +484,23 @@ def render(tab, dark, strategy):
                               ]),
                               dmc.Text(f"{int(r['Count'])} items",size="xs",c="dimmed",mt=2),
                           ])])
-                for _,r in form_summary.iterrows()
+                for _,r in ctx.form_summary.iterrows()
             ]),
             dmc.SimpleGrid(cols={"base":1,"lg":2},spacing="md",children=[
                 dmc.Paper(radius="md",p="lg",shadow="sm",
                           style={"background":t["surface"],"border":f"1px solid {t['border']}"},
-                          children=[dcc.Graph(figure=fig_violin(dark),config=PLOT_CONFIG)]),
+                          children=[graph("violin")]),
                 dmc.Paper(radius="md",p="lg",shadow="sm",
                           style={"background":t["surface"],"border":f"1px solid {t['border']}"},
-                          children=[dcc.Graph(figure=fig_donut(dark),config=PLOT_CONFIG)]),
+                          children=[graph("donut")]),
             ]),
             dmc.Paper(radius="md",p="lg",shadow="sm",
                       style={"background":t["surface"],"border":f"1px solid {t['border']}"},
-                      children=[dcc.Graph(figure=fig_scatter(dark),config=PLOT_CONFIG)]),
+                      children=[graph("scatter")]),
         ])
 
     # ── HOUSEHOLDS ────────────────────────────────────────────
     elif tab == "households":
-        hh=household_annual_budget(df,strategy)
         content = dmc.Stack(gap="lg",children=[
             sec_hdr("Household Budget Projections",
                     "Estimate annual fruit spending for different household sizes and shopping strategies.",t),
@@ -500,9 +510,9 @@ def render(tab, dark, strategy):
                           dmc.Stack(gap=2,children=[
                               dmc.Text("Shopping Strategy",fw=700,size="md",style={"color":t["text"]}),
                               dmc.Text(
-                                  f"Budget ≈ ${household_annual_budget(df,'budget')['PricePerCup'].iloc[0]:.4f}/cup  ·  "
-                                  f"Average ≈ ${household_annual_budget(df,'average')['PricePerCup'].iloc[0]:.4f}/cup  ·  "
-                                  f"Premium ≈ ${household_annual_budget(df,'premium')['PricePerCup'].iloc[0]:.4f}/cup",
+                                  f"Budget ≈ ${ctx.reference_prices['budget']:.4f}/cup  ·  "
+                                  f"Average ≈ ${ctx.reference_prices['average']:.4f}/cup  ·  "
+                                  f"Premium ≈ ${ctx.reference_prices['premium']:.4f}/cup",
                                   size="xs",c="dimmed"),
                           ]),
                           dmc.SegmentedControl(id="strategy-ctrl",value=strategy,
@@ -511,23 +521,10 @@ def render(tab, dark, strategy):
                                     {"label":"🌟 Premium","value":"premium"}],
                               color="green",size="md"),
                       ])]),
-            dmc.SimpleGrid(cols={"base":2,"sm":3,"lg":5},spacing="sm",children=[
-                dmc.Paper(radius="md",p="md",
-                          style={"background":t["surface2"],"border":f"1px solid {t['border']}",
-                                 "textAlign":"center"},
-                          children=[
-                              dmc.Text(r["Household"],size="xs",fw=700,c="dimmed"),
-                              dmc.Text(f"${r['Annual_Cost']:,.0f}",size="xl",fw=900,
-                                       style={"color":t["primary"],"fontVariantNumeric":"tabular-nums"}),
-                              dmc.Text("per year",size="xs",c="dimmed"),
-                              dmc.Text(f"${r['Monthly_Cost']:.2f}/mo",size="sm",fw=600,
-                                       style={"color":t["accent"]}),
-                          ])
-                for _,r in hh.iterrows()
-            ]),
+            dmc.SimpleGrid(id="hh-cards",cols={"base":2,"sm":3,"lg":5},spacing="sm"),
             dmc.Paper(radius="md",p="lg",shadow="sm",
                       style={"background":t["surface"],"border":f"1px solid {t['border']}"},
-                      children=[dcc.Graph(figure=fig_household(strategy,dark),config=PLOT_CONFIG)]),
+                      children=[dcc.Graph(id="hh-graph",config=PLOT_CONFIG)]),
             dmc.Paper(radius="md",p="lg",shadow="sm",
                       style={"background":t["surface"],"border":f"1px solid {t['border']}"},
                       children=[
@@ -536,7 +533,7 @@ def render(tab, dark, strategy):
                               dmc.TableThead(dmc.TableTr([
                                   _th("Household",t),_th("Daily",t),_th("Weekly",t),
                                   _th("Monthly",t),_th("Annual",t)])),
-                              dmc.TableTbody(hh_rows(strategy,dark)),
+                              dmc.TableTbody(id="hh-body"),
                           ]),
                       ]),
         ])
@@ -553,7 +550,7 @@ def render(tab, dark, strategy):
                               dmc.Text("Best-Value Form per Fruit",fw=700,mb="xs",style={"color":t["text"]}),
                               dmc.Text("Cheapest cup-equivalent option for each base fruit.",
                                        size="sm",c="dimmed",mb="md"),
-                              bv_table(dark),
+                              bv_table(),
                           ]),
                 dmc.Paper(radius="md",p="lg",shadow="sm",
                           style={"background":t["surface"],"border":f"1px solid {t['border']}"},
@@ -592,7 +589,7 @@ def render(tab, dark, strategy):
                       style={"background":t["surface"],"border":f"1px solid {t['border']}"},
                       children=[
                           dmc.Text("Complete Dataset",fw=700,mb="md",style={"color":t["text"]}),
-                          full_table(dark),
+                          data_grid(),
                       ]),
         ])
 
@@ -603,12 +600,12 @@ def render(tab, dark, strategy):
                     "Every fruit × form combination at a glance. Missing cells = form not available.",t),
             dmc.Paper(radius="md",p="lg",shadow="sm",
                       style={"background":t["surface"],"border":f"1px solid {t['border']}"},
-                      children=[dcc.Graph(figure=fig_heatmap(dark),config=PLOT_CONFIG)]),
+                      children=[graph("heatmap")]),
         ])
     else:
         content = dmc.Text("Select a tab",c="dimmed")
 
-    return content, pw, hdr, nav, ftr
+    return content
 
 # Update strategy store from SegmentedControl on Households tab
 @callback(
@@ -620,4 +617,12 @@ def save_strategy(v):
     return v
 
 if __name__ == "__main__":
+    if os.environ.get("FRUITS_PRINT_SUMMARY"):
+        print_chart_summary()
+    # debug=True runs Werkzeug's reloader: this process only watches files and
+    # a child re-runs the module to serve, so the background work starts there.
+    if os.environ.get("WERKZEUG_RUN_MAIN")=="true":
+        # Warm in the background so the server starts listening straight away.
+        threading.Thread(target=warm_figure_cache,daemon=True).start()
+        start_watcher()
     app.run(debug=True, port=8050)
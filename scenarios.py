@@ -0,0 +1,202 @@
+"""
+scenarios.py — Vectorized what-if engine for price shocks, intake and yield
+============================================================================
+Prices thousands of scenarios at once instead of editing constants and
+rebuilding the frame for each one. A scenario is one row of parameters:
+
+    cups_per_day     daily cup-equivalents per adult   (default DAILY_CUPS_ADULT)
+    yield_scale      multiplier on every item's Yield  (default 1)
+    shock_<Form>     multiplier on RetailPrice for one form, e.g. shock_Fresh=1.08
+    yield_<Form>     extra Yield multiplier for one form
+
+Missing columns take their defaults. Because every parameter either scales a
+price per form or scales intake, the scenario prices are one broadcast over
+the base data:
+
+    CupEquivalentPrice[s, i] = round(base_price[i] · shock[s, form_i] / yield[s, form_i], 4)
+
+Per-form summaries come from reductions over form-sorted columns, and the
+strategy reference prices come from one np.partition along the item axis.
+Household budgets are a (scenario × strategy × household) broadcast. The
+rounding matches build_dataframe, cost_summary_by_form and
+household_annual_budget, so the identity scenario reproduces them exactly.
+Scenarios are processed in blocks, so memory stays bounded when both the
+frame and the scenario set are large.
+
+    engine = ScenarioEngine(df)
+    grid = scenario_grid(shock_Fresh=[1.0, 1.05, 1.10], cups_per_day=[1.5, 2.0])
+    res = engine.run(grid)
+    res.scenarios        # one row per scenario: parameters + reference prices + annual costs
+    res.form_summary     # scenario × Form, cost_summary_by_form columns
+    res.household        # scenario × strategy × household, household_annual_budget columns
+"""
+
+import itertools
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from utils import (
+    BUDGET_PERIODS, DAILY_CUPS_ADULT, DAYS_PER_YEAR, HOUSEHOLD_SIZES, STRATEGIES,
+    _round_cents, cup_equivalent_price, select_commodity,
+)
+
+DEFAULTS = {"cups_per_day": DAILY_CUPS_ADULT, "yield_scale": 1.0}
+
+
+class ScenarioResults(NamedTuple):
+    """Tidy outputs of ScenarioEngine.run(); every frame has a ``scenario`` column."""
+    scenarios:    pd.DataFrame        # one row per scenario: parameters, ref_<strategy>
+                                      # $/cup and annual_<strategy> per-person cost
+    form_summary: pd.DataFrame        # one row per scenario × Form
+    household:    pd.DataFrame        # one row per scenario × strategy × household
+    items:        pd.DataFrame | None # one row per scenario × item: CupEquivalentPrice,
+                                      # Daily_Cost, Annual_Cost (keep_items=True only)
+
+
+def scenario_grid(**axes) -> pd.DataFrame:
+    """Every combination of the given parameter values, one scenario per row."""
+    names = list(axes)
+    return pd.DataFrame(list(itertools.product(*(axes[n] for n in names))), columns=names)
+
+
+class ScenarioEngine:
+    """
+    Scenario pricing over one enriched frame.
+
+    The unrounded base prices and the form grouping are computed once here;
+    run() only broadcasts multipliers over them.
+    """
+
+    def __init__(self, df: pd.DataFrame, commodity: str | None = None):
+        df = select_commodity(df, commodity)
+        forms = df["Form"].astype(str).to_numpy()
+        order = np.argsort(forms, kind="stable")          # items grouped by form
+        self.forms, starts, counts = np.unique(forms[order], return_index=True, return_counts=True)
+        self._starts = starts
+        self.counts  = counts
+        self._base   = cup_equivalent_price(df).to_numpy(dtype="float64")[order]
+        self._fcode  = np.repeat(np.arange(len(self.forms)), counts)
+        self.index   = df.index[order]                    # df row of each item column
+
+    # ── parameters ───────────────────────────────────────────
+    def _multipliers(self, scenarios: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """(cups per day (S,), price multiplier per scenario and form (S, F))."""
+        known = set(DEFAULTS) | {f"{p}_{f}" for p in ("shock", "yield") for f in self.forms}
+        unknown = set(scenarios.columns) - known - {"scenario"}
+        if unknown:
+            raise ValueError(f"unknown scenario parameter(s) {sorted(unknown)}; "
+                             f"forms are {list(self.forms)}")
+        n = len(scenarios)
+
+        def col(name, default):
+            if name not in scenarios:
+                return np.full(n, default, dtype="float64")
+            return scenarios[name].to_numpy(dtype="float64")
+
+        cups = col("cups_per_day", DEFAULTS["cups_per_day"])
+        shock = np.column_stack([col(f"shock_{f}", 1.0) for f in self.forms])
+        yld = col("yield_scale", 1.0)[:, None] * np.column_stack(
+            [col(f"yield_{f}", 1.0) for f in self.forms])
+        if (yld <= 0).any():
+            raise ValueError("yield multipliers must be positive")
+        return cups, shock / yld
+
+    # ── run ──────────────────────────────────────────────────
+    def run(self, scenarios: pd.DataFrame, keep_items: bool = False,
+            block_elements: int = 8_000_000) -> ScenarioResults:
+        """
+        Price every scenario (row of ``scenarios``). Scenario ids come from a
+        ``scenario`` column if present, else the row position. keep_items=True
+        also returns every item's price and per-person Daily_Cost and
+        Annual_Cost in every scenario (S × n rows), rounded as in enrich().
+        block_elements bounds the size of each scenario × item block.
+        """
+        scenarios = scenarios.reset_index(drop=True)
+        ids = (scenarios["scenario"].to_numpy() if "scenario" in scenarios
+               else np.arange(len(scenarios)))
+        cups, mult = self._multipliers(scenarios)
+        S, n, F = len(scenarios), len(self._base), len(self.forms)
+        if not n:
+            raise ValueError("no items to price")
+
+        sums, mins, maxs = np.empty((S, F)), np.empty((S, F)), np.empty((S, F))
+        refs = np.empty((S, len(STRATEGIES)))
+        items = [] if keep_items else None
+        step = max(1, block_elements // n)
+        for lo in range(0, S, step):
+            hi = min(S, lo + step)
+            prices = np.round(self._base * mult[lo:hi, self._fcode], 4)
+            sums[lo:hi] = np.add.reduceat(prices, self._starts, axis=1)
+            mins[lo:hi] = np.minimum.reduceat(prices, self._starts, axis=1)
+            maxs[lo:hi] = np.maximum.reduceat(prices, self._starts, axis=1)
+            refs[lo:hi] = _reference_prices(prices)
+            if keep_items:
+                daily = np.round(prices * cups[lo:hi, None], 4)
+                items.append((prices, daily))
+
+        avg, c = sums / self.counts, cups[:, None]
+        form_summary = pd.DataFrame({
+            "scenario":    np.repeat(ids, F),
+            "Form":        np.tile(self.forms, S),
+            "AvgCupPrice": avg.ravel(),
+            "MinCupPrice": mins.ravel(),
+            "MaxCupPrice": maxs.ravel(),
+            "Count":       np.tile(self.counts, S),
+            "Annual_Avg":  (avg * c * DAYS_PER_YEAR).round(2).ravel(),
+            "Annual_Min":  (mins * c * DAYS_PER_YEAR).round(2).ravel(),
+            "Annual_Max":  (maxs * c * DAYS_PER_YEAR).round(2).ravel(),
+        }).sort_values(["scenario", "AvgCupPrice"], kind="stable").reset_index(drop=True)
+
+        summary = scenarios.copy()
+        if "scenario" not in summary:
+            summary.insert(0, "scenario", ids)
+        per_person = _round_cents(cups[:, None] * refs * DAYS_PER_YEAR)
+        for k, s in enumerate(STRATEGIES):
+            summary[f"ref_{s}"] = refs[:, k].round(4)
+        for k, s in enumerate(STRATEGIES):
+            summary[f"annual_{s}"] = per_person[:, k]
+
+        item_frame = None
+        if keep_items:
+            daily = np.vstack([d for _, d in items])
+            item_frame = pd.DataFrame({
+                "scenario": np.repeat(ids, n),
+                "row": np.tile(self.index.to_numpy(), S),
+                "CupEquivalentPrice": np.vstack([p for p, _ in items]).ravel(),
+                "Daily_Cost": daily.ravel(),
+                "Annual_Cost": (daily * DAYS_PER_YEAR).round(2).ravel(),
+            })
+        return ScenarioResults(summary, form_summary, self._households(ids, cups, refs), item_frame)
+
+    def _households(self, ids, cups, refs) -> pd.DataFrame:
+        """household_annual_budget() for every scenario × strategy, as one frame."""
+        members = np.fromiter(HOUSEHOLD_SIZES.values(), dtype="int64")
+        S, K, H = len(ids), len(STRATEGIES), len(members)
+        annual = _round_cents(cups[:, None, None] * refs[:, :, None] * DAYS_PER_YEAR
+                              * members[None, None, :].astype("float64"))       # (S, K, H)
+        divisor = np.array([1.0, 12.0, 52.0, DAYS_PER_YEAR])
+        periods = _round_cents(annual[..., None] / divisor)                     # (S, K, H, 4)
+        out = pd.DataFrame({
+            "scenario":    np.repeat(ids, K * H),
+            "Strategy":    np.tile(np.repeat(STRATEGIES, H), S),
+            "Household":   np.tile(list(HOUSEHOLD_SIZES), S * K),
+            "Members":     np.tile(members, S * K),
+            "PricePerCup": np.repeat(refs.round(4).ravel(), H),
+        })
+        for j, col in enumerate(BUDGET_PERIODS):
+            out[col] = periods[..., j].ravel()
+        return out
+
+
+def _reference_prices(prices: np.ndarray) -> np.ndarray:
+    """strategy_reference_prices() along axis 1: (S, n) prices → (S, 3) budget/average/premium."""
+    n = prices.shape[1]
+    lo, hi = max(1, n // 4), 3 * n // 4
+    part = np.partition(prices, sorted({lo - 1, hi, (n - 1) // 2, n // 2}), axis=1)
+    return np.column_stack([
+        np.median(part[:, :lo], axis=1),
+        (part[:, (n - 1) // 2] + part[:, n // 2]) / 2,
+        np.median(part[:, hi:], axis=1),
+    ])
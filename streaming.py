@@ -0,0 +1,128 @@
+"""
+streaming.py — Chunked ingestion for price files too large for memory
+======================================================================
+build_dataframe() reads a whole CSV before filtering it, which is fine for the
+USDA files but not for multi-gigabyte regional scanner extracts. Here the CSV
+is read ``chunksize`` rows at a time; each chunk goes through the same
+validate → coerce → price pipeline (utils.enrich_dataframe) and is folded into
+running aggregates, so peak memory depends on the chunk size, not the file.
+
+    agg = stream_aggregates("data/scanner_extract.csv", chunksize=250_000)
+    agg.cost_summary_by_form()        # same columns as utils.cost_summary_by_form
+    agg.best_value_per_base_fruit()
+    agg.price_range_stats()           # quartiles/median from a QuantileSketch
+
+Counts, min, max, per-form means and the best value per base fruit are exact.
+mean and std come from the sketch's running moments and match pandas to float
+rounding. median/q25/q75 are approximate (see sketch.py for the error bound).
+"""
+
+import pandas as pd
+import numpy as np
+
+from sketch import QuantileSketch
+from utils import (
+    CSV_PATH,
+    DAILY_CUPS_ADULT,
+    DAYS_PER_YEAR,
+    enrich_dataframe,
+    sketch_price_stats,
+)
+
+
+class PriceAggregates:
+    """Running CupEquivalentPrice aggregates, fed one enriched chunk at a time."""
+
+    def __init__(self, item_col: str = "Fruit", sketch_k: int = 200):
+        self.item_col = item_col
+        self.base_col = f"Base{item_col}"
+        self.rows     = 0
+        # Per form: count, sum, min, max (indexed by Form, in first-seen order).
+        self._forms   = pd.DataFrame(columns=["count", "sum", "min", "max"], dtype="float64")
+        # Cheapest row seen so far for each base item.
+        self._best    = None
+        # Quantiles plus exact count/min/max/mean/std of every price.
+        self.sketch   = QuantileSketch(k=sketch_k)
+
+    # ── folding ──────────────────────────────────────────────
+    def update(self, chunk: pd.DataFrame) -> "PriceAggregates":
+        """Fold an enriched chunk (output of enrich_dataframe) into the totals."""
+        if chunk.empty:
+            return self
+        p = chunk["CupEquivalentPrice"]
+
+        per_form = p.groupby(chunk["Form"], sort=False, observed=True).agg(
+            ["count", "sum", "min", "max"]).astype("float64")
+        if self._forms.empty:
+            self._forms = per_form
+        else:
+            old = self._forms.reindex(self._forms.index.union(per_form.index, sort=False))
+            new = per_form.reindex(old.index)
+            old["count"] = old["count"].fillna(0) + new["count"].fillna(0)
+            old["sum"]   = old["sum"].fillna(0) + new["sum"].fillna(0)
+            old["min"]   = np.fmin(old["min"], new["min"])
+            old["max"]   = np.fmax(old["max"], new["max"])
+            self._forms  = old
+
+        self.rows += len(p)
+
+        cols = [self.base_col, self.item_col, "Form", "CupEquivalentPrice"]
+        best = chunk[cols]
+        if self._best is not None:
+            # Earlier rows first, so idxmin keeps the first-seen row on ties.
+            best = pd.concat([self._best, best], ignore_index=True)
+        idx = best.groupby(self.base_col, sort=False, observed=True)["CupEquivalentPrice"].idxmin()
+        self._best = best.loc[idx].reset_index(drop=True)
+
+        self.sketch.update(p.to_numpy())
+        return self
+
+    # ── results (shaped like the utils equivalents) ──────────
+    def cost_summary_by_form(self) -> pd.DataFrame:
+        """Per-form average/min/max cup price and annual cost."""
+        f = self._forms
+        grp = pd.DataFrame({
+            "Form":        f.index.astype(object),
+            "AvgCupPrice": (f["sum"] / f["count"]).to_numpy(),
+            "MinCupPrice": f["min"].to_numpy(),
+            "MaxCupPrice": f["max"].to_numpy(),
+            "Count":       f["count"].astype("int64").to_numpy(),
+        })
+        grp["Annual_Avg"] = (grp["AvgCupPrice"] * DAILY_CUPS_ADULT * DAYS_PER_YEAR).round(2)
+        grp["Annual_Min"] = (grp["MinCupPrice"] * DAILY_CUPS_ADULT * DAYS_PER_YEAR).round(2)
+        grp["Annual_Max"] = (grp["MaxCupPrice"] * DAILY_CUPS_ADULT * DAYS_PER_YEAR).round(2)
+        return grp.sort_values("AvgCupPrice").reset_index(drop=True)
+
+    def best_value_per_base_fruit(self) -> pd.DataFrame:
+        """Cheapest form per base item, ordered by base name like groupby()."""
+        if self._best is None:
+            return pd.DataFrame(columns=[self.base_col, self.item_col, "Form", "CupEquivalentPrice"])
+        return self._best.sort_values(self.base_col, kind="stable").reset_index(drop=True)
+
+    def form_distribution(self) -> pd.DataFrame:
+        """Count and percentage of rows by preparation form."""
+        counts = pd.DataFrame({
+            "Form":  self._forms.index.astype(object),
+            "Count": self._forms["count"].astype("int64").to_numpy(),
+        }).sort_values("Count", ascending=False, kind="stable").reset_index(drop=True)
+        counts["Percentage"] = (counts["Count"] / max(self.rows, 1) * 100).round(1)
+        return counts
+
+    def price_range_stats(self) -> dict:
+        """Same keys as utils.price_range_stats; median/q25/q75 are sketch estimates."""
+        if not self.rows:
+            raise ValueError("no rows aggregated")
+        return sketch_price_stats(self.sketch)
+
+
+def stream_aggregates(csv_path: str = CSV_PATH, chunksize: int = 100_000,
+                      item_col: str = "Fruit", sketch_k: int = 200) -> PriceAggregates:
+    """
+    Read csv_path in chunks of ``chunksize`` rows and return the folded
+    PriceAggregates. Column validation happens on the first chunk, so a bad
+    file fails before any real work is done.
+    """
+    agg = PriceAggregates(item_col, sketch_k)
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        agg.update(enrich_dataframe(chunk, item_col))
+    return agg
@@ -0,0 +1,28 @@
+"""
+theme.py — Light/dark design tokens shared by the layout and the figures
+========================================================================
+"""
+from utils import FORM_COLORS
+
+LIGHT = {"bg":"#f3f8f5","surface":"#ffffff","surface2":"#eaf4ef","border":"#c8e0d4",
+         "text":"#0f1e16","sub":"#4d7060","primary":"#1a7f5a","accent":"#f59e0b",
+         "grid":"#ddeee5","header_grad":"linear-gradient(135deg,#0c3d27 0%,#1a7f5a 100%)"}
+DARK  = {"bg":"#0e1b14","surface":"#152319","surface2":"#1d3026","border":"#2a4535",
+         "text":"#e6f4ec","sub":"#7dab91","primary":"#2ed581","accent":"#fbbf24",
+         "grid":"#1e3a2a","header_grad":"linear-gradient(135deg,#061108 0%,#0f3d24 100%)"}
+
+FORM_COLORS_DARK = {"Fresh":"#2ed581","Canned":"#fb923c","Frozen":"#60a5fa",
+                    "Dried":"#c084fc","Juice":"#fde047"}
+
+def tok(dark): return DARK if dark else LIGHT
+
+# Layout components reference the theme through CSS custom properties set on
+# #page-wrap, so a theme toggle only restyles the page instead of re-rendering
+# it. Plotly figures cannot read CSS variables and still use tok(dark).
+CSS = {k: f"var(--fb-{k.replace('_','-')})" for k in LIGHT}
+
+def page_style(dark):
+    t=tok(dark)
+    return {**{f"--fb-{k.replace('_','-')}":v for k,v in t.items()},
+            "background":t["bg"],"minHeight":"100vh","transition":"background 0.3s"}
+def fc(dark):  return FORM_COLORS_DARK if dark else FORM_COLORS
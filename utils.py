@@ -1,7 +1,7 @@
 """
 utils.py — Fruit Cost Analysis Utilities
 =========================================
-Data source: USDA ERS Fruit & Vegetable Prices CSV (fruits.csv).
+Data source: USDA ERS Fruit & Vegetable Prices CSVs (fruits.csv, vegetables.csv).
 
 Cup-equivalent price formula
 ────────────────────────────
@@ -16,10 +16,15 @@ Recommended daily intake: 1.5 cups/day (USDA Dietary Guidelines 2020-2025 midpoi
 Annual cost uses a 365-day year.
 """
 
+import hashlib
+import heapq
+import json
 import os
 import pandas as pd
 import numpy as np
 
+from sketch import QuantileSketch
+
 # ── CSV PATH ────────────────────────────────────────────────────────────────
 # Resolves relative to the location of this file so the app works regardless
 # of which directory it is launched from.
@@ -29,11 +34,27 @@ CSV_PATH = os.path.join(
     "data",
     "fruits.csv",
 )
+VEG_CSV_PATH = os.path.join(_HERE, "data", "vegetables.csv")
+
+# Commodity name → CSV. The commodity name is also the CSV's item column.
+COMMODITY_FILES = {
+    "Fruit":     CSV_PATH,
+    "Vegetable": VEG_CSV_PATH,
+}
+# Enriched frames are cached here as Feather files (see load_dataframe).
+CACHE_DIR = os.path.join(_HERE, "data", ".cache")
 
 # ── CONSTANTS ───────────────────────────────────────────────────────────────
 DAILY_CUPS_ADULT = 1.5          # USDA recommended midpoint for adults
+CHILD_DAILY_CUPS = 1.0          # USDA lower bound for children (1–1.5 cups/day)
 DAYS_PER_YEAR    = 365
 
+# Recommended adult cups/day per commodity, for combined household budgets.
+DAILY_CUPS_BY_COMMODITY = {
+    "Fruit":     DAILY_CUPS_ADULT,
+    "Vegetable": 2.5,           # USDA 2–4 cups/day; 2,000-kcal pattern
+}
+
 HOUSEHOLD_SIZES = {
     "Single Adult": 1,
     "Couple":       2,
@@ -50,18 +71,84 @@ FORM_COLORS = {
     "Juice":  "#f1c40f",
 }
 
-# Expected columns coming from the CSV
+# Bump whenever build_dataframe's output columns or formulas change so stale
+# cache files are never served.
+_SCHEMA_VERSION = 1
+
+# Expected columns coming from the CSV (plus the item column, e.g. "Fruit")
 _REQUIRED_COLS = {
-    "Fruit", "Form", "RetailPrice", "RetailPriceUnit",
+    "Form", "RetailPrice", "RetailPriceUnit",
     "Yield", "CupEquivalentSize", "CupEquivalentUnit",
 }
 
+# Item / base-item column pairs, in lookup order. Combined multi-commodity
+# frames use Item/BaseItem; single-commodity frames keep the CSV's name.
+_ITEM_COLUMNS = (("Item", "BaseItem"), ("Fruit", "BaseFruit"), ("Vegetable", "BaseVegetable"))
+
+
+# RetailPrice is quoted per pound or per pint; CupEquivalentSize is in the unit
+# named by CupEquivalentUnit. The divisor converts CupEquivalentSize into the
+# retail unit (1 pint = 16 fl oz). Units not listed here are treated as pounds.
+UNIT_DIVISORS = {
+    "pounds":       1.0,
+    "fluid ounces": 16.0,
+}
+
+
+# ── PRICING ─────────────────────────────────────────────────────────────────
+
+def cup_equivalent_price(df: pd.DataFrame) -> pd.Series:
+    """
+    Vectorized cup-equivalent price for every row (unrounded).
+
+    Looks up each row's CupEquivalentUnit in UNIT_DIVISORS once per distinct
+    unit instead of once per row, then prices all rows in a single array op:
+        CupEquivalentPrice = RetailPrice × (CupEquivalentSize / divisor) / Yield
+    """
+    codes, uniques = pd.factorize(df["CupEquivalentUnit"])
+    # Trailing 1.0 is picked up by code -1 (missing unit → pounds).
+    lookup = np.array(
+        [UNIT_DIVISORS.get(str(u).strip().lower(), 1.0) for u in uniques] + [1.0]
+    )
+    divisor = lookup[codes]
+    price = (
+        df["RetailPrice"].to_numpy(dtype="float64")
+        * (df["CupEquivalentSize"].to_numpy(dtype="float64") / divisor)
+        / df["Yield"].to_numpy(dtype="float64")
+    )
+    return pd.Series(price, index=df.index, name="CupEquivalentPrice")
+
 
 # ── LOAD & BUILD DATAFRAME ──────────────────────────────────────────────────
 
-def build_dataframe(csv_path: str = CSV_PATH) -> pd.DataFrame:
+def base_name(items: pd.Series) -> pd.Series:
+    """
+    Base item name: text before the first comma or parenthesis, stripped.
+    Categorical input is mapped per category and stays categorical.
+    """
+    def _strip(s):
+        return s.str.split(",").str[0].str.split("(").str[0].str.strip()
+
+    if isinstance(items.dtype, pd.CategoricalDtype):
+        codes, bases = pd.factorize(_strip(pd.Series(items.cat.categories)), sort=True)
+        codes = np.append(codes, -1)            # code -1 (missing item) stays missing
+        return pd.Series(pd.Categorical.from_codes(codes[items.cat.codes], bases),
+                         index=items.index)
+    return _strip(items)
+
+
+def build_dataframe(csv_path: str = CSV_PATH, item_col: str = "Fruit",
+                    compact: bool = False) -> pd.DataFrame:
     """
-    Load the USDA fruits CSV and return a fully-enriched DataFrame.
+    Load a USDA price CSV and return a fully-enriched DataFrame.
+
+    item_col names the CSV's item column ("Fruit" for fruits.csv, "Vegetable"
+    for vegetables.csv); the base-name column is called "Base" + item_col.
+
+    compact=True stores the item, base-item, Form and unit columns as
+    categoricals and the derived cost columns as float32 (values are rounded
+    to at most 4 decimals, well inside float32 precision). Prices, Yield and
+    CupEquivalentPrice stay float64. See memory_report() for the savings.
 
     Computed columns added:
         CupEquivalentPrice  — cost per 1 cup-equivalent, derived from first principles
@@ -72,10 +159,34 @@ def build_dataframe(csv_path: str = CSV_PATH) -> pd.DataFrame:
         Annual_Cost         — Daily_Cost × 365
     """
     # ── 1. Load ──────────────────────────────────────────────
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(csv_path, dtype=_read_dtypes(item_col, compact))
+    return enrich_dataframe(df, item_col, compact)
+
+
+def detect_item_column(csv_path: str) -> str:
+    """The item column ("Fruit", "Vegetable", "Item") named in a CSV's header."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    for item, _ in _ITEM_COLUMNS:
+        if item in header:
+            return item
+    raise ValueError(f"No item column found in {csv_path}; expected one of "
+                     f"{[i for i, _ in _ITEM_COLUMNS]}")
+
+
+def _read_dtypes(item_col: str, compact: bool) -> dict | None:
+    """read_csv dtype overrides: categoricals for the text columns in compact mode."""
+    return dict.fromkeys(_compact_categoricals(item_col), "category") if compact else None
 
+
+def enrich_dataframe(df: pd.DataFrame, item_col: str = "Fruit",
+                     compact: bool = False) -> pd.DataFrame:
+    """
+    Steps 2–5 of build_dataframe on an already-read raw frame (validate,
+    coerce, drop invalid rows, price, derive costs). Used directly by the
+    chunked reader in streaming.py; may modify df in place.
+    """
     # ── 2. Validate columns ──────────────────────────────────
-    missing = _REQUIRED_COLS - set(df.columns)
+    missing = (_REQUIRED_COLS | {item_col}) - set(df.columns)
     if missing:
         raise ValueError(
             f"CSV is missing required columns: {missing}\n"
@@ -86,42 +197,210 @@ def build_dataframe(csv_path: str = CSV_PATH) -> pd.DataFrame:
     df["RetailPrice"]       = pd.to_numeric(df["RetailPrice"],       errors="coerce")
     df["Yield"]             = pd.to_numeric(df["Yield"],             errors="coerce")
     df["CupEquivalentSize"] = pd.to_numeric(df["CupEquivalentSize"], errors="coerce")
-    df = df.dropna(subset=["RetailPrice", "Yield", "CupEquivalentSize"]).copy()
-    df = df[df["Yield"] > 0].copy()           # guard against zero-division
+    # One mask, at most one copy (none when every row is valid); Yield > 0
+    # guards against zero-division.
+    keep = (df[["RetailPrice", "Yield", "CupEquivalentSize"]].notna().all(axis=1)
+            & (df["Yield"] > 0))
+    if not keep.all():
+        df = df.loc[keep].reset_index(drop=True)
 
     # ── 4. Compute CupEquivalentPrice from first principles ──
-    def _cup_price(row):
-        if str(row["CupEquivalentUnit"]).strip().lower() == "fluid ounces":
-            # RetailPrice is per pint (16 fl oz); cup-equiv is 8 fl oz
-            return row["RetailPrice"] * (row["CupEquivalentSize"] / 16.0) / row["Yield"]
-        else:
-            # RetailPrice is per pound
-            return (row["RetailPrice"] * row["CupEquivalentSize"]) / row["Yield"]
-
-    df["CupEquivalentPrice"] = df.apply(_cup_price, axis=1).round(4)
+    df["CupEquivalentPrice"] = cup_equivalent_price(df).round(4)
 
     # ── 5. Derived columns ───────────────────────────────────
-    df["BaseFruit"] = (
-        df["Fruit"]
-        .str.split(",").str[0]
-        .str.split("(").str[0]
-        .str.strip()
-    )
-    df["Daily_Cost"]   = (df["CupEquivalentPrice"] * DAILY_CUPS_ADULT).round(4)
-    df["Weekly_Cost"]  = (df["Daily_Cost"] * 7).round(2)
-    df["Monthly_Cost"] = (df["Daily_Cost"] * 30.44).round(2)
-    df["Annual_Cost"]  = (df["Daily_Cost"] * DAYS_PER_YEAR).round(2)
+    df[f"Base{item_col}"] = base_name(df[item_col])
+    daily = (df["CupEquivalentPrice"] * DAILY_CUPS_ADULT).round(4)
+    cost_dtype = "float32" if compact else "float64"
+    df["Daily_Cost"]   = daily.astype(cost_dtype)
+    df["Weekly_Cost"]  = (daily * 7).round(2).astype(cost_dtype)
+    df["Monthly_Cost"] = (daily * 30.44).round(2).astype(cost_dtype)
+    df["Annual_Cost"]  = (daily * DAYS_PER_YEAR).round(2).astype(cost_dtype)
+    return df
+
+
+def _compact_categoricals(item_col: str) -> list:
+    """Low-cardinality text columns read as categoricals in compact mode."""
+    return [item_col, "Form", "RetailPriceUnit", "CupEquivalentUnit"]
+
+
+def memory_report(df: pd.DataFrame) -> dict:
+    """Deep memory use of df: total bytes, bytes per row, and bytes per column."""
+    per_col = df.memory_usage(deep=True, index=True)
+    total = int(per_col.sum())
+    return {
+        "rows":          len(df),
+        "total_bytes":   total,
+        "bytes_per_row": round(total / max(len(df), 1), 1),
+        "columns":       {k: int(v) for k, v in per_col.items()},
+    }
+
+
+def build_commodity_dataframe(paths: dict | None = None, compact: bool = False) -> pd.DataFrame:
+    """
+    Load several commodity CSVs into one enriched frame with a single schema.
+
+    paths maps commodity name → CSV (default COMMODITY_FILES). Each file's
+    item column (named after its commodity) becomes ``Item`` and its base name
+    ``BaseItem``; a categorical ``Commodity`` column records the source. Columns
+    are renamed in place, so the final concat is the only copy made.
+    """
+    paths = COMMODITY_FILES if paths is None else paths
+    names = list(paths)
+    frames = []
+    for i, (commodity, path) in enumerate(paths.items()):
+        df = build_dataframe(path, item_col=commodity, compact=compact)
+        df.rename(columns={commodity: "Item", f"Base{commodity}": "BaseItem"}, inplace=True)
+        df.insert(0, "Commodity", pd.Categorical.from_codes(np.full(len(df), i), categories=names))
+        frames.append(df)
+
+    if compact:
+        # concat only keeps a categorical dtype when every frame has the same
+        # categories, so widen each column to the union first (codes remap only).
+        for col in _compact_categoricals("Item") + ["BaseItem"]:
+            cats = pd.api.types.union_categoricals([f[col] for f in frames]).categories
+            for f in frames:
+                f[col] = f[col].cat.set_categories(cats)
+    return pd.concat(frames, ignore_index=True, copy=False)
+
+
+# ── ON-DISK CACHE ───────────────────────────────────────────────────────────
+
+def _file_digest(csv_path: str, index: dict) -> str:
+    """
+    SHA-256 of the CSV contents. The digest is remembered in the cache index
+    against (mtime, size) so an untouched file is not re-hashed on every start.
+    """
+    st = os.stat(csv_path)
+    key = os.path.abspath(csv_path)
+    seen = index.get(key)
+    if seen and seen["mtime_ns"] == st.st_mtime_ns and seen["size"] == st.st_size:
+        return seen["sha256"]
+
+    h = hashlib.sha256()
+    with open(csv_path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    index[key] = {**(seen or {}),
+                  "mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": h.hexdigest()}
+    return index[key]["sha256"]
+
+
+def _cache_key(digest: str) -> str:
+    """Combine the file digest with everything else that shapes the output."""
+    parts = f"{digest}|{DAILY_CUPS_ADULT!r}|{DAYS_PER_YEAR!r}|{_SCHEMA_VERSION}"
+    return hashlib.sha256(parts.encode()).hexdigest()[:16]
+
+
+def _load_cached(sources: list, owner: str, stem: str, build, cache_dir: str | None,
+                 extra: str = "") -> pd.DataFrame:
+    """
+    Return build()'s frame from the Feather cache, building and storing it on
+    a miss. sources are the CSVs the frame depends on; owner is the index
+    entry that remembers which cache file this loader last wrote.
+    """
+    try:
+        import pyarrow  # noqa: F401  (needed by to_feather / read_feather)
+    except ImportError:
+        cache_dir = None
+    if cache_dir is None:
+        return build()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, "index.json")
+    try:
+        with open(index_path) as fh:
+            index = json.load(fh)
+    except (OSError, ValueError):
+        index = {}
+
+    digest = "|".join(_file_digest(p, index) for p in sources) + extra
+    path = os.path.join(cache_dir, f"{stem}-{_cache_key(digest)}.feather")
+
+    if os.path.exists(path):
+        return pd.read_feather(path)
+
+    df = build()
+
+    # Write to a temp name and rename so concurrent workers never read a
+    # half-written file, then drop this loader's previous entry unless another
+    # loader with identical inputs still points at it.
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_feather(tmp)
+    os.replace(tmp, path)
+
+    entry = index.setdefault(owner, {})
+    stale = entry.get("cache_file")
+    entry["cache_file"] = os.path.basename(path)
+    if stale and stale != entry["cache_file"] and \
+            all(e.get("cache_file") != stale for e in index.values()):
+        try:
+            os.remove(os.path.join(cache_dir, stale))
+        except OSError:
+            pass
 
-    df = df.reset_index(drop=True)
+    tmp = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(index, fh)
+    os.replace(tmp, index_path)
     return df
 
 
+def load_dataframe(csv_path: str = CSV_PATH, cache_dir: str | None = CACHE_DIR,
+                   compact: bool = False, item_col: str = "Fruit") -> pd.DataFrame:
+    """
+    build_dataframe() backed by a Feather cache of the enriched frame.
+
+    The cache file is keyed on the CSV content hash, item_col, compact,
+    DAILY_CUPS_ADULT, DAYS_PER_YEAR, and _SCHEMA_VERSION, so editing the CSV
+    or any of those constants rebuilds it. Warm starts read the columnar file
+    directly and skip CSV parsing and all derived-column work. Pass
+    cache_dir=None, or run without pyarrow installed, to always build from
+    the CSV.
+    """
+    suffix = ("" if item_col == "Fruit" else f"-{item_col.lower()}") + ("-compact" if compact else "")
+    stem = os.path.splitext(os.path.basename(csv_path))[0] + suffix
+    return _load_cached([csv_path], os.path.abspath(csv_path) + suffix.replace("-", ":"),
+                        stem, lambda: build_dataframe(csv_path, item_col, compact), cache_dir,
+                        extra=f"|item={item_col}|compact={compact}")
+
+
+def load_commodities(paths: dict | None = None, cache_dir: str | None = CACHE_DIR,
+                     compact: bool = False) -> pd.DataFrame:
+    """build_commodity_dataframe() with the same Feather caching as load_dataframe()."""
+    paths = COMMODITY_FILES if paths is None else paths
+    stem  = "commodities" + ("-compact" if compact else "")
+    owner = f"{stem}:" + ";".join(f"{k}={os.path.abspath(v)}" for k, v in paths.items())
+    return _load_cached(list(paths.values()), owner, stem,
+                        lambda: build_commodity_dataframe(paths, compact), cache_dir,
+                        extra=f"{list(paths)!r}|compact={compact}")
+
+
 # ── ANALYSIS FUNCTIONS ──────────────────────────────────────────────────────
+# Every summary takes an optional ``commodity`` ("Fruit", "Vegetable", ...) to
+# restrict a combined frame from build_commodity_dataframe() to one commodity.
 
-def cost_summary_by_form(df: pd.DataFrame) -> pd.DataFrame:
+def _item_cols(df: pd.DataFrame) -> tuple[str, str]:
+    """(item, base item) column names present in df."""
+    for item, base in _ITEM_COLUMNS:
+        if item in df.columns:
+            return item, base
+    raise ValueError(f"No item column found; expected one of {[i for i, _ in _ITEM_COLUMNS]}")
+
+
+def select_commodity(df: pd.DataFrame, commodity: str | None = None) -> pd.DataFrame:
+    """Rows of df for one commodity, or df unchanged when commodity is None."""
+    if commodity is None:
+        return df
+    if "Commodity" not in df.columns:
+        raise ValueError("commodity filter needs a frame from build_commodity_dataframe()")
+    return df[df["Commodity"] == commodity]
+
+
+def cost_summary_by_form(df: pd.DataFrame, commodity: str | None = None) -> pd.DataFrame:
     """Average, min, and max annual per-person cost grouped by preparation form."""
+    df = select_commodity(df, commodity)
     grp = (
-        df.groupby("Form")["CupEquivalentPrice"]
+        df.groupby("Form", observed=True)["CupEquivalentPrice"]
         .agg(AvgCupPrice="mean", MinCupPrice="min", MaxCupPrice="max", Count="count")
         .reset_index()
     )
@@ -131,38 +410,167 @@ def cost_summary_by_form(df: pd.DataFrame) -> pd.DataFrame:
     return grp.sort_values("AvgCupPrice").reset_index(drop=True)
 
 
-def cheapest_items(df: pd.DataFrame, n: int = 15) -> pd.DataFrame:
+def top_k_positions(values, k: int, largest: bool = False) -> np.ndarray:
+    """
+    Positions of the k smallest (largest) values, in order, by partial
+    selection: np.partition finds the k-th value in O(n) and only the k
+    survivors are sorted. Equal values keep row order; NaNs come last.
+    """
+    v = np.asarray(values, dtype="float64")
+    nan = np.isnan(v)
+    if nan.any():
+        head = np.flatnonzero(~nan)
+        return np.concatenate([head[top_k_positions(v[head], k, largest)],
+                               np.flatnonzero(nan)])[:max(k, 0)]
+    if largest:
+        v = -v
+    k = min(max(k, 0), len(v))
+    if k == 0:
+        return np.empty(0, dtype="int64")
+    if k < len(v):
+        kth  = np.partition(v, k - 1)[k - 1]
+        less = np.flatnonzero(v < kth)
+        cand = np.concatenate([less, np.flatnonzero(v == kth)[: k - len(less)]])
+    else:
+        cand = np.arange(len(v))
+    return cand[np.argsort(v[cand], kind="stable")]
+
+
+def top_k(df: pd.DataFrame, k: int, column: str = "CupEquivalentPrice",
+          largest: bool = False, by: str | None = None,
+          commodity: str | None = None, columns: list | None = None) -> pd.DataFrame:
+    """
+    The k rows with the lowest (or, with largest=True, highest) ``column``.
+
+    With ``by`` (e.g. "Form" or "Commodity") the top k are taken within each
+    group, in one pass: rows are bucketed by group code, then each bucket is
+    partially selected. Groups come out in sorted order; rows with a missing
+    group key are left out, as in groupby(). ``columns`` limits
+    the returned columns (the by column is appended if missing).
+    """
+    df = select_commodity(df, commodity)
+    values = df[column].to_numpy(dtype="float64")
+    if by is None:
+        pos = top_k_positions(values, k, largest)
+    else:
+        codes, _ = pd.factorize(df[by], sort=True)
+        order  = np.argsort(codes, kind="stable")
+        order  = order[codes[order] >= 0]       # rows with a missing key (code -1) sort first
+        bounds = np.cumsum(np.bincount(codes[codes >= 0]))
+        pos = np.concatenate([
+            order[lo:hi][top_k_positions(values[order[lo:hi]], k, largest)]
+            for lo, hi in zip(np.r_[0, bounds[:-1]], bounds)
+        ] or [np.empty(0, dtype="int64")])
+    # Only the selected rows are materialized, then trimmed to columns.
+    out = df.iloc[pos]
+    if columns is not None:
+        out = out[list(dict.fromkeys(list(columns) + ([by] if by else [])))]
+    return out.reset_index(drop=True)
+
+
+def cheapest_items(df: pd.DataFrame, n: int = 15, commodity: str | None = None) -> pd.DataFrame:
     """Return the n lowest cup-equivalent-cost items."""
-    return (
-        df[["Fruit", "Form", "CupEquivalentPrice", "RetailPrice", "RetailPriceUnit", "Yield"]]
-        .sort_values("CupEquivalentPrice")
-        .head(n)
-        .reset_index(drop=True)
-    )
+    df = select_commodity(df, commodity)
+    item, _ = _item_cols(df)
+    return top_k(df, n, columns=[item, "Form", "CupEquivalentPrice", "RetailPrice",
+                                 "RetailPriceUnit", "Yield"])
 
 
-def most_expensive_items(df: pd.DataFrame, n: int = 15) -> pd.DataFrame:
+def most_expensive_items(df: pd.DataFrame, n: int = 15, commodity: str | None = None) -> pd.DataFrame:
     """Return the n highest cup-equivalent-cost items."""
-    return (
-        df[["Fruit", "Form", "CupEquivalentPrice", "RetailPrice", "RetailPriceUnit", "Yield"]]
-        .sort_values("CupEquivalentPrice", ascending=False)
-        .head(n)
-        .reset_index(drop=True)
-    )
+    df = select_commodity(df, commodity)
+    item, _ = _item_cols(df)
+    return top_k(df, n, largest=True, columns=[item, "Form", "CupEquivalentPrice",
+                                               "RetailPrice", "RetailPriceUnit", "Yield"])
 
 
-def best_value_per_base_fruit(df: pd.DataFrame) -> pd.DataFrame:
+def best_value_per_base_fruit(df: pd.DataFrame, commodity: str | None = None) -> pd.DataFrame:
     """
     For each base fruit, return the cheapest cup-equivalent form available.
     """
-    idx = df.groupby("BaseFruit")["CupEquivalentPrice"].idxmin()
+    df = select_commodity(df, commodity)
+    item, base = _item_cols(df)
+    idx = df.groupby(base, observed=True)["CupEquivalentPrice"].idxmin()
     return (
-        df.loc[idx, ["BaseFruit", "Fruit", "Form", "CupEquivalentPrice"]]
+        df.loc[idx, [base, item, "Form", "CupEquivalentPrice"]]
         .reset_index(drop=True)
     )
 
 
-def household_annual_budget(df: pd.DataFrame, strategy: str = "average") -> pd.DataFrame:
+STRATEGIES = ("budget", "average", "premium")
+
+# Columns of the period axis in household_cost_matrix, in order.
+BUDGET_PERIODS = ("Annual_Cost", "Monthly_Cost", "Weekly_Cost", "Daily_Cost")
+
+
+def strategy_reference_prices(df: pd.DataFrame, commodity: str | None = None,
+                              exact: bool = True) -> dict:
+    """
+    Reference $/cup for every shopping strategy from a single partition pass.
+
+    'budget'  — median of the cheapest 25% of items
+    'average' — overall median price
+    'premium' — median of the most expensive 25% of items
+
+    np.partition places the quartile boundaries and the middle element(s) in
+    O(n); each median then only looks at its own slice. No full sort is done.
+    exact=False answers from a QuantileSketch instead (see
+    sketch_reference_prices).
+    """
+    if not exact:
+        return sketch_reference_prices(price_sketch(df, commodity))
+    prices = select_commodity(df, commodity)["CupEquivalentPrice"].to_numpy(dtype="float64")
+    n = len(prices)
+    lo, hi = max(1, n // 4), 3 * n // 4
+    part = np.partition(prices, sorted({lo - 1, hi, (n - 1) // 2, n // 2}))
+    return {
+        "budget":  float(np.median(part[:lo])),
+        "average": float((part[(n - 1) // 2] + part[n // 2]) / 2),
+        "premium": float(np.median(part[hi:])),
+    }
+
+
+def effective_members(adults, children=0, child_weight: float = CHILD_DAILY_CUPS / DAILY_CUPS_ADULT):
+    """
+    Household size in adult-equivalents, for use as household_cost_matrix's
+    ``members``. Accepts scalars or arrays; children count as child_weight of
+    an adult (by default the child-to-adult ratio of recommended cups).
+    """
+    return np.asarray(adults, dtype="float64") + np.asarray(children, dtype="float64") * child_weight
+
+
+def _round_cents(a: np.ndarray) -> np.ndarray:
+    """
+    np.round(a, 2), except values sitting on a half-cent boundary go through
+    Python's round(), which rounds the exact binary value. Keeps the array
+    path identical to the scalar round() the per-household loop used to do.
+    """
+    out    = np.round(a, 2)
+    scaled = a * 100
+    tie    = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if tie.any():
+        out[tie] = [round(float(v), 2) for v in a[tie]]
+    return out
+
+
+def household_cost_matrix(ref_prices: dict, members, cups_per_day: float = DAILY_CUPS_ADULT) -> np.ndarray:
+    """
+    Cost of every household × strategy × period in one broadcast.
+
+    Returns an array of shape (len(members), len(STRATEGIES), len(BUDGET_PERIODS)).
+    Annual cost is rounded to the cent first and the shorter periods are
+    derived from it, matching household_annual_budget.
+    """
+    refs    = np.array([ref_prices[s] for s in STRATEGIES])
+    members = np.asarray(members, dtype="float64").reshape(-1, 1)
+    annual  = _round_cents(cups_per_day * refs * DAYS_PER_YEAR * members)
+    divisor = np.array([1.0, 12.0, 52.0, DAYS_PER_YEAR])
+    return _round_cents(annual[:, :, None] / divisor)
+
+
+def household_annual_budget(df: pd.DataFrame, strategy: str = "average",
+                            ref_prices: dict | None = None,
+                            commodity: str | None = None) -> pd.DataFrame:
     """
     Project annual, monthly, weekly, and daily fruit cost for each household size.
 
@@ -171,35 +579,64 @@ def household_annual_budget(df: pd.DataFrame, strategy: str = "average") -> pd.D
     'budget'  — median of the cheapest 25% of items
     'average' — overall median price
     'premium' — median of the most expensive 25% of items
+
+    Pass ref_prices (from strategy_reference_prices) to skip recomputing them.
     """
-    prices = df["CupEquivalentPrice"].sort_values().values
-    n = len(prices)
+    if ref_prices is None:
+        ref_prices = strategy_reference_prices(df, commodity)
+    if strategy not in ref_prices:
+        strategy = "average"
+    s = STRATEGIES.index(strategy)
+
+    members = np.fromiter(HOUSEHOLD_SIZES.values(), dtype="int64")
+    costs   = household_cost_matrix(ref_prices, members)[:, s, :]
+
+    out = pd.DataFrame({
+        "Household":   list(HOUSEHOLD_SIZES),
+        "Members":     members,
+        "PricePerCup": round(ref_prices[strategy], 4),
+    })
+    for j, col in enumerate(BUDGET_PERIODS):
+        out[col] = costs[:, j]
+    return out
 
-    if strategy == "budget":
-        ref = float(np.median(prices[: max(1, n // 4)]))
-    elif strategy == "premium":
-        ref = float(np.median(prices[3 * n // 4 :]))
-    else:
-        ref = float(np.median(prices))
-
-    rows = []
-    for label, members in HOUSEHOLD_SIZES.items():
-        annual = round(DAILY_CUPS_ADULT * ref * DAYS_PER_YEAR * members, 2)
-        rows.append({
-            "Household":    label,
-            "Members":      members,
-            "PricePerCup":  round(ref, 4),
-            "Annual_Cost":  annual,
-            "Monthly_Cost": round(annual / 12, 2),
-            "Weekly_Cost":  round(annual / 52, 2),
-            "Daily_Cost":   round(annual / DAYS_PER_YEAR, 2),
-        })
-    return pd.DataFrame(rows)
 
+def combined_household_budget(df: pd.DataFrame, strategy: str = "average") -> pd.DataFrame:
+    """
+    Household cost of meeting every commodity's recommendation at once.
+
+    df is a combined frame from build_commodity_dataframe(). Each commodity is
+    priced at its own strategy reference price and DAILY_CUPS_BY_COMMODITY
+    intake; the per-commodity annual costs are reported alongside the total.
+    """
+    if strategy not in STRATEGIES:
+        strategy = "average"
+    s = STRATEGIES.index(strategy)
+    members = np.fromiter(HOUSEHOLD_SIZES.values(), dtype="int64")
 
-def price_range_stats(df: pd.DataFrame) -> dict:
-    """Descriptive statistics for CupEquivalentPrice."""
-    p = df["CupEquivalentPrice"]
+    out = pd.DataFrame({"Household": list(HOUSEHOLD_SIZES), "Members": members})
+    annual = np.zeros(len(members))
+    for commodity in df["Commodity"].cat.categories:
+        refs = strategy_reference_prices(df, commodity)
+        cups = DAILY_CUPS_BY_COMMODITY.get(commodity, DAILY_CUPS_ADULT)
+        out[f"{commodity}_Annual"] = household_cost_matrix(refs, members, cups)[:, s, 0]
+        annual += out[f"{commodity}_Annual"].to_numpy()
+
+    out["Annual_Cost"] = _round_cents(annual)
+    for col, divisor in zip(BUDGET_PERIODS[1:], (12.0, 52.0, DAYS_PER_YEAR)):
+        out[col] = _round_cents(out["Annual_Cost"].to_numpy() / divisor)
+    return out
+
+
+def price_range_stats(df: pd.DataFrame, commodity: str | None = None,
+                      exact: bool = True) -> dict:
+    """
+    Descriptive statistics for CupEquivalentPrice. exact=False takes the
+    median and quartiles from a QuantileSketch (see sketch_price_stats).
+    """
+    if not exact:
+        return sketch_price_stats(price_sketch(df, commodity))
+    p = select_commodity(df, commodity)["CupEquivalentPrice"]
     return {
         "min":    round(float(p.min()),            4),
         "max":    round(float(p.max()),            4),
@@ -211,9 +648,472 @@ def price_range_stats(df: pd.DataFrame) -> dict:
     }
 
 
-def form_distribution(df: pd.DataFrame) -> pd.DataFrame:
+# ── PARTITIONED (SKETCH) STATISTICS ──────────────────────────────────────────
+# Build one sketch per shard with price_sketch(), combine them with
+# QuantileSketch.merge() (to_bytes()/from_bytes() to cross processes), then ask
+# the merged sketch. Quantiles carry sketch.rank_error(k) normalized rank error.
+
+def price_sketch(df: pd.DataFrame, commodity: str | None = None,
+                 k: int = 200) -> QuantileSketch:
+    """QuantileSketch of CupEquivalentPrice for one partition of the data."""
+    prices = select_commodity(df, commodity)["CupEquivalentPrice"].to_numpy(dtype="float64")
+    return QuantileSketch(k).update(prices)
+
+
+def sketch_price_stats(sketch: QuantileSketch) -> dict:
+    """price_range_stats() from a (possibly merged) sketch."""
+    q25, median, q75 = sketch.quantile([0.25, 0.5, 0.75])
+    return {
+        "min":    round(float(sketch.min),  4),
+        "max":    round(float(sketch.max),  4),
+        "mean":   round(float(sketch.mean), 4),
+        "median": round(float(median),      4),
+        "std":    round(float(sketch.std),  4),
+        "q25":    round(float(q25),         4),
+        "q75":    round(float(q75),         4),
+    }
+
+
+def sketch_reference_prices(sketch: QuantileSketch) -> dict:
+    """
+    strategy_reference_prices() from a sketch. The median of the cheapest
+    (dearest) quarter is taken as the 12.5th (87.5th) percentile of the whole,
+    which agrees with the exact tiers once there are a few hundred prices.
+    """
+    budget, average, premium = sketch.quantile([0.125, 0.5, 0.875])
+    return {"budget": float(budget), "average": float(average), "premium": float(premium)}
+
+
+def form_distribution(df: pd.DataFrame, commodity: str | None = None) -> pd.DataFrame:
     """Count and percentage of items by preparation form."""
+    df = select_commodity(df, commodity)
     counts = df["Form"].value_counts().reset_index()
     counts.columns = ["Form", "Count"]
+    counts = counts[counts["Count"] > 0]     # categorical Form lists unused forms too
     counts["Percentage"] = (counts["Count"] / len(df) * 100).round(1)
-    return counts
\ No newline at end of file
+    return counts
+
+
+# ── BASE × FORM PRICE INDEX ─────────────────────────────────────────────────
+
+class RowHeap:
+    """
+    Min-heap of (key, row) entries with lazy deletion, for minima that must
+    follow row updates without rescanning.
+
+    A changed row is simply pushed again with its new key; top() pops the
+    entries whose key no longer matches ``current(row)`` as it meets them.
+    Equal keys go to the lowest row. Keys must not be NaN.
+    """
+
+    __slots__ = ("_heap",)
+
+    def __init__(self, entries=()):
+        self._heap = list(entries)
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, key, row: int) -> None:
+        heapq.heappush(self._heap, (key, row))
+
+    def top(self, current) -> tuple | None:
+        """Smallest (key, row) still current, or None when no row is left."""
+        heap = self._heap
+        while heap and current(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+
+class PriceIndex:
+    """
+    Dense (base item × Form) matrix of the minimum CupEquivalentPrice, with
+    label → position maps, built once per dataset without any groupby.
+
+    Answers price(base, form), cheapest_form(base), the heatmap matrix() and
+    the best-value rows in O(1) / O(forms) per lookup. Rows can be appended
+    with append(), re-priced with set_prices() and dropped with remove(); row
+    positions always match the frame the index was built from (plus appended
+    rows, in order). Updates cost O(changed rows · log) once the per-cell
+    heaps exist; the first update builds them in one pass.
+
+        idx = PriceIndex.from_frame(df)
+        idx.cheapest_form("Apples")      # ("Juice", 0.3043) on fruits.csv
+        idx.price("Apples", "Fresh")     # 0.4996
+    """
+
+    def __init__(self, base_col: str, item_col: str):
+        self.base_col = base_col
+        self.item_col = item_col
+        self.bases: list = []           # row labels, in first-seen order
+        self.forms: list = []           # column labels, in first-seen order
+        self._base_pos: dict = {}
+        self._form_pos: dict = {}
+        # Per source row: cell coordinates, price and item name.
+        self._rb    = np.empty(0, dtype="int64")
+        self._rf    = np.empty(0, dtype="int64")
+        self._price = np.empty(0, dtype="float64")
+        self._items = np.empty(0, dtype=object)
+        # Per cell: minimum price (NaN when empty) and the row holding it.
+        self._min   = np.empty((0, 0), dtype="float64")
+        self._arg   = np.empty((0, 0), dtype="int64")
+        # Built on the first set_prices()/remove(): rows of each cell, and a
+        # RowHeap of (price, row) per cell that has been updated.
+        self._members: dict | None = None
+        self._heaps:   dict = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, commodity: str | None = None) -> "PriceIndex":
+        """Index every row of df (or of one commodity in a combined frame)."""
+        df = select_commodity(df, commodity)
+        item, base = _item_cols(df)
+        idx = cls(base, item)
+        idx.append(df)
+        return idx
+
+    # ── building & updates ───────────────────────────────────
+    def _codes(self, labels, pos: dict, names: list) -> np.ndarray:
+        """Positions of labels, registering unseen ones (sorted) at the end."""
+        codes, uniques = pd.factorize(np.asarray(labels, dtype=object), sort=True)
+        new = [u for u in uniques if u not in pos]
+        for u in new:
+            pos[u] = len(names)
+            names.append(u)
+        lookup = np.fromiter((pos[u] for u in uniques), dtype="int64", count=len(uniques))
+        return lookup[codes]
+
+    def append(self, rows: pd.DataFrame) -> None:
+        """Add rows (same columns as the indexed frame) after the existing ones."""
+        if rows.empty:
+            return
+        start = len(self._price)
+        rb = self._codes(rows[self.base_col], self._base_pos, self.bases)
+        rf = self._codes(rows["Form"], self._form_pos, self.forms)
+        self._rb    = np.concatenate([self._rb, rb])
+        self._rf    = np.concatenate([self._rf, rf])
+        self._price = np.concatenate([self._price, rows["CupEquivalentPrice"].to_numpy(dtype="float64")])
+        self._items = np.concatenate([self._items, rows[self.item_col].to_numpy(dtype=object)])
+        if self._members is not None:
+            for row, cell in enumerate(zip(rb.tolist(), rf.tolist()), start):
+                self._members.setdefault(cell, []).append(row)
+                if cell in self._heaps:
+                    self._heaps[cell].push(float(self._price[row]), row)
+
+        shape = (len(self.bases), len(self.forms))
+        if self._min.shape != shape:
+            grown = np.full(shape, np.nan)
+            grown[: self._min.shape[0], : self._min.shape[1]] = self._min
+            arg = np.full(shape, -1, dtype="int64")
+            arg[: self._arg.shape[0], : self._arg.shape[1]] = self._arg
+            self._min, self._arg = grown, arg
+
+        # Cheapest new row per cell: stable sort by (cell, price) and take the
+        # first of each run, so ties keep the earliest row like idxmin().
+        cell  = rb * shape[1] + rf
+        price = self._price[start:]
+        order = np.lexsort((price, cell))
+        first = order[np.r_[True, cell[order][1:] != cell[order][:-1]]]
+        b, f  = rb[first], rf[first]
+        better = np.isnan(self._min[b, f]) | (price[first] < self._min[b, f])
+        self._min[b[better], f[better]] = price[first][better]
+        self._arg[b[better], f[better]] = start + first[better]
+
+    def set_prices(self, positions, prices) -> None:
+        """Change the price of existing rows (by position) and refresh their cells."""
+        positions = np.atleast_1d(np.asarray(positions, dtype="int64"))
+        self._price[positions] = np.atleast_1d(np.asarray(prices, dtype="float64"))
+        if self._members is None:
+            self._members = {}
+            for row, cell in enumerate(zip(self._rb.tolist(), self._rf.tolist())):
+                self._members.setdefault(cell, []).append(row)
+        touched = set()
+        for row in positions.tolist():
+            cell = (int(self._rb[row]), int(self._rf[row]))
+            touched.add(cell)
+            price = float(self._price[row])
+            if cell in self._heaps and price == price:      # NaN rows are not pushed
+                self._heaps[cell].push(price, row)
+        for cell in touched:
+            self._refresh(cell)
+
+    def remove(self, positions) -> None:
+        """Drop rows from every lookup. Their positions stay taken (as NaN)."""
+        positions = np.atleast_1d(np.asarray(positions, dtype="int64"))
+        self.set_prices(positions, np.full(len(positions), np.nan))
+
+    def _refresh(self, cell: tuple) -> None:
+        """Re-derive one cell's minimum from its heap (built on first use)."""
+        members = self._members[cell]
+        heap = self._heaps.get(cell)
+        # Rebuild when stale entries dominate, so heaps stay O(cell size).
+        if heap is None or len(heap) > 2 * len(members) + 16:
+            heap = self._heaps[cell] = RowHeap(
+                (float(self._price[r]), r) for r in members if self._price[r] == self._price[r])
+        top = heap.top(self._price.__getitem__)
+        self._min[cell], self._arg[cell] = (np.nan, -1) if top is None else top
+
+    # ── lookups ──────────────────────────────────────────────
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self._min.shape
+
+    def price(self, base, form) -> float:
+        """Minimum $/cup of base in form, NaN if that combination has no row."""
+        b, f = self._base_pos.get(base), self._form_pos.get(form)
+        return float("nan") if b is None or f is None else float(self._min[b, f])
+
+    def cheapest_form(self, base) -> tuple:
+        """(form, $/cup) of the cheapest form available for base."""
+        b = self._base_pos[base]
+        f = self._best_forms()[b]
+        return self.forms[f], float(self._min[b, f])
+
+    def _best_forms(self) -> np.ndarray:
+        # Per base, the cheapest cell; equal prices go to the earliest row.
+        arg = np.where(np.isnan(self._min), np.iinfo("int64").max, self._arg)
+        low = np.fmin.reduce(self._min, axis=1, keepdims=True)
+        return np.argmin(np.where(self._min == low, arg, np.iinfo("int64").max), axis=1)
+
+    def best_positions(self) -> np.ndarray:
+        """Row positions of the cheapest row per base, ordered by base name."""
+        order = np.argsort(np.asarray(self.bases, dtype=object), kind="stable")
+        order = order[(self._arg[order] >= 0).any(axis=1)]      # bases with rows left
+        return self._arg[order, self._best_forms()[order]]
+
+    def best_value(self) -> pd.DataFrame:
+        """best_value_per_base_fruit() answered from the index."""
+        pos = self.best_positions()
+        return pd.DataFrame({
+            self.base_col:        np.asarray(self.bases, dtype=object)[self._rb[pos]],
+            self.item_col:        self._items[pos],
+            "Form":               np.asarray(self.forms, dtype=object)[self._rf[pos]],
+            "CupEquivalentPrice": self._price[pos],
+        })
+
+    def matrix(self) -> pd.DataFrame:
+        """The heatmap: base × form minimum prices, labels sorted (as pivot_table)."""
+        rows = np.argsort(np.asarray(self.bases, dtype=object), kind="stable")
+        cols = np.argsort(np.asarray(self.forms, dtype=object), kind="stable")
+        filled = self._arg >= 0                 # labels whose rows were all removed drop out
+        rows, cols = rows[filled[rows].any(axis=1)], cols[filled[:, cols].any(axis=0)]
+        return pd.DataFrame(self._min[np.ix_(rows, cols)],
+                            index=pd.Index([self.bases[i] for i in rows], name=self.base_col),
+                            columns=pd.Index([self.forms[j] for j in cols], name="Form"))
+
+
+# ── SERVER-SIDE ROW QUERIES ─────────────────────────────────────────────────
+# Sorting, filtering and paging for grids that fetch one window of rows at a
+# time. sort_model / filter_model follow AG Grid's getRowsRequest format.
+
+_NUMBER_OPS = {
+    "equals":             lambda s, v, _: s == v,
+    "notEqual":           lambda s, v, _: s != v,
+    "lessThan":           lambda s, v, _: s < v,
+    "lessThanOrEqual":    lambda s, v, _: s <= v,
+    "greaterThan":        lambda s, v, _: s > v,
+    "greaterThanOrEqual": lambda s, v, _: s >= v,
+    "inRange":            lambda s, v, to: (s >= v) & (s <= to),
+    "blank":              lambda s, v, _: s.isna(),
+    "notBlank":           lambda s, v, _: s.notna(),
+}
+
+_TEXT_OPS = {
+    "contains":    lambda s, v: s.str.contains(v, regex=False),
+    "notContains": lambda s, v: ~s.str.contains(v, regex=False),
+    "equals":      lambda s, v: s == v,
+    "notEqual":    lambda s, v: s != v,
+    "startsWith":  lambda s, v: s.str.startswith(v),
+    "endsWith":    lambda s, v: s.str.endswith(v),
+    "blank":       lambda s, v: s == "",
+    "notBlank":    lambda s, v: s != "",
+}
+
+
+def _condition_mask(col: pd.Series, cond: dict) -> np.ndarray:
+    if "conditions" in cond:                    # combined AND / OR filter
+        ftype = cond.get("filterType")
+        masks = [_condition_mask(col, {"filterType": ftype, **c}) for c in cond["conditions"]]
+        combine = np.logical_or if cond.get("operator") == "OR" else np.logical_and
+        return combine.reduce(masks)
+
+    op = cond.get("type", "equals")
+    if cond.get("filterType") == "number":
+        if op not in _NUMBER_OPS:
+            raise ValueError(f"Unsupported number filter: {op!r}")
+        return np.asarray(_NUMBER_OPS[op](col, cond.get("filter"), cond.get("filterTo")))
+
+    if op not in _TEXT_OPS:
+        raise ValueError(f"Unsupported text filter: {op!r}")
+    # Item/form/unit columns repeat a few values many times: evaluate the
+    # string op once per distinct value and broadcast through the codes.
+    codes, uniques = pd.factorize(col)
+    text = pd.Series([str(u).lower() for u in uniques] + [""], dtype=object)
+    hit  = np.asarray(_TEXT_OPS[op](text, str(cond.get("filter", "")).lower()), dtype=bool)
+    return hit[codes]
+
+
+def filter_mask(df: pd.DataFrame, filter_model: dict | None) -> np.ndarray | None:
+    """Boolean row mask for an AG Grid filter model, or None if nothing is filtered."""
+    if not filter_model:
+        return None
+    mask = np.ones(len(df), dtype=bool)
+    for col, cond in filter_model.items():
+        mask &= _condition_mask(df[col], cond)
+    return mask
+
+
+def sort_positions(df: pd.DataFrame, by: tuple = ()) -> np.ndarray:
+    """
+    Row positions of df ordered by ``by`` — a tuple of (column, ascending)
+    pairs. An empty ``by`` keeps the frame order.
+    """
+    if not by:
+        return np.arange(len(df))
+    cols = [c for c, _ in by]
+    asc  = [a for _, a in by]
+    order = df[cols].reset_index(drop=True).sort_values(cols, ascending=asc, kind="stable")
+    return order.index.to_numpy()
+
+
+def query_rows(df: pd.DataFrame, start: int, end: int, sort_model: list | None = None,
+               filter_model: dict | None = None, order: np.ndarray | None = None
+               ) -> tuple[pd.DataFrame, int]:
+    """
+    One window [start, end) of df after filtering and sorting, plus the total
+    number of rows matching the filter.
+
+    ``order`` may be passed a precomputed sort_positions() result for the same
+    sort model so repeated page requests skip the sort entirely.
+    """
+    if order is None:
+        by = tuple((s["colId"], s["sort"] == "asc") for s in (sort_model or []))
+        order = sort_positions(df, by)
+    mask = filter_mask(df, filter_model)
+    if mask is not None:
+        order = order[mask[order]]
+    return df.iloc[order[start:end]], len(order)
+
+
+# ── LAZY ANALYSIS CONTEXT ───────────────────────────────────────────────────
+
+class AnalysisContext:
+    """
+    Memoized view of the analysis functions above over one enriched DataFrame.
+
+    Each summary is computed on first access and kept until set_data() swaps
+    in a new frame, which drops every cached result and bumps ``version``.
+    snapshot() pins a context to the current frame, for work that must not
+    straddle a swap (e.g. building and caching a figure under one version).
+    Pass commodity to serve one commodity of a combined frame, so several
+    contexts can share one loaded frame. Returned frames are shared between
+    callers and must not be mutated.
+    """
+
+    def __init__(self, df: pd.DataFrame, commodity: str | None = None):
+        # (df, memo, version) are swapped together so a reader never pairs a
+        # new frame with results (or a version) from the old one. With a
+        # commodity set, df is the filtered view of the frame passed in.
+        self.commodity = commodity
+        self._state = (select_commodity(df, commodity), {}, 0)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._state[0]
+
+    @property
+    def version(self) -> int:
+        return self._state[2]
+
+    def snapshot(self) -> "AnalysisContext":
+        """A context fixed to the current frame, sharing its memoized results."""
+        snap = object.__new__(AnalysisContext)
+        snap.commodity, snap._state = self.commodity, self._state
+        return snap
+
+    # Summaries computed ahead of the swap by set_data(warm=True).
+    _WARM = ("stats", "form_summary", "price_index", "best_value", "form_dist",
+             "reference_prices")
+
+    def set_data(self, df: pd.DataFrame, warm: bool = False) -> None:
+        """
+        Replace the underlying frame and invalidate all cached summaries.
+
+        warm=True computes the common summaries on the new frame first, so
+        the swap hands readers a fully populated state in one assignment.
+        """
+        if warm:
+            staged = AnalysisContext(df, self.commodity)
+            for name in self._WARM:
+                getattr(staged, name)
+            df, memo, _ = staged._state
+        else:
+            df, memo = select_commodity(df, self.commodity), {}
+        self._state = (df, memo, self.version + 1)
+
+    def _get(self, key, fn, *args, state: tuple | None = None):
+        df, memo, _ = self._state if state is None else state
+        if key not in memo:
+            memo[key] = fn(df, *args)
+        return memo[key]
+
+    @property
+    def stats(self) -> dict:
+        return self._get("stats", price_range_stats)
+
+    @property
+    def form_summary(self) -> pd.DataFrame:
+        return self._get("form_summary", cost_summary_by_form)
+
+    @property
+    def price_index(self) -> "PriceIndex":
+        return self._get("price_index", PriceIndex.from_frame)
+
+    @property
+    def best_value(self) -> pd.DataFrame:
+        """best_value_per_base_fruit(), read off the price index."""
+        state = self._state                 # index and rows from the same frame
+
+        def pick(df):
+            item, base = _item_cols(df)
+            index = self._get("price_index", PriceIndex.from_frame, state=state)
+            rows = df.iloc[index.best_positions()]
+            return rows[[base, item, "Form", "CupEquivalentPrice"]].reset_index(drop=True)
+        return self._get("best_value", pick, state=state)
+
+    @property
+    def form_dist(self) -> pd.DataFrame:
+        return self._get("form_dist", form_distribution)
+
+    def cheapest(self, n: int = 15) -> pd.DataFrame:
+        return self._get(("cheapest", n), cheapest_items, n)
+
+    def most_expensive(self, n: int = 15) -> pd.DataFrame:
+        return self._get(("most_expensive", n), most_expensive_items, n)
+
+    def top_k(self, k: int, column: str = "CupEquivalentPrice", largest: bool = False,
+              by: str | None = None) -> pd.DataFrame:
+        return self._get(("top_k", k, column, largest, by), top_k, k, column, largest, by)
+
+    @property
+    def reference_prices(self) -> dict:
+        return self._get("reference_prices", strategy_reference_prices)
+
+    def household(self, strategy: str = "average") -> pd.DataFrame:
+        return self._get(("household", strategy), household_annual_budget,
+                         strategy, self.reference_prices)
+
+    def household_matrix(self, members, cups_per_day: float = DAILY_CUPS_ADULT) -> np.ndarray:
+        """household_cost_matrix() for arbitrary members using the cached reference prices."""
+        return household_cost_matrix(self.reference_prices, members, cups_per_day)
+
+    def sort_positions(self, by: tuple = ()) -> np.ndarray:
+        return self._get(("sort_positions", by), sort_positions, by)
+
+    def query_rows(self, start: int, end: int, sort_model: list | None = None,
+                   filter_model: dict | None = None) -> tuple[pd.DataFrame, int]:
+        """query_rows() over the current frame, reusing memoized sort orders."""
+        state = self._state
+        by = tuple((s["colId"], s["sort"] == "asc") for s in (sort_model or []))
+        return query_rows(state[0], start, end, filter_model=filter_model,
+                          order=self._get(("sort_positions", by), sort_positions, by, state=state))